@@ -1,380 +1,339 @@
 import json
+from dataclasses import replace
 from pathlib import Path
-from datetime import date, timedelta
+from datetime import date
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 import streamlit.components.v1 as components
 
+import diagnostics
+from baselines import Baseline, validate_baseline_name
+from business_calendar import BusinessCalendar
+from event_log import ROW_FIELD, EventLog, local_time, schedule_as_of
+from forecast import forecast_milestones, kickoff_sweep, sample_budget
+from gantt_svg import render_gantt_svg, svg_height
+from mermaid_export import build_mermaid
+from resource_leveling import DEFAULT_CAPACITY, RESOURCE_COLUMN, SHIFT_COLUMN, split_assignees
+from scenarios import (
+    SCENARIO_FIELDS,
+    Scenario,
+    scenario_diff,
+    scenario_summary,
+    scenarios_from_json,
+    scenarios_to_json,
+    validate_overrides,
+)
+from schedule_cache import (
+    FORECASTS,
+    GANTT_SVG,
+    MERMAID,
+    SWEEPS,
+    cache_stats,
+    cached_baseline_report,
+    cached_leveled_schedule,
+    cached_scenario,
+    cached_schedule,
+    leveled_key,
+    schedule_key,
+    task_index,
+)
+from scheduling import IncrementalScheduler, split_dependencies
+from plan_io import MIME_TYPES, available_formats, detect_format, detect_mapping, import_plan, read_headers, schedule_file
+from plan_templates import default_df
+from portfolio import Portfolio
+from state_store import REQUIRED_COLUMNS, TASK_COLUMNS, Snapshot, SqliteStateStore
+from status_rules import (
+    STATUS_OPTIONS,
+    apply_status,
+    apply_status_batch,
+    dependency_ids,
+    diff_rows,
+    get_status,
+    pending_dependencies,
+    revert_event,
+    validate_status_edits,
+)
+from task_table import editor_frame, set_value
+from task_view import PAGE_SIZES, TaskView, filter_mask, merge_slice, page_count, visible_positions
+
 
 # =========================
 # CONFIG + PERSISTENCIA
 # =========================
 st.set_page_config(page_title="Cronograma Plan 4 (E-Commerce)", layout="wide")
 
-STATE_FILE = Path("cronograma_plan4_state.json")
-
-STATUS_OPTIONS = ["Pendiente", "En proceso", "Finalizado", "Atrasado"]
-
-TASKS_DEFAULT = [
-    # =========================
-    # INICIO
-    # =========================
-    ("Inicio", "t0", "T0 Kickoff + Brief", "", 1),
-
-    # =========================
-    # CARRIL A: WEB (TU LISTA)
-    # =========================
-    ("Base técnica", "t1", "T1 Insumos y accesos (cliente)", "t0", 2),
-    ("Base técnica", "t2", "T2 Setup plataforma + SSL base", "t1", 2),
-
-    # =========================
-    # CARRIL B: MARCA (PARALELO TEMPRANO)
-    # (estos corren mientras haces t1–t2)
-    # =========================
-    ("Marca — Estrategia", "b1", "B1 Recolección de info marca (inputs + referencias)", "t0", 1),
-    ("Marca — Estrategia", "b2", "B2 Propuesta de valor + posicionamiento + tono + pilares", "b1", 2),
-    ("Marca — Estrategia", "b3", "B3 Buyer persona + benchmark + canales", "b2", 1),
-
-    # =========================
-    # GATE 1 (amarrar antes de arquitectura)
-    # Se agenda al cierre de base técnica: asumimos b1–b3 ya listos para ese día
-    # =========================
-    ("Gates", "g1", "G1 CIERRE: tono + PV + categorías v1 (listo para sitemap)", "t2", 1),
-
-    # =========================
-    # WEB: arquitectura
-    # =========================
-    ("Base técnica", "t3", "T3 Arquitectura de páginas + navegación", "g1", 2),
-
-    # =========================
-    # MARCA: identidad (corre en paralelo a t3)
-    # =========================
-    ("Marca — Identidad", "b4", "B4 Identidad visual v1 (logo/paleta/tipografías)", "g1", 2),
-
-    # =========================
-    # GATE 2 (bloquea el UI)
-    # Se agenda al terminar t3: asumimos b4 ya listo para este día
-    # =========================
-    ("Gates", "g2", "G2 CIERRE: mini manual v1 (UI listo para diseñar)", "t3", 1),
-
-    # =========================
-    # WEB: diseño + tienda
-    # =========================
-    ("Diseño y tienda", "t4", "T4 Diseño UI (home + tienda/producto)", "g2", 3),
-
-    # =========================
-    # MARCA: arquitectura comercial (corre en paralelo a t4)
-    # =========================
-    ("Marca — Comercial", "b5", "B5 Arquitectura comercial (mix, categorías, naming, pricing)", "g2", 2),
-    ("Marca — Comercial", "b6", "B6 Reglas upsell/cross-sell + bundles (v1)", "b5", 1),
-
-    # =========================
-    # GATE 3 (bloquea catálogo/checkout)
-    # Se agenda al terminar t4: asumimos b5–b6 ya listos para este día
-    # =========================
-    ("Gates", "g3", "G3 CIERRE: catálogo v1 + upsell/cross-sell (para plantillas)", "t4", 1),
-
-    ("Diseño y tienda", "t5", "T5 Catálogo (categorías/atributos/stock)", "g3", 2),
-    ("Diseño y tienda", "t6", "T6 Carrito + Checkout (flujo completo)", "t5", 2),
-
-    # =========================
-    # WEB: integraciones
-    # =========================
-    ("Integraciones", "t7", "T7 Pagos (Webpay y/o Mercado Pago)", "t6", 2),
-    ("Integraciones", "t8", "T8 Envíos (métodos y reglas)", "t7", 1),
-
-    # =========================
-    # MARCA: copy base (corre en paralelo a pagos/envíos)
-    # =========================
-    ("Marca — Copy", "b7", "B7 Copy base (About, tagline, soporte, tono en mensajes)", "g3", 2),
-
-    # =========================
-    # GATE 4 (bloquea emails transaccionales)
-    # Se agenda al terminar envíos: asumimos b7 ya listo para este día
-    # =========================
-    ("Gates", "g4", "G4 CIERRE: copy base aprobado (emails + UX ready)", "t8", 1),
-
-    ("Integraciones", "t9", "T9 Correos transaccionales", "g4", 1),
-
-    # =========================
-    # WEB: contenido + QA
-    # =========================
-    ("Contenido + QA", "t10", "T10 Carga inicial productos (hasta 15)", "t9", 2),
-    ("Contenido + QA", "t11", "T11 QA funcional + correcciones", "t10", 2),
-
-    # =========================
-    # WEB: soporte + salida
-    # =========================
-    ("Soporte + salida", "t12", "T12 Agente conversacional AI + FAQ base", "t11", 2),
-
-    # =========================
-    # MARCA: checklist + kit (corre mientras haces AI/FAQ)
-    # =========================
-    ("Marca — Implementación", "b8", "B8 Checklist de aplicación (web/RRSS/emails/consistencia)", "g4", 1),
-    ("Marca — Implementación", "b9", "B9 Kit de marca + templates (RRSS/headers/emails)", "b8", 1),
-
-    ("Soporte + salida", "t13", "T13 Capacitación + guía breve", "t12", 1),
-
-    # =========================
-    # GATE 5 (bloquea go-live)
-    # Se agenda al terminar capacitación: asumimos b8–b9 ya listos para este día
-    # =========================
-    ("Gates", "g5", "G5 CIERRE: checklist ok + activos listos (salida controlada)", "t13", 1),
-
-    ("Soporte + salida", "t14", "T14 Publicación (Go-Live) + verificación", "g5", 1),
-]
-
-
-
-def default_df() -> pd.DataFrame:
-    df = pd.DataFrame(
-        TASKS_DEFAULT,
-        columns=["Fase", "ID", "Tarea", "Depende_de", "Duración (días hábiles)"]
-    )
-    df["Estado"] = "Pendiente"
-    df["Desviación (días hábiles)"] = 0  # + atraso, - adelanto
-    return df
-
-
-def load_state():
-    if not STATE_FILE.exists():
-        return None
-    try:
-        raw = json.loads(STATE_FILE.read_text(encoding="utf-8"))
-        df = pd.DataFrame(raw["tasks"])
-
-        needed = {"Fase", "ID", "Tarea", "Depende_de", "Duración (días hábiles)", "Estado"}
-        if not needed.issubset(set(df.columns)):
-            return None
-
-        # retro-compat: si el json anterior no tenía desviación
-        if "Desviación (días hábiles)" not in df.columns:
-            df["Desviación (días hábiles)"] = 0
-
-        start_iso = raw.get("start_date", date.today().isoformat())
-        excludes_weekends = bool(raw.get("excludes_weekends", True))
-        return df, date.fromisoformat(start_iso), excludes_weekends
-    except Exception:
-        return None
-
-
-def save_state(df: pd.DataFrame, start: date, excludes_weekends: bool):
-    payload = {
-        "start_date": start.isoformat(),
-        "excludes_weekends": bool(excludes_weekends),
-        "tasks": df.to_dict(orient="records"),
-    }
-    STATE_FILE.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-
-
-def init_state():
-    loaded = load_state()
-    if loaded is None:
-        st.session_state["tasks_df"] = default_df()
-        st.session_state["start_date"] = date.today()
-        st.session_state["excludes_weekends"] = True
-        save_state(st.session_state["tasks_df"], st.session_state["start_date"], st.session_state["excludes_weekends"])
-    else:
-        df, sd, ew = loaded
-        st.session_state["tasks_df"] = df
-        st.session_state["start_date"] = sd
-        st.session_state["excludes_weekends"] = ew
-
-
-if "tasks_df" not in st.session_state:
-    init_state()
-
-
-# =========================
-# REGLAS DE DEPENDENCIA
-# =========================
-def get_status(df: pd.DataFrame, task_id: str) -> str | None:
-    m = df.loc[df["ID"] == task_id, "Estado"]
-    return None if m.empty else str(m.iloc[0])
-
-
-def has_dependents_in_progress_or_done(df: pd.DataFrame, task_id: str) -> bool:
-    deps = df[df["Depende_de"] == task_id]
-    if deps.empty:
-        return False
-    return any(deps["Estado"].isin(["En proceso", "Finalizado"]))
+STATE_DB = Path("cronograma_plan4_state.sqlite")
+STATE_FILE = Path("cronograma_plan4_state.json")  # formato anterior: se migra al SQLite en el primer arranque
 
+# sobre este tamaño el texto Mermaid solo se ofrece como descarga (no se envía al navegador)
+MERMAID_PREVIEW_MAX_ROWS = 300
 
-def can_set_status(df: pd.DataFrame, task_id: str, new_status: str) -> tuple[bool, str]:
-    row = df[df["ID"] == task_id]
-    if row.empty:
-        return False, "Tarea no encontrada."
+# filas de la tabla de diferencias de un escenario que se envían al navegador
+SCENARIO_DIFF_MAX_ROWS = 1000
 
-    dep = str(row["Depende_de"].iloc[0]).strip()
-    current = str(row["Estado"].iloc[0])
+# filas del detalle por tarea contra una línea base que se envían al navegador
+BASELINE_TASK_MAX_ROWS = 1000
 
-    # No avanzar si dependencia no está finalizada
-    if dep:
-        dep_status = get_status(df, dep)
-        if new_status in ["En proceso", "Finalizado", "Atrasado"] and dep_status != "Finalizado":
-            return False, f"No puedes marcar esta tarea como '{new_status}' porque depende de '{dep}' y aún no está Finalizado."
+# hitos (columnas) de la tabla de sensibilidad al kickoff que se envían al navegador
+SWEEP_MAX_MILESTONES = 25
+WEEKDAYS = ["lun", "mar", "mié", "jue", "vie", "sáb", "dom"]
 
-    # Si ya hay tareas hijas en proceso/finalizadas, no permitir que esta baje de Finalizado
-    if current == "Finalizado" and new_status != "Finalizado":
-        if has_dependents_in_progress_or_done(df, task_id):
-            return False, "No puedes cambiar esta tarea desde 'Finalizado' porque hay tareas posteriores que ya están En proceso o Finalizado."
+# cada cuántos segundos se revisa si otra sesión guardó cambios
+POLL_SECONDS = 5
 
-    if new_status not in STATUS_OPTIONS:
-        return False, "Estado inválido."
 
-    return True, ""
+# ?proyecto=<slug> abre un proyecto del portafolio; sin parámetro, el plan principal
+PROJECT = st.query_params.get("proyecto", "")
 
+# diagnóstico opcional por sesión: tramos cronometrados y contadores del rerun (y un perfil
+# cProfile si se pidió). Apagado, la instrumentación de abajo no hace nada.
+st.sidebar.toggle("Diagnóstico de rendimiento", key="diag_on")
+diagnostics.begin(
+    st.session_state.get("diag_on", False),
+    label=PROJECT or "plan principal",
+    profile=st.session_state.get("diag_on", False) and st.session_state.get("diag_profile", False),
+)
 
-def apply_status(df: pd.DataFrame, task_id: str, new_status: str) -> tuple[pd.DataFrame, bool, str]:
-    ok, msg = can_set_status(df, task_id, new_status)
-    if not ok:
-        return df, False, msg
-
-    idx = df.index[df["ID"] == task_id]
-    if len(idx) != 1:
-        return df, False, "No se pudo actualizar (ID duplicado o inexistente)."
-
-    df.loc[idx[0], "Estado"] = new_status
-
-    # regla suave: si marcas "Atrasado" y la desviación es 0, setear a +1 por defecto
-    if new_status == "Atrasado":
-        try:
-            if int(df.loc[idx[0], "Desviación (días hábiles)"]) == 0:
-                df.loc[idx[0], "Desviación (días hábiles)"] = 1
-        except Exception:
-            df.loc[idx[0], "Desviación (días hábiles)"] = 1
-
-    return df, True, ""
 
+@st.cache_resource
+def get_portfolio() -> Portfolio:
+    return Portfolio()
 
-# =========================
-# CÁLCULO DE FECHAS (para mostrar fin de proyecto)
-# =========================
-def is_weekend(d: date) -> bool:
-    return d.weekday() >= 5  # 5=sáb, 6=dom
 
+@st.cache_resource
+def get_main_store() -> SqliteStateStore:
+    # un store por proceso, compartido por todas las sesiones
+    return SqliteStateStore(STATE_DB, legacy_json=STATE_FILE, event_log=EventLog.beside(STATE_DB))
 
-def next_business_day(d: date, exclude_weekends: bool) -> date:
-    if not exclude_weekends:
-        return d
-    while is_weekend(d):
-        d += timedelta(days=1)
-    return d
 
+def get_store() -> SqliteStateStore:
+    return get_portfolio().store(PROJECT) if PROJECT else get_main_store()
 
-def add_business_days(start: date, n: int, exclude_weekends: bool) -> date:
-    """
-    Devuelve la fecha final al sumar n días hábiles a start.
-    Convención: si n=1, termina el mismo día (start).
-    """
-    start = next_business_day(start, exclude_weekends)
-    if n <= 1:
-        return start
 
-    d = start
-    remaining = n - 1
-    while remaining > 0:
-        d += timedelta(days=1)
-        if exclude_weekends and is_weekend(d):
-            continue
-        remaining -= 1
-    return d
+def use_snapshot(snap: Snapshot):
+    # la sesión pasa a mostrar lo guardado (incluye cambios de otras sesiones) y lo usa como base
+    st.session_state["base"] = snap
+    st.session_state["tasks_df"] = snap.df
+    st.session_state["start_date"] = snap.start_date
+    st.session_state["excludes_weekends"] = snap.excludes_weekends
+    st.session_state["excludes_holidays"] = snap.excludes_holidays
+    st.session_state["capacities"] = read_capacities(snap.meta)
+    st.session_state["scenarios"] = scenarios_from_json(snap.meta.get("escenarios"))
 
 
-def next_day_after(end_date: date, exclude_weekends: bool) -> date:
-    d = end_date + timedelta(days=1)
-    return next_business_day(d, exclude_weekends)
+def read_capacities(meta: dict[str, str]) -> dict[str, int]:
+    # capacidad diaria (%) por responsable; se guarda como JSON en la meta del plan
+    try:
+        raw = json.loads(meta.get("capacidades") or "{}")
+        return {str(k): max(1, int(v)) for k, v in raw.items()}
+    except (ValueError, TypeError, AttributeError):
+        return {}
+
+
+@diagnostics.traced("cargar estado")
+def load_state() -> Snapshot | None:
+    return get_store().load_snapshot()
+
+
+@diagnostics.traced("guardar estado")
+def save_state(df: pd.DataFrame, start: date, excludes_weekends: bool, excludes_holidays: bool):
+    # escritura optimista contra la versión que leyó esta sesión (ver SqliteStateStore.save)
+    result = get_store().save(
+        df,
+        start,
+        excludes_weekends,
+        excludes_holidays,
+        base=st.session_state.get("base"),
+        actor=st.session_state.get("actor", ""),
+    )
+    use_save_result(result)
 
 
-def effective_duration(row: pd.Series) -> int:
-    base = int(row["Duración (días hábiles)"])
-    delta = int(row.get("Desviación (días hábiles)", 0))
-    return max(1, base + delta)
+def use_save_result(result):
+    use_snapshot(result.snapshot)
+    if result.conflicts:
+        st.session_state["save_conflicts"] = result.conflicts
+    if result.conflicts or result.remote_changes:
+        st.rerun()  # la tabla en pantalla ya no es la guardada
 
 
-def build_schedule(df_in: pd.DataFrame, kickoff: date, exclude_weekends: bool) -> pd.DataFrame:
-    """
-    Calcula inicio/fin por dependencia, usando duración efectiva (base + desviación).
-    Propaga atrasos/adelantos automáticamente.
-    """
-    df = df_in.copy()
-    df["Inicio"] = pd.NaT
-    df["Fin"] = pd.NaT
-    df["Duración efectiva (días hábiles)"] = df.apply(effective_duration, axis=1)
-
-    by_id = {r["ID"]: i for i, r in df.iterrows()}
-
-    # asume dependencias simples (una por tarea). resuelve por iteraciones.
-    unresolved = set(df["ID"].tolist())
-    safety = 0
-
-    while unresolved and safety < 999:
-        safety += 1
-        progressed = False
-
-        for tid in list(unresolved):
-            i = by_id[tid]
-            dep = str(df.loc[i, "Depende_de"]).strip()
-
-            if tid == "t0":
-                start = next_business_day(kickoff, exclude_weekends)
-                dur = int(df.loc[i, "Duración efectiva (días hábiles)"])
-                end = add_business_days(start, dur, exclude_weekends)
-                df.loc[i, "Inicio"] = pd.Timestamp(start)
-                df.loc[i, "Fin"] = pd.Timestamp(end)
-                unresolved.remove(tid)
-                progressed = True
-                continue
-
-            if dep:
-                if dep in unresolved:
-                    continue  # aún no calculamos el dep
-                dep_idx = by_id[dep]
-                dep_end = df.loc[dep_idx, "Fin"]
-                if pd.isna(dep_end):
-                    continue
-                start = next_day_after(dep_end.date(), exclude_weekends)
-            else:
-                start = next_business_day(kickoff, exclude_weekends)
+def init_state():
+    loaded = load_state()
+    if loaded is None:
+        save_state(default_df(), date.today(), True, False)
+    else:
+        use_snapshot(loaded)
 
-            dur = int(df.loc[i, "Duración efectiva (días hábiles)"])
-            end = add_business_days(start, dur, exclude_weekends)
 
-            df.loc[i, "Inicio"] = pd.Timestamp(start)
-            df.loc[i, "Fin"] = pd.Timestamp(end)
-            unresolved.remove(tid)
-            progressed = True
+if PROJECT and not get_portfolio().exists(PROJECT):
+    st.error(f"No existe el proyecto '{PROJECT}' en el portafolio.")
+    st.stop()
 
-        if not progressed:
-            break
+if "tasks_df" not in st.session_state or st.session_state.get("project") != PROJECT:
+    init_state()
+    st.session_state["project"] = PROJECT
 
-    return df
 
 
 # =========================
 # UI
 # =========================
 st.title("ANEXO B — Cronograma de Implementación (Carta Gantt)")
+st.sidebar.text_input("Tu nombre (para el historial)", key="actor")
+if PROJECT:
+    st.caption(f"Proyecto del portafolio: **{get_store().meta().get('nombre', PROJECT)}**")
+for msg in st.session_state.pop("save_conflicts", []):
+    st.warning(msg)
+if st.session_state.pop("remote_loaded", False):
+    st.toast("Se cargaron cambios guardados por otra sesión.")
 st.caption("Desviación en días hábiles: +N atrasa y propaga el atraso; -N adelanta y propaga el adelanto.")
 
-t1, t2, t3 = st.columns([1.2, 1.2, 2.6])
+t1, t2, t3, t4 = st.columns([1.2, 1.2, 1.2, 1.4])
 with t1:
     start_date = st.date_input("Fecha de inicio (Kickoff)", value=st.session_state["start_date"])
 with t2:
     excludes_weekends = st.toggle("Excluir fines de semana", value=st.session_state["excludes_weekends"])
 with t3:
+    excludes_holidays = st.toggle(
+        "Excluir feriados (Chile)",
+        value=st.session_state["excludes_holidays"],
+        help="Feriados nacionales (no incluye regionales ni electorales).",
+    )
+with t4:
     if st.button("Resetear cronograma", use_container_width=True):
         st.session_state["tasks_df"] = default_df()
         st.session_state["start_date"] = date.today()
         st.session_state["excludes_weekends"] = True
-        save_state(st.session_state["tasks_df"], st.session_state["start_date"], st.session_state["excludes_weekends"])
+        st.session_state["excludes_holidays"] = False
+        save_state(
+            st.session_state["tasks_df"],
+            st.session_state["start_date"],
+            st.session_state["excludes_weekends"],
+            st.session_state["excludes_holidays"],
+        )
         st.rerun()
 
+settings = (start_date, excludes_weekends, excludes_holidays)
+settings_changed = settings != (
+    st.session_state["start_date"],
+    st.session_state["excludes_weekends"],
+    st.session_state["excludes_holidays"],
+)
 st.session_state["start_date"] = start_date
 st.session_state["excludes_weekends"] = excludes_weekends
+st.session_state["excludes_holidays"] = excludes_holidays
+calendar = BusinessCalendar.preset(excludes_weekends, excludes_holidays)
+if settings_changed:
+    save_state(st.session_state["tasks_df"], start_date, excludes_weekends, excludes_holidays)
+
+# copy-on-write: la copia comparte las columnas; solo se copia la que se modifique
+df = st.session_state["tasks_df"].copy(deep=False)
+index = task_index(df)  # una vez por versión de la tabla; lo usan todas las reglas de abajo
+task_names = dict(zip(df["ID"], df["Tarea"]))
 
-df = st.session_state["tasks_df"].copy()
+if "scheduler" not in st.session_state:
+    st.session_state["scheduler"] = IncrementalScheduler()
+
+
+def plan_schedule(table: pd.DataFrame):
+    """
+    (grafo, cronograma, clave, nivelación) de la tabla con el kickoff y calendario actuales.
+    Con la nivelación por recursos activa, el cronograma es el nivelado y la clave incluye
+    las capacidades (Gantt, Mermaid y tablas se cachean con esa clave).
+    """
+    key = schedule_key(table, start_date, calendar)
+    graph, sched = cached_schedule(table, start_date, calendar, key=key, scheduler=st.session_state["scheduler"])
+    if not st.session_state.get("level_on"):
+        return graph, sched, key, None
+    capacities = st.session_state.get("capacities", {})
+    key = leveled_key(key, capacities)
+    sched, leveling = cached_leveled_schedule(table, start_date, calendar, capacities, key=key, graph=graph)
+    return graph, sched, key, leveling
+
+
+# ---- Recursos: responsables con capacidad diaria limitada (opcional)
+with st.expander("Recursos y capacidad (nivelación)"):
+    st.toggle(
+        "Nivelar por recursos",
+        key="level_on",
+        help="Corre las tareas cuando un responsable no tiene capacidad libre ese día. "
+        "Se usan las columnas 'Responsable' y 'Dedicación (%)' de la tabla.",
+    )
+    resource_names = sorted(
+        {a for v in pd.unique(df[RESOURCE_COLUMN].astype(str)) for a in split_assignees(v)}
+    ) if RESOURCE_COLUMN in df.columns else []
+    if not resource_names:
+        st.caption("Ninguna tarea tiene responsable: asígnalos en la columna 'Responsable' de la tabla.")
+    else:
+        saved_caps = st.session_state.get("capacities", {})
+        caps_df = pd.DataFrame({
+            "Recurso": resource_names,
+            "Capacidad (%)": [saved_caps.get(r, DEFAULT_CAPACITY) for r in resource_names],
+        })
+        edited_caps = st.data_editor(
+            caps_df,
+            key="capacity_editor",
+            hide_index=True,
+            use_container_width=True,
+            num_rows="fixed",
+            disabled=["Recurso"],
+            column_config={
+                "Capacidad (%)": st.column_config.NumberColumn(
+                    "Capacidad (%)", min_value=1, step=10, help="100 = una persona a tiempo completo por día hábil."
+                ),
+            },
+        )
+        new_caps = {
+            r: int(c) for r, c in zip(edited_caps["Recurso"], edited_caps["Capacidad (%)"].fillna(DEFAULT_CAPACITY))
+        }
+        # solo las capacidades que cambió esta sesión; las de otras sesiones se mezclan
+        changed_caps = {r: c for r, c in new_caps.items() if saved_caps.get(r, DEFAULT_CAPACITY) != c}
+        if changed_caps:
+            result = get_store().save_meta_entries(
+                "capacidades", {**saved_caps, **changed_caps}, st.session_state.get("base"), "Capacidad de"
+            )
+            if result.conflicts:
+                st.session_state.pop("capacity_editor", None)   # el editor vuelve a lo guardado
+            use_save_result(result)
+
+# ---- Vista: filtros + paginación. El cronograma se calcula sobre el plan completo, pero al
+# navegador solo viajan las filas visibles (tabla editable, Gantt y tabla de fechas).
+with diagnostics.span("cronograma (vista)"):
+    _, view_schedule, _, _ = plan_schedule(df)
+with st.expander("Vista (filtros y paginación)", expanded=len(df) > PAGE_SIZES[1]):
+    v1, v2, v3 = st.columns([1.6, 1.4, 1.6])
+    with v1:
+        view_fases = st.multiselect("Fase", options=list(pd.unique(df["Fase"].astype(str))))
+    with v2:
+        view_estados = st.multiselect("Estado", options=STATUS_OPTIONS)
+    with v3:
+        view_range = st.date_input("Rango de fechas", value=(), help="Tareas que se traslapan con el rango.")
+    view = TaskView(
+        fases=tuple(view_fases),
+        estados=tuple(view_estados),
+        desde=view_range[0] if len(view_range) > 0 else None,
+        hasta=view_range[1] if len(view_range) > 1 else None,
+    )
+
+    v4, v5, v6 = st.columns([1, 1, 2.4])
+    with v4:
+        page_size = st.selectbox("Filas por página", PAGE_SIZES, index=1)
+    n_matched = int(filter_mask(view_schedule, view).sum())
+    n_pages = page_count(n_matched, page_size)
+    if st.session_state.get("view_page", 1) > n_pages:
+        st.session_state["view_page"] = n_pages
+    with v5:
+        page = st.number_input("Página", min_value=1, max_value=n_pages, step=1, key="view_page")
+    view = replace(view, page=int(page) - 1, page_size=page_size)
+    visible, n_matched = visible_positions(view_schedule, view)
+    with v6:
+        first_row = view.page * page_size + 1 if len(visible) else 0
+        st.caption(
+            f"Mostrando {first_row}–{first_row + len(visible) - 1 if len(visible) else 0} "
+            f"de {n_matched} tareas filtradas ({len(df)} en el plan)."
+        )
 
 # ---- Control didáctico por botones
 st.subheader("Control rápido (botones + desviación)")
@@ -383,15 +342,21 @@ c1, c2, c3, c4, c5 = st.columns([2.6, 1, 1, 1, 1.2])
 with c1:
     task_pick = st.selectbox(
         "Selecciona una tarea",
-        options=df["ID"].tolist(),
-        format_func=lambda tid: f"{tid} — {df.loc[df['ID']==tid, 'Tarea'].values[0]}",
+        options=(df["ID"].iloc[visible] if len(visible) else df["ID"]).tolist(),
+        format_func=lambda tid: f"{tid} — {task_names[tid]}",
     )
 
-picked_row = df[df["ID"] == task_pick].iloc[0]
-dep = str(picked_row["Depende_de"]).strip()
-dep_status = get_status(df, dep) if dep else None
+pick_id = str(task_pick).strip()
+picked_row = df.iloc[index.pos[pick_id]]
+dep_ids = dependency_ids(pick_id, index)
+dep = ", ".join(split_dependencies(picked_row["Depende_de"]))
+pending = pending_dependencies(df, pick_id, index)
+if len(dep_ids) == 1:
+    dep_status = get_status(df, dep_ids[0], index)
+else:
+    dep_status = f"{len(dep_ids) - len(pending)}/{len(dep_ids)} finalizadas" if dep_ids else None
 
-block_advance = bool(dep) and dep_status != "Finalizado"
+block_advance = bool(pending)
 
 with c5:
     dev_val = int(picked_row.get("Desviación (días hábiles)", 0))
@@ -404,36 +369,36 @@ with c5:
 
 # guardar desviación si cambió
 if dev_new != dev_val:
-    df.loc[df["ID"] == task_pick, "Desviación (días hábiles)"] = int(dev_new)
+    set_value(df, index.pos[pick_id], "Desviación (días hábiles)", int(dev_new))
     st.session_state["tasks_df"] = df
-    save_state(df, start_date, excludes_weekends)
+    save_state(df, start_date, excludes_weekends, excludes_holidays)
 
 with c2:
     if st.button("En proceso", use_container_width=True, disabled=block_advance):
-        df2, ok, msg = apply_status(df.copy(), task_pick, "En proceso")
+        df2, ok, msg = apply_status(df.copy(deep=False), task_pick, "En proceso", index)
         if ok:
             st.session_state["tasks_df"] = df2
-            save_state(df2, start_date, excludes_weekends)
+            save_state(df2, start_date, excludes_weekends, excludes_holidays)
             st.rerun()
         else:
             st.warning(msg)
 
 with c3:
     if st.button("Finalizado", use_container_width=True, disabled=block_advance):
-        df2, ok, msg = apply_status(df.copy(), task_pick, "Finalizado")
+        df2, ok, msg = apply_status(df.copy(deep=False), task_pick, "Finalizado", index)
         if ok:
             st.session_state["tasks_df"] = df2
-            save_state(df2, start_date, excludes_weekends)
+            save_state(df2, start_date, excludes_weekends, excludes_holidays)
             st.rerun()
         else:
             st.warning(msg)
 
 with c4:
     if st.button("Atrasado", use_container_width=True, disabled=block_advance):
-        df2, ok, msg = apply_status(df.copy(), task_pick, "Atrasado")
+        df2, ok, msg = apply_status(df.copy(deep=False), task_pick, "Atrasado", index)
         if ok:
             st.session_state["tasks_df"] = df2
-            save_state(df2, start_date, excludes_weekends)
+            save_state(df2, start_date, excludes_weekends, excludes_holidays)
             st.rerun()
         else:
             st.warning(msg)
@@ -443,56 +408,105 @@ info_cols[0].metric("Estado actual", str(picked_row["Estado"]))
 info_cols[1].metric("Depende de", dep if dep else "—")
 info_cols[2].metric("Estado dependencia", dep_status if dep else "—")
 
+# ---- Cambio de estado en lote: se valida en orden de dependencias (cerrar una tarea habilita
+# a sus hijas del mismo lote) y se guarda una sola vez => una escritura y un recálculo
+if "batch_result" in st.session_state:
+    n_applied, applied_status, batch_warnings = st.session_state.pop("batch_result")
+    if n_applied:
+        st.success(f"{n_applied} tareas pasaron a '{applied_status}'.")
+    for w in batch_warnings[:6]:
+        st.warning(w)
+    if len(batch_warnings) > 6:
+        st.warning(f"Se omitieron {len(batch_warnings)-6} advertencias más.")
+
+with st.expander("Cambio de estado en lote"):
+    b1, b2, b3, b4 = st.columns([2.6, 1.8, 1.2, 1])
+    with b1:
+        batch_ids = st.multiselect(
+            "Tareas",
+            options=(df["ID"].iloc[visible] if len(visible) else df["ID"]).tolist(),
+            format_func=lambda tid: f"{tid} — {task_names[tid]}",
+        )
+    with b2:
+        batch_fases = st.multiselect("Fases completas", options=list(pd.unique(df["Fase"].astype(str))))
+    with b3:
+        batch_status = st.selectbox("Nuevo estado", STATUS_OPTIONS, index=STATUS_OPTIONS.index("Finalizado"))
+
+    ids_clean = df["ID"].astype(str).str.strip()
+    batch = list(dict.fromkeys(
+        [str(t).strip() for t in batch_ids] + ids_clean[df["Fase"].astype(str).isin(batch_fases)].tolist()
+    ))
+    with b4:
+        if st.button(f"Aplicar a {len(batch)}", use_container_width=True, disabled=not batch):
+            df2, applied, batch_warnings = apply_status_batch(df, batch, batch_status, index)
+            st.session_state["batch_result"] = (len(applied), batch_status, batch_warnings)
+            if applied:
+                st.session_state["tasks_df"] = df2
+                save_state(df2, start_date, excludes_weekends, excludes_holidays)
+            st.rerun()
+
 st.divider()
 
 # ---- Tabla editable con validación (dependencias + persistencia)
 st.subheader("Tabla de tareas (editable)")
-prev_df = st.session_state["tasks_df"].copy()
+prev_df = st.session_state["tasks_df"]  # solo se lee (merge_slice devuelve otra tabla)
+prev_slice = editor_frame(prev_df, visible)
 
-edited = st.data_editor(
-    prev_df,
+edited_slice = st.data_editor(
+    prev_slice,
     use_container_width=True,
     num_rows="fixed",
     column_config={
         "Estado": st.column_config.SelectboxColumn("Estado", options=STATUS_OPTIONS, required=True),
+        "Depende_de": st.column_config.TextColumn(
+            "Depende_de", help="IDs separados por coma. Desfase opcional en días hábiles: 't2, b3+1'."
+        ),
         "Duración (días hábiles)": st.column_config.NumberColumn("Duración (días hábiles)", min_value=1, step=1),
         "Desviación (días hábiles)": st.column_config.NumberColumn("Desviación (días hábiles)", step=1),
+        "Responsable": st.column_config.TextColumn(
+            "Responsable", help="Opcional, para nivelar por recursos. Varios: 'Ana, Beto'."
+        ),
+        "Dedicación (%)": st.column_config.NumberColumn(
+            "Dedicación (%)", min_value=1, step=10, help="Parte del día del responsable que ocupa la tarea."
+        ),
     },
 )
 
-validated = edited.copy()
-warnings = []
+# solo se validan/persisten las filas que cambiaron; sin cambios no hay trabajo ni escritura
+changed = visible[diff_rows(prev_slice, edited_slice)]
 
-for i in range(len(validated)):
-    tid = str(validated.loc[i, "ID"])
-    old_status = str(prev_df.loc[i, "Estado"])
-    new_status = str(validated.loc[i, "Estado"])
+if len(changed):
+    validated = merge_slice(prev_df, edited_slice, visible)
 
     # asegurar int en desviación
-    try:
-        validated.loc[i, "Desviación (días hábiles)"] = int(validated.loc[i, "Desviación (días hábiles)"])
-    except Exception:
-        validated.loc[i, "Desviación (días hábiles)"] = 0
+    validated["Desviación (días hábiles)"] = (
+        pd.to_numeric(validated["Desviación (días hábiles)"], errors="coerce").fillna(0).astype(int)
+    )
 
-    if new_status != old_status:
-        ok, msg = can_set_status(validated, tid, new_status)
-        if not ok:
-            validated.loc[i, "Estado"] = old_status
-            warnings.append(f"{tid}: {msg}")
+    with diagnostics.span("validación"):
+        warnings = validate_status_edits(prev_df, validated, changed)
 
-if warnings:
-    for w in warnings[:6]:
-        st.warning(w)
-    if len(warnings) > 6:
-        st.warning(f"Se omitieron {len(warnings)-6} advertencias más.")
-else:
-    st.session_state["tasks_df"] = validated
-    save_state(validated, start_date, excludes_weekends)
+    if warnings:
+        for w in warnings[:6]:
+            st.warning(w)
+        if len(warnings) > 6:
+            st.warning(f"Se omitieron {len(warnings)-6} advertencias más.")
+    else:
+        st.session_state["tasks_df"] = validated
+        save_state(validated, start_date, excludes_weekends, excludes_holidays)
 
 # =========================
 # SCHEDULE + FECHA FIN PROYECTO
 # =========================
-schedule_df = build_schedule(st.session_state["tasks_df"], start_date, excludes_weekends)
+# misma tabla + kickoff + calendario => mismo cronograma/Mermaid/HTML (servidos desde caché)
+with diagnostics.span("cronograma"):
+    task_graph, schedule_df, plan_key, leveling = plan_schedule(st.session_state["tasks_df"])
+
+for p in task_graph.problems() + (leveling.problems() if leveling else []):
+    st.warning(p)
+
+# misma vista sobre el cronograma final (la edición pudo mover fechas)
+visible, _ = visible_positions(schedule_df, view)
 
 project_end = schedule_df["Fin"].dropna().max()
 project_end_date = project_end.date() if not pd.isna(project_end) else None
@@ -501,87 +515,461 @@ m1, m2, m3 = st.columns([1.4, 1.4, 2.2])
 m1.metric("Inicio proyecto", start_date.isoformat())
 m2.metric("Fin proyecto (ajustado)", project_end_date.isoformat() if project_end_date else "—")
 m3.caption("El fin se recalcula con Duración + Desviación por cada hito, y se propaga por dependencias.")
+if leveling is not None:
+    m3.caption(
+        f"Nivelado por recursos: {int((leveling.shift > 0).sum())} tareas corridas por capacidad "
+        f"(máx. {int(leveling.shift.max()) if len(leveling.shift) else 0} días hábiles)."
+    )
+
+critical_ids = schedule_df.loc[schedule_df["Crítica"]].sort_values("Inicio")["ID"].astype(str).tolist()
+if critical_ids:
+    st.caption(
+        "Ruta crítica (holgura 0, definen el fin del proyecto): " + " → ".join(critical_ids)
+    )
+
+with st.expander("Pronóstico de salida (Monte Carlo)"):
+    st.caption(
+        "Simula duraciones con una distribución triangular alrededor de la duración efectiva; "
+        "el rango se ajusta con las desviaciones ya registradas en el plan."
+    )
+    f1, f2 = st.columns([1, 2])
+    with f1:
+        run_forecast = st.toggle("Calcular pronóstico", value=False)
+    with f2:
+        n_samples = st.select_slider("Escenarios", options=[5_000, 10_000, 20_000, 50_000, 100_000], value=20_000)
+    if run_forecast:
+        with diagnostics.span("pronóstico"):
+            forecast_df = FORECASTS.get_or_compute(
+                (plan_key, n_samples),
+                lambda: forecast_milestones(
+                    st.session_state["tasks_df"], start_date, calendar, n_samples=n_samples, graph=task_graph
+                ),
+            )
+        st.dataframe(
+            forecast_df,
+            use_container_width=True,
+            column_config={"Prob. a tiempo": st.column_config.ProgressColumn("Prob. a tiempo", min_value=0, max_value=1)},
+        )
+        used = sample_budget(len(st.session_state["tasks_df"]), n_samples)
+        if used < n_samples:
+            st.caption(f"Plan de {len(st.session_state['tasks_df'])} tareas: se simularon {used} escenarios (tope por tamaño del plan).")
+
+with st.expander("Sensibilidad al kickoff (¿y si partimos otro día?)"):
+    st.caption(
+        "Salida, gates y fin del proyecto para cada kickoff posible desde el actual: el cronograma "
+        "en días hábiles es el mismo, solo cambia dónde caen fines de semana y feriados"
+        + (" (cronograma nivelado)." if leveling is not None else ".")
+    )
+    w1, w2 = st.columns([1, 2])
+    with w1:
+        run_sweep = st.toggle("Calcular barrido", value=False)
+    with w2:
+        sweep_days = st.select_slider("Kickoffs (días corridos desde el actual)", options=[30, 60, 90, 180, 365], value=90)
+    if run_sweep:
+        with diagnostics.span("sensibilidad al kickoff"):
+            sweep = SWEEPS.get_or_compute(
+                (plan_key, sweep_days),
+                lambda: kickoff_sweep(schedule_df, start_date, calendar, days=sweep_days),
+            )
+        span_cols = [c for c in sweep.columns if c.startswith("Días corridos hasta")]
+        if span_cols:
+            span = sweep[span_cols[0]]
+            best = sweep.iloc[int(span.to_numpy().argmin())]
+            st.caption(
+                f"Partiendo el {start_date.isoformat()}: {span.iloc[0]} días corridos. "
+                f"Menor plazo en el rango: {int(span.min())} días, partiendo el {best['Kickoff'].date().isoformat()} "
+                f"({WEEKDAYS[best['Kickoff'].weekday()]})."
+            )
+            st.line_chart(sweep.set_index("Kickoff")[span_cols[0]], y_label=span_cols[0])
+        milestones = [c for c in sweep.columns if c not in ("Kickoff", "Inicio efectivo") and c not in span_cols]
+        if len(milestones) > SWEEP_MAX_MILESTONES:
+            # la salida, los primeros gates y el fin del proyecto
+            milestones = milestones[:SWEEP_MAX_MILESTONES - 1] + milestones[-1:]
+            st.caption(f"Se muestran {SWEEP_MAX_MILESTONES} de {len(sweep.columns) - 2 - len(span_cols)} hitos.")
+        show_sweep = sweep[["Kickoff", "Inicio efectivo", *milestones, *span_cols]].copy()
+        show_sweep.insert(1, "Día", [WEEKDAYS[d] for d in show_sweep["Kickoff"].dt.weekday])
+        for c in ["Kickoff", "Inicio efectivo", *milestones]:
+            show_sweep[c] = show_sweep[c].dt.date
+        st.dataframe(show_sweep, use_container_width=True, hide_index=True)
 
 with st.expander("Ver tabla con fechas calculadas"):
-    show = schedule_df[[
+    show = schedule_df.iloc[visible][[
         "Fase","ID","Tarea","Depende_de","Estado",
         "Duración (días hábiles)","Desviación (días hábiles)","Duración efectiva (días hábiles)",
-        "Inicio","Fin"
-    ]].copy()
+        "Inicio","Fin","Holgura (días hábiles)","Crítica"
+    ]]
+    if leveling is not None:
+        show[SHIFT_COLUMN] = schedule_df[SHIFT_COLUMN].iloc[visible]
     show["Inicio"] = show["Inicio"].dt.date
     show["Fin"] = show["Fin"].dt.date
     st.dataframe(show, use_container_width=True)
 
+if leveling is not None and leveling.resources:
+    with st.expander("Uso de recursos"):
+        st.caption("Uso = carga asignada / capacidad diaria. Medio y pico, entre el primer y el último día con carga.")
+        usage = pd.DataFrame(leveling.summary())
+        st.dataframe(
+            usage,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Uso medio (%)": st.column_config.ProgressColumn("Uso medio (%)", min_value=0, max_value=100, format="%.0f%%"),
+            },
+        )
+        busiest = usage.sort_values("Persona-días", ascending=False)["Recurso"].head(3).tolist()
+        picks = st.multiselect("Uso diario de", leveling.resources, default=busiest)
+        if picks and leveling.horizon:
+            rows = [leveling.resources.index(r) for r in picks]
+            days = calendar.offset_dates(calendar.roll(start_date), np.arange(leveling.horizon))
+            st.line_chart(
+                pd.DataFrame(100 * leveling.utilization(rows=rows).T, index=pd.to_datetime(days), columns=picks),
+                y_label="Uso (%)",
+            )
+
 # =========================
-# GANTT (Mermaid) + ESTILO
+# IMPORTAR / EXPORTAR (CSV, Parquet, Excel)
 # =========================
-def status_flag(status: str) -> str:
-    if status == "En proceso":
-        return "active, "
-    if status == "Finalizado":
-        return "done, "
-    if status == "Atrasado":
-        return "crit, "
-    return ""
+# el archivo se lee por tramos y se valida una vez por archivo + mapeo de columnas
+# (el resultado queda en la sesión hasta que se aplica o se cambia el archivo)
+with st.expander("Importar / exportar plan"):
+    i1, i2 = st.columns([2.2, 1])
+    with i1:
+        st.markdown("**Importar** (reemplaza el plan completo)")
+        upload = st.file_uploader(
+            "Archivo CSV, Parquet o Excel",
+            type=["csv", "parquet", "xlsx"],
+            key=f"import_file_{st.session_state.get('import_n', 0)}",
+        )
+        if upload is not None:
+            try:
+                import_fmt = detect_format(upload.name)
+                headers = read_headers(upload, import_fmt)
+            except ValueError as e:
+                st.warning(str(e))
+                headers = []
+            if headers:
+                detected = detect_mapping(headers)
+                st.caption("Columnas del archivo para cada columna del plan (* = obligatoria).")
+                mapping = {}
+                map_cols = st.columns(3)
+                for k, col in enumerate(TASK_COLUMNS):
+                    options = ["—"] + headers
+                    with map_cols[k % 3]:
+                        choice = st.selectbox(
+                            col + (" *" if col in REQUIRED_COLUMNS else ""),
+                            options,
+                            index=options.index(detected[col]) if col in detected else 0,
+                            key=f"import_map_{upload.file_id}_{k}",
+                        )
+                    if choice != "—":
+                        mapping[col] = choice
+
+                import_key = (upload.file_id, tuple(sorted(mapping.items())))
+                cached = st.session_state.get("import_result")
+                if cached is None or cached[0] != import_key:
+                    try:
+                        with st.spinner("Leyendo y validando el archivo…"):
+                            cached = (import_key, import_plan(upload, import_fmt, mapping), None)
+                    except ValueError as e:
+                        cached = (import_key, None, str(e))
+                    st.session_state["import_result"] = cached
+                _, imported, import_error = cached
+
+                if import_error:
+                    st.warning(import_error)
+                else:
+                    for msg in imported.errors:
+                        st.error(msg)
+                    for msg in imported.warnings:
+                        st.warning(msg)
+                    st.dataframe(imported.df.head(20), use_container_width=True, hide_index=True)
+                    if st.button(
+                        f"Reemplazar el plan con {len(imported.df)} tareas",
+                        disabled=not imported.ok,
+                        help=None if imported.ok else "Corrige los errores del archivo primero.",
+                    ):
+                        st.session_state["tasks_df"] = imported.df
+                        st.session_state.pop("import_result", None)
+                        st.session_state["import_n"] = st.session_state.get("import_n", 0) + 1
+                        save_state(imported.df, start_date, excludes_weekends, excludes_holidays)
+                        st.rerun()
+    with i2:
+        st.markdown("**Exportar** el cronograma completo (con Inicio, Fin y holgura)")
+        export_fmt = st.selectbox("Formato", available_formats(), key="export_fmt")
+        # el archivo se genera por tramos recién al hacer clic
+        st.download_button(
+            f"Descargar .{export_fmt}",
+            data=lambda: schedule_file(schedule_df, export_fmt),
+            file_name=f"cronograma_plan4.{export_fmt}",
+            mime=MIME_TYPES[export_fmt],
+            use_container_width=True,
+        )
 
 
-def mermaid_safe_text(text: str) -> str:
-    """
-    Sanitiza texto para Mermaid Gantt.
-    El carácter ':' dentro del nombre rompe la sintaxis porque Mermaid lo usa como separador.
-    """
-    return (
-        str(text)
-        .replace(":", " -")
-        .replace("\n", " ")
-        .strip()
+# =========================
+# ESCENARIOS (¿qué pasa si…?)
+# =========================
+# cada escenario guarda solo los campos que cambia (por ID) y se calcula desde el cronograma
+# del plan vigente, re-programando lo que queda aguas abajo de esos cambios
+def save_scenarios(scenarios: list[Scenario]):
+    # por escenario, contra lo que leyó esta sesión (ver SqliteStateStore.save_meta_entries)
+    result = get_store().save_meta_entries(
+        "escenarios", json.loads(scenarios_to_json(scenarios)), st.session_state.get("base"), "Escenario"
     )
+    use_save_result(result)
 
 
-def build_mermaid(df_in: pd.DataFrame, kickoff_iso: str, exclude_weekends: bool) -> str:
-    """
-    Mermaid propaga cambios usando duración efectiva (base + desviación).
-    """
-    lines = []
-    lines.append("gantt")
-    lines.append("    title Cronograma Plan 4 (E-Commerce)")
-    lines.append("    dateFormat  YYYY-MM-DD")
-    lines.append("    axisFormat  %d-%m")
-    if exclude_weekends:
-        lines.append("    excludes    weekends")
-    lines.append("")
-
-    for fase in df_in["Fase"].unique():
-        fase_safe = mermaid_safe_text(fase)
-        lines.append(f"    section {fase_safe}")
-        subset = df_in[df_in["Fase"] == fase]
-        for _, r in subset.iterrows():
-            flag = status_flag(str(r["Estado"]))
-            tid = str(r["ID"]).strip()
-            name = mermaid_safe_text(str(r["Tarea"]).strip())
-            dep = str(r["Depende_de"]).strip()
-            dur_eff = max(1, int(r["Duración (días hábiles)"]) + int(r.get("Desviación (días hábiles)", 0)))
-
-            if tid == "t0":
-                lines.append(f"    {name} :{flag}{tid}, {kickoff_iso}, {dur_eff}d")
+with st.expander("Escenarios (¿qué pasa si…?)"):
+    st.caption(
+        "Cambios de duración o desviación que no tocan el plan: cada escenario se compara con el "
+        "plan vigente" + (" (sin nivelación por recursos)." if leveling is not None else ".")
+    )
+    scenarios = st.session_state.get("scenarios", [])
+    scenario_names = [sc.name for sc in scenarios]
+    e1, e2 = st.columns([2.6, 1])
+    with e1:
+        new_scenario = st.text_input("Nuevo escenario", key="scenario_new", placeholder="p. ej. Pagos se atrasa 3 días")
+    with e2:
+        st.write("")
+        if st.button("Crear", use_container_width=True, disabled=not new_scenario.strip()):
+            if new_scenario.strip() in scenario_names:
+                st.warning(f"Ya existe el escenario '{new_scenario.strip()}'.")
             else:
-                if dep:
-                    lines.append(f"    {name} :{flag}{tid}, after {dep}, {dur_eff}d")
-                else:
-                    lines.append(f"    {name} :{flag}{tid}, {kickoff_iso}, {dur_eff}d")
+                save_scenarios(scenarios + [Scenario(new_scenario.strip())])
+                st.session_state["scenario_pick"] = new_scenario.strip()
+                st.rerun()
+
+    if scenarios:
+        plan_df = st.session_state["tasks_df"]
+        with diagnostics.span("escenarios"):
+            # misma versión del plan => misma base; cada escenario se cachea por separado
+            base_key = schedule_key(plan_df, start_date, calendar)
+            results = [cached_scenario(plan_df, sc, base_key, task_graph) for sc in scenarios]
+        scenario_base = results[0][0]
+        summary = pd.DataFrame(scenario_summary(scenario_base, [r for _, r in results], start_date, calendar))
+        for c in ("Fin base", "Fin escenario"):
+            summary[c] = summary[c].dt.date
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+
+        pick_name = st.selectbox("Escenario", scenario_names, key="scenario_pick")
+        k = scenario_names.index(pick_name)
+        scenario, result = scenarios[k], results[k][1]
+
+        edited_overrides = st.data_editor(
+            pd.DataFrame(list(scenario.overrides), columns=["ID", "Campo", "Valor"]),
+            # la clave cambia con los cambios guardados: el editor parte de lo guardado
+            key=f"scenario_editor_{pick_name}_{hash(scenario.overrides)}",
+            hide_index=True,
+            use_container_width=True,
+            num_rows="dynamic",
+            column_config={
+                "ID": st.column_config.TextColumn("ID", required=True),
+                "Campo": st.column_config.SelectboxColumn("Campo", options=list(SCENARIO_FIELDS), required=True),
+                "Valor": st.column_config.NumberColumn("Valor", step=1, required=True),
+            },
+        )
+        overrides = [
+            (str(t), str(f), int(v))
+            for t, f, v in edited_overrides[["ID", "Campo", "Valor"]].itertuples(index=False)
+            if not pd.isna(t) and not pd.isna(f) and not pd.isna(v)
+        ]
+        ok, msg = validate_overrides(overrides)
+        if not ok:
+            st.warning(msg)
+        elif scenario.with_overrides(overrides) != scenario:
+            scenarios[k] = scenario.with_overrides(overrides)
+            save_scenarios(scenarios)
+            st.rerun()
+        if result.unknown:
+            st.warning("El plan ya no tiene estas tareas del escenario: " + ", ".join(result.unknown) + ".")
+
+        diff = scenario_diff(scenario_base, result, plan_df, start_date, calendar)
+        if diff.empty:
+            st.caption("Este escenario no mueve fechas respecto del plan vigente.")
+        else:
+            row = summary.iloc[k]
+            st.caption(
+                f"{len(result.moved)} tareas cambian de fechas; fin del proyecto {row['Fin base']} → "
+                f"{row['Fin escenario']} ({result.project_end - scenario_base.project_end:+d} días hábiles)."
+            )
+            diff = diff.sort_values("Δ fin (días hábiles)", ascending=False, kind="stable")
+            for c in ("Inicio base", "Inicio escenario", "Fin base", "Fin escenario"):
+                diff[c] = diff[c].dt.date
+            st.dataframe(diff.head(SCENARIO_DIFF_MAX_ROWS), use_container_width=True, hide_index=True)
+            if len(diff) > SCENARIO_DIFF_MAX_ROWS:
+                st.caption(f"Se muestran las {SCENARIO_DIFF_MAX_ROWS} tareas con mayor corrimiento de {len(diff)}.")
+
+        s1, s2 = st.columns(2)
+        with s1:
+            if st.button("Aplicar al plan", use_container_width=True, disabled=not scenario.overrides):
+                applied = st.session_state["tasks_df"].copy(deep=False)
+                plan_index = task_index(applied)
+                for tid, fld, value in scenario.overrides:
+                    if tid in plan_index.pos:
+                        set_value(applied, plan_index.pos[tid], fld, value)
+                st.session_state["tasks_df"] = applied
+                save_state(applied, start_date, excludes_weekends, excludes_holidays)
+                st.rerun()
+        with s2:
+            if st.button("Eliminar escenario", use_container_width=True):
+                save_scenarios([sc for sc in scenarios if sc.name != pick_name])
+                st.rerun()
+
+
+# =========================
+# LÍNEAS BASE (variación y valor ganado)
+# =========================
+# una línea base congela el cronograma que se muestra; el reporte cruza el plan vigente con
+# todas las bases elegidas a la vez y se cachea por versión del plan + bases + fecha de corte
+with st.expander("Líneas base y valor ganado"):
+    store = get_store()
+    baseline_names = [b["name"] for b in store.baseline_list()]
+    b1, b2 = st.columns([2.6, 1])
+    with b1:
+        new_baseline = st.text_input(
+            "Nueva línea base", key="baseline_new", placeholder="p. ej. Plan firmado con el cliente"
+        )
+    with b2:
+        st.write("")
+        if st.button("Congelar cronograma", use_container_width=True, disabled=not new_baseline.strip()):
+            ok, msg = validate_baseline_name(new_baseline, baseline_names)
+            if ok:
+                captured = Baseline.capture(new_baseline.strip(), schedule_df, start_date, st.session_state.get("actor", ""))
+                ok, msg = store.add_baseline(captured)
+            if ok:
+                st.session_state["baseline_compare"] = st.session_state.get("baseline_compare", baseline_names) + [captured.name]
+                st.rerun()
+            st.warning(msg)
+    st.caption(
+        "Guarda inicio, fin y duración de cada tarea tal como se ven ahora"
+        + (" (cronograma nivelado por recursos)." if leveling is not None else ".")
+        + " Una línea base no se modifica: para actualizarla, se congela otra."
+    )
+
+    if baseline_names:
+        # por defecto todas; sin las que se eliminaron (en esta u otra sesión)
+        picked = st.session_state.get("baseline_compare", baseline_names)
+        st.session_state["baseline_compare"] = [n for n in picked if n in baseline_names]
+        c1, c2 = st.columns([2.6, 1])
+        with c1:
+            chosen = st.multiselect("Comparar contra", baseline_names, key="baseline_compare")
+        with c2:
+            as_of_ev = st.date_input("Valor ganado al", value=date.today(), key="baseline_as_of")
+
+        if chosen:
+            baselines = store.load_baselines(chosen)
+            report = cached_baseline_report(baselines, schedule_df, plan_key, calendar, as_of_ev)
+            summary = report.summary()
+            st.dataframe(summary, use_container_width=True, hide_index=True)
+            st.caption(
+                "Δ en días hábiles (positivo = atraso). Valor ganado en días-tarea: una tarea iniciada "
+                "(En proceso / Atrasado) gana la mitad de su duración base y una finalizada, toda. "
+                "SPI = ganado / planificado (< 1: atrasado respecto de esa base)."
+            )
+            if len(baselines) > 1:
+                trend = summary.set_index(pd.to_datetime(summary["Capturada"]))
+                st.line_chart(trend[["Δ fin proyecto (días hábiles)", "Δ fin medio (días hábiles)"]].astype(float))
+                st.markdown("**Δ fin por fase (días hábiles)**")
+                st.dataframe(report.phase_trend(), use_container_width=True)
+
+            gates = report.gates_report()
+            if len(gates):
+                st.markdown("**Gates: Δ fin por línea base (días hábiles)**")
+                st.dataframe(gates.head(BASELINE_TASK_MAX_ROWS), use_container_width=True, hide_index=True)
+
+            pick = st.selectbox("Detalle contra", report.baseline_names, index=len(baselines) - 1)
+            k = report.baseline_names.index(pick)
+            st.dataframe(report.phases_report(k), use_container_width=True, hide_index=True)
+            detail = report.tasks(k, top=BASELINE_TASK_MAX_ROWS)
+            st.dataframe(detail, use_container_width=True, hide_index=True)
+            if int((report.rows[k] >= 0).sum()) > BASELINE_TASK_MAX_ROWS:
+                st.caption(f"Se muestran las {BASELINE_TASK_MAX_ROWS} tareas con mayor atraso al fin.")
+            if st.button(f"Eliminar línea base '{pick}'"):
+                store.delete_baseline(pick)
+                st.rerun()
 
-        lines.append("")
-    return "\n".join(lines)
 
+# =========================
+# HISTORIAL (auditoría, deshacer, plan a una fecha)
+# =========================
+event_log = get_store().event_log
+with st.expander("Historial de cambios"):
+    h1, h2 = st.columns([1.2, 2.4])
+    with h1:
+        hist_task = st.selectbox("Tarea", options=["(todas)"] + list(task_names), key="hist_task")
+    with diagnostics.span("historial"):
+        events = event_log.events(limit=200, task_id=None if hist_task == "(todas)" else hist_task)
+
+    if not events:
+        st.caption("Sin cambios registrados.")
+    else:
+        hist = pd.DataFrame(events)
+        for c in ("old", "new"):
+            hist[c] = hist[c].map(lambda v: "—" if v is None else str(v))
+        hist["id"] = hist["id"].fillna("(configuración)")
+        hist["ts"] = hist["ts"].map(local_time)   # el historial se guarda en UTC
+        st.dataframe(
+            hist[["ts", "actor", "id", "field", "old", "new", "v"]].rename(columns={
+                "ts": "Fecha", "actor": "Quién", "id": "Tarea", "field": "Campo",
+                "old": "Antes", "new": "Después", "v": "Versión",
+            }),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+        undoable = [e for e in events if e["pos"] is not None and e["field"] != ROW_FIELD]
+        if undoable:
+            with h2:
+                pick = st.selectbox(
+                    "Deshacer un cambio",
+                    options=range(len(undoable)),
+                    format_func=lambda k: (
+                        f"{local_time(undoable[k]['ts'])} — {undoable[k]['id']}: {undoable[k]['field']} "
+                        f"{undoable[k]['old']} → {undoable[k]['new']}"
+                    ),
+                )
+            if st.button("Deshacer"):
+                current = st.session_state["tasks_df"]
+                df2, ok, msg = revert_event(current, undoable[pick], task_index(current))
+                if ok:
+                    st.session_state["tasks_df"] = df2
+                    save_state(df2, start_date, excludes_weekends, excludes_holidays)
+                    st.rerun()
+                else:
+                    st.warning(msg)
+
+    st.markdown("**Plan a una fecha**")
+    as_of = st.date_input("Ver el plan como estaba el", value=None, key="as_of")
+    if as_of is not None:
+        with diagnostics.span("plan a una fecha"):
+            past = schedule_as_of(event_log, as_of)
+        if past is None:
+            st.caption("Sin historial para esa fecha.")
+        else:
+            ids_past = past["ID"].astype(str).str.strip()
+            milestones = (past["Fase"].astype(str) == "Gates") | (ids_past == "t14")
+            then = past.loc[milestones, ["ID", "Tarea", "Estado", "Fin"]].rename(
+                columns={"Estado": "Estado entonces", "Fin": "Fin entonces"}
+            )
+            now = dict(zip(schedule_df["ID"].astype(str).str.strip(), schedule_df["Fin"]))
+            then["Fin ahora"] = then["ID"].astype(str).str.strip().map(now)
+            then["Corrimiento (días)"] = (then["Fin ahora"] - then["Fin entonces"]).dt.days
+            then["Fin entonces"] = then["Fin entonces"].dt.date
+            then["Fin ahora"] = then["Fin ahora"].dt.date
+            past_end = past["Fin"].dropna().max()
+            st.caption(f"Fin de proyecto a esa fecha: {past_end.date().isoformat() if not pd.isna(past_end) else '—'}")
+            st.dataframe(then, use_container_width=True, hide_index=True)
 
-mermaid_txt = build_mermaid(st.session_state["tasks_df"], start_date.isoformat(), excludes_weekends)
 
-html = f"""
+# =========================
+# GANTT (SVG) + EXPORTACIÓN MERMAID
+# =========================
+def build_gantt_html(svg: str) -> str:
+    return f"""
 <!doctype html>
 <html>
 <head>
   <meta charset="utf-8" />
-  <script src="https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.min.js"></script>
   <style>
     body {{
       margin: 0; padding: 0; background: transparent;
@@ -610,9 +998,7 @@ html = f"""
       font-weight: 600;
     }}
     .dot {{ width: 10px; height: 10px; border-radius: 999px; }}
-    .mermaid svg {{ width: 100%; height: auto; }}
-    .mermaid .task rect {{ rx: 7px; ry: 7px; }}
-    .mermaid .taskText {{ font-weight: 600; }}
+    .gantt {{ overflow-x: auto; }}
   </style>
 </head>
 <body>
@@ -624,65 +1010,116 @@ html = f"""
         <span class="pill"><span class="dot" style="background:#22C55E"></span>Finalizado</span>
         <span class="pill"><span class="dot" style="background:#EF4444"></span>Atrasado</span>
         <span class="pill"><span class="dot" style="background:#F59E0B"></span>Hoy</span>
+        <span class="pill"><span class="dot" style="background:transparent; border:3px solid #7C3AED"></span>Ruta crítica</span>
       </div>
 
-      <div class="mermaid">
-{mermaid_txt}
+      <div class="gantt">
+{svg}
       </div>
     </div>
   </div>
-
-  <script>
-    mermaid.initialize({{
-      startOnLoad: true,
-      theme: "base",
-      securityLevel: "loose",
-      themeVariables: {{
-        fontFamily: "system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif",
-        primaryColor: "#F8FAFC",
-        primaryTextColor: "#0F172A",
-        primaryBorderColor: "rgba(2, 8, 23, 0.10)",
-        lineColor: "rgba(2, 8, 23, 0.12)",
-        textColor: "#0F172A",
-
-        taskTextColor: "#0F172A",
-        taskTextOutsideColor: "#0F172A",
-
-        activeTaskColor: "#3B82F6",
-        activeTaskBorderColor: "#2563EB",
-        activeTaskTextColor: "#0B1220",
-
-        doneTaskColor: "#22C55E",
-        doneTaskBorderColor: "#16A34A",
-        doneTaskTextColor: "#0B1220",
-
-        critTaskColor: "#EF4444",
-        critTaskBorderColor: "#DC2626",
-        critTaskTextColor: "#0B1220",
-      }},
-      gantt: {{
-        barHeight: 22,
-        barGap: 10,
-        topPadding: 35,
-        leftPadding: 240,
-        rightPadding: 20,
-        gridLineStartPadding: 30,
-        fontSize: 12,
-        numberSectionStyles: 2,
-        todayMarker: {{
-          stroke: "#F59E0B",
-          strokeWidth: "2px",
-          shape: "dashed"
-        }}
-      }}
-    }});
-  </script>
 </body>
 </html>
 """
 
+
+# el SVG se genera en el servidor (sin Mermaid/CDN en el navegador) y se cachea por
+# versión del cronograma + día (el marcador de hoy cambia a medianoche)
+today = date.today()
+with diagnostics.span("gantt svg"):
+    gantt_svg = GANTT_SVG.get_or_compute(
+        (plan_key, today.isoformat(), view), lambda: render_gantt_svg(schedule_df.iloc[visible], today, calendar)
+    )
+
 st.subheader("Carta Gantt (visual)")
-components.html(html, height=760, scrolling=True)
+components.html(build_gantt_html(gantt_svg), height=min(760, svg_height(gantt_svg) + 110), scrolling=True)
+
+# Mermaid queda como formato de exportación
+tasks_for_mermaid = st.session_state["tasks_df"]
+with diagnostics.span("mermaid"):
+    mermaid_txt = MERMAID.get_or_compute(
+        plan_key, lambda: build_mermaid(tasks_for_mermaid, start_date.isoformat(), calendar, schedule_df)
+    )
+
+d1, d2 = st.columns(2)
+with d1:
+    st.download_button("Descargar Gantt (.svg)", gantt_svg, file_name="cronograma_plan4.svg", mime="image/svg+xml")
+with d2:
+    st.download_button("Descargar Mermaid (.mmd)", mermaid_txt, file_name="cronograma_plan4.mmd", mime="text/plain")
 
 with st.expander("Ver Mermaid (texto)"):
-    st.code(mermaid_txt, language="text")
+    if len(schedule_df) <= MERMAID_PREVIEW_MAX_ROWS:
+        st.code(mermaid_txt, language="text")
+    else:
+        st.caption(f"Plan de {len(schedule_df)} tareas: usa 'Descargar Mermaid (.mmd)'.")
+
+# la traza cubre el rerun hasta aquí (el panel de abajo muestra este mismo rerun)
+trace = diagnostics.end()
+if trace is not None and trace.profile_text:
+    st.session_state["diag_profile"] = False
+    st.session_state["diag_profile_text"] = trace.profile_text
+
+with st.expander("Diagnóstico (caché y tiempos)"):
+    st.markdown("**Caché**")
+    st.dataframe(pd.DataFrame(cache_stats()).T, use_container_width=True)
+    sched = st.session_state["scheduler"]
+    if sched.last_mode:
+        st.caption(f"Último cálculo de fechas: {sched.last_mode}, {sched.last_recomputed} tareas recalculadas.")
+
+    if trace is None:
+        st.caption("Activa 'Diagnóstico de rendimiento' en la barra lateral para medir cada etapa del rerun.")
+    else:
+        st.markdown(f"**Este rerun: {trace.total * 1000:.1f} ms**")
+        spans = pd.DataFrame(trace.spans, columns=["name", "depth", "start", "seconds"])
+        st.dataframe(
+            pd.DataFrame({
+                "Tramo": ["· " * d + n for n, d in zip(spans["name"], spans["depth"])],
+                "Inicio (ms)": (spans["start"] * 1000).round(1),
+                "Duración (ms)": (spans["seconds"] * 1000).round(2),
+            }),
+            use_container_width=True,
+            hide_index=True,
+        )
+        if trace.counters:
+            st.dataframe(
+                pd.DataFrame({"Contador": list(trace.counters), "Valor": list(trace.counters.values())}),
+                use_container_width=True,
+                hide_index=True,
+            )
+        g1, g2, g3 = st.columns(3)
+        with g1:
+            st.download_button(
+                "Exportar JSON", diagnostics.to_json(trace), file_name="diagnostico.json", mime="application/json"
+            )
+        with g2:
+            st.download_button(
+                "Exportar Prometheus", diagnostics.to_prometheus(trace), file_name="diagnostico.prom", mime="text/plain"
+            )
+        with g3:
+            if st.button("Perfilar el próximo rerun (cProfile)"):
+                st.session_state["diag_profile"] = True
+                st.rerun()
+        if st.session_state.get("diag_profile_text"):
+            st.caption("Perfil del último rerun perfilado (tiempo acumulado):")
+            st.code(st.session_state["diag_profile_text"], language="text")
+
+
+# =========================
+# CAMBIOS DE OTRAS SESIONES
+# =========================
+# se revisa al final: las ediciones de este rerun ya se guardaron contra la versión que vio
+# el usuario (así un cambio ajeno al mismo campo se detecta como conflicto y no se pisa)
+if get_store().version() != st.session_state["base"].version:
+    use_snapshot(load_state())
+    st.session_state["remote_loaded"] = True
+    st.rerun()
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def watch_remote_changes():
+    # sondeo liviano en segundo plano: solo dispara un rerun completo si el contador global cambió
+    if get_store().version() != st.session_state["base"].version:
+        st.rerun()
+
+
+watch_remote_changes()
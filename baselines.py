@@ -0,0 +1,401 @@
+from __future__ import annotations
+
+import hashlib
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from business_calendar import BusinessCalendar
+from scheduling import GO_LIVE_ID, as_calendar
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+# avance ganado por estado (regla 0/50/100: una tarea iniciada gana la mitad hasta terminar;
+# "Atrasado" solo se alcanza con las dependencias cerradas, o sea ya iniciada)
+EARNED_FRACTION = {"Pendiente": 0.0, "En proceso": 0.5, "Atrasado": 0.5, "Finalizado": 1.0}
+
+NO_DATE = np.iinfo(np.int32).min      # tarea sin fechas en la línea base (p. ej. en un ciclo)
+_SEP = "\x1f"
+
+
+# =========================
+# LÍNEA BASE (cronograma congelado)
+# =========================
+# Una línea base guarda, por tarea, solo ID + inicio/fin/duración efectiva: fechas como días
+# desde 1970 en int32 (12 bytes por tarea) y los IDs comprimidos. Es inmutable: se crea una
+# vez y después solo se lee o se elimina. Las bases capturadas sobre el mismo juego de IDs
+# comparten el mismo Index (ids_key), así el cruce con el plan vigente se hace una vez.
+@dataclass(frozen=True, eq=False)
+class Baseline:
+    name: str
+    created: str                        # ISO (segundos), orden cronológico de las bases
+    actor: str
+    kickoff: date
+    ids: pd.Index                       # IDs únicos, en el orden del plan al capturar
+    ids_key: str                        # hash de los IDs
+    start: np.ndarray                   # int32, días desde 1970 (NO_DATE = sin fecha)
+    finish: np.ndarray
+    duration: np.ndarray                # int32, duración efectiva (días hábiles)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.start.nbytes + self.finish.nbytes + self.duration.nbytes
+
+    @property
+    def project_finish(self) -> np.datetime64:
+        dated = self.finish[self.finish != NO_DATE]
+        return dated.max().astype("datetime64[D]") if len(dated) else np.datetime64("NaT", "D")
+
+    @classmethod
+    def capture(cls, name: str, schedule: pd.DataFrame, kickoff: date, actor: str = "") -> Baseline:
+        """
+        Congela el cronograma calculado (ID, Inicio, Fin, Duración efectiva). Las filas sin ID
+        o con un ID repetido quedan fuera: la base se cruza con el plan por ID.
+        """
+        ids = schedule["ID"].astype(str).str.strip().to_numpy(dtype=object)
+        keep = (ids != "") & ~pd.Index(ids).duplicated()
+        return cls(
+            name=name,
+            created=datetime.now().isoformat(timespec="seconds"),
+            actor=actor,
+            kickoff=kickoff,
+            ids=pd.Index(ids[keep], dtype=object),
+            ids_key=_ids_key(ids[keep]),
+            start=_day_numbers(schedule["Inicio"])[keep],
+            finish=_day_numbers(schedule["Fin"])[keep],
+            duration=schedule["Duración efectiva (días hábiles)"].to_numpy(dtype=np.int32)[keep],
+        )
+
+    def to_blobs(self) -> tuple[bytes, bytes]:
+        """(IDs, fechas) comprimidos para guardar en SQLite."""
+        ids = zlib.compress(_SEP.join(self.ids.tolist()).encode("utf-8"))
+        days = zlib.compress(np.stack([self.start, self.finish, self.duration]).astype("<i4").tobytes())
+        return ids, days
+
+    @classmethod
+    def from_blobs(cls, name: str, created: str, actor: str, kickoff: str, ids_blob: bytes, days_blob: bytes,
+                   shared_ids: dict[str, pd.Index] | None = None) -> Baseline:
+        """
+        Inverso de to_blobs(). `shared_ids` (ids_key -> Index) se reutiliza entre bases con los
+        mismos IDs: un solo Index en memoria, con su tabla hash ya armada.
+        """
+        text = zlib.decompress(ids_blob).decode("utf-8")
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        ids = None if shared_ids is None else shared_ids.get(key)
+        if ids is None:
+            ids = pd.Index(text.split(_SEP) if text else [], dtype=object)
+            if shared_ids is not None:
+                shared_ids[key] = ids
+        days = np.frombuffer(zlib.decompress(days_blob), dtype="<i4").reshape(3, len(ids)).astype(np.int32)
+        days.flags.writeable = False
+        return cls(
+            name=name, created=created, actor=actor, kickoff=date.fromisoformat(kickoff),
+            ids=ids, ids_key=key, start=days[0], finish=days[1], duration=days[2],
+        )
+
+
+def _ids_key(ids) -> str:
+    return hashlib.blake2b(_SEP.join(ids).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _day_numbers(values: pd.Series) -> np.ndarray:
+    days = pd.to_datetime(values).to_numpy(dtype="datetime64[D]")
+    out = np.full(len(days), NO_DATE, dtype=np.int32)
+    ok = ~np.isnat(days)
+    out[ok] = days[ok].astype(np.int64)
+    return out
+
+
+def validate_baseline_name(name: str, existing: Sequence[str]) -> tuple[bool, str]:
+    if not name.strip():
+        return False, "La línea base necesita un nombre."
+    if name.strip() in existing:
+        return False, f"Ya existe la línea base '{name.strip()}' (las líneas base no se sobrescriben)."
+    return True, ""
+
+
+# =========================
+# VARIACIÓN Y VALOR GANADO (todas las bases a la vez)
+# =========================
+# Las bases se alinean con el plan vigente en matrices (bases x tareas) y todo se calcula
+# con operaciones de arreglos; los desvíos se miden en días hábiles del calendario vigente
+# con una tabla de ordinales hábiles por día (un np.take en vez de busday_count por celda).
+@dataclass
+class BaselineReport:
+    """
+    Plan vigente contra varias líneas base. Desvíos en días hábiles (positivo = atraso);
+    NaN donde la tarea no está en la base o no tiene fechas.
+    """
+    baselines: list[Baseline]
+    as_of: date
+    rows: np.ndarray                    # (B, N) fila de la base para cada tarea vigente (-1 = no está)
+    base_start: np.ndarray              # (B, N) días desde 1970 (NO_DATE = sin fecha)
+    base_finish: np.ndarray
+    base_duration: np.ndarray
+    start_slip: np.ndarray              # (B, N) float, días hábiles
+    finish_slip: np.ndarray
+    planned: np.ndarray                 # (B, N) fracción que la base esperaba lista a `as_of`
+    earned: np.ndarray                  # (N,) fracción ganada según Estado
+    current_start: np.ndarray           # (N,) días desde 1970
+    current_finish: np.ndarray
+    ids: list[str]
+    names: list[str]
+    phases: pd.Categorical
+    gates: np.ndarray                   # posiciones de los gates (Fase "Gates" + salida)
+    ordinals: _Ordinals = field(repr=False)
+
+    @property
+    def baseline_names(self) -> list[str]:
+        return [b.name for b in self.baselines]
+
+    def summary(self) -> pd.DataFrame:
+        """Una fila por base: fin del proyecto, tareas atrasadas, alcance y valor ganado."""
+        present = self.rows >= 0
+        dur = np.where(present, self.base_duration, 0).astype(np.float64)
+        bac = dur.sum(axis=1)
+        pv = (dur * self.planned).sum(axis=1)
+        ev = (dur * self.earned[None, :]).sum(axis=1)
+        base_end = np.array([b.project_finish for b in self.baselines], dtype="datetime64[D]")
+        cur = self.current_finish[self.current_finish != NO_DATE]
+        cur_end = cur.max().astype("datetime64[D]") if len(cur) else np.datetime64("NaT", "D")
+        end_slip = self._slip(base_end, np.full(len(base_end), cur_end))
+        matched = present.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return pd.DataFrame({
+                "Línea base": self.baseline_names,
+                "Capturada": [b.created.replace("T", " ") for b in self.baselines],
+                "Por": [b.actor for b in self.baselines],
+                "Fin base": pd.to_datetime(base_end).date,
+                "Fin actual": pd.to_datetime(np.full(len(base_end), cur_end)).date,
+                "Δ fin proyecto (días hábiles)": pd.array(end_slip, dtype="Int64"),
+                "Tareas atrasadas": (self.finish_slip > 0).sum(axis=1),
+                "Δ fin medio (días hábiles)": np.round(_nanmean(self.finish_slip), 1),
+                "Tareas nuevas": len(self.ids) - matched,
+                "Tareas quitadas": [len(b) for b in self.baselines] - matched,
+                "% planificado": np.round(100 * pv / bac, 1),
+                "% ganado": np.round(100 * ev / bac, 1),
+                "SPI": np.round(np.where(pv > 0, ev / pv, np.nan), 2),
+                "SV (días-tarea)": np.round(ev - pv, 1),
+            })
+
+    def tasks(self, b: int, top: int | None = None) -> pd.DataFrame:
+        """
+        Desvío de inicio y fin por tarea contra la base `b` (solo tareas presentes en ella).
+        Con `top`, solo las `top` de mayor atraso al fin (la tabla se arma para esas filas).
+        """
+        at = np.flatnonzero(self.rows[b] >= 0)
+        if top is not None:
+            slip = np.nan_to_num(self.finish_slip[b, at], nan=-np.inf)
+            at = at[np.argsort(-slip, kind="stable")[:top]]
+        return pd.DataFrame({
+            "ID": [self.ids[i] for i in at.tolist()],
+            "Tarea": [self.names[i] for i in at.tolist()],
+            "Fase": np.asarray(self.phases)[at],
+            "Inicio base": _dates(self.base_start[b, at]),
+            "Inicio actual": _dates(self.current_start[at]),
+            "Δ inicio (días hábiles)": pd.array(self.start_slip[b, at], dtype="Int64"),
+            "Fin base": _dates(self.base_finish[b, at]),
+            "Fin actual": _dates(self.current_finish[at]),
+            "Δ fin (días hábiles)": pd.array(self.finish_slip[b, at], dtype="Int64"),
+            "Avance planificado (%)": np.round(100 * self.planned[b, at]).astype(np.int64),
+            "Avance ganado (%)": np.round(100 * self.earned[at]).astype(np.int64),
+        })
+
+    def phases_report(self, b: int) -> pd.DataFrame:
+        """
+        Por Fase (la del plan vigente) contra la base `b`: inicio = primer inicio, fin = último
+        fin de sus tareas presentes en ambos, y el valor ganado de la fase.
+        """
+        present = self.rows[b] >= 0
+        codes = np.where(present, self.phases.codes, -1)
+        frame = pd.DataFrame({
+            "Fase": pd.Categorical.from_codes(codes, categories=self.phases.categories),
+            "bs": _nan_days(self.base_start[b]), "cs": _nan_days(self.current_start),
+            "bf": _nan_days(self.base_finish[b]), "cf": _nan_days(self.current_finish),
+            "dur": np.where(present, self.base_duration[b], 0).astype(np.float64),
+            "late": self.finish_slip[b] > 0,
+        })
+        frame["pv"] = frame["dur"] * self.planned[b]
+        frame["ev"] = frame["dur"] * self.earned
+        g = frame.groupby("Fase", observed=True, sort=False).agg(
+            bs=("bs", "min"), cs=("cs", "min"), bf=("bf", "max"), cf=("cf", "max"),
+            tareas=("dur", "size"), late=("late", "sum"), pv=("pv", "sum"), ev=("ev", "sum"),
+        )
+        out = pd.DataFrame({
+            "Fase": g.index.astype(str),
+            "Tareas": g["tareas"].to_numpy(),
+            "Inicio base": _dates(g["bs"].to_numpy()),
+            "Inicio actual": _dates(g["cs"].to_numpy()),
+            "Δ inicio (días hábiles)": pd.array(self._slip_days(g["bs"].to_numpy(), g["cs"].to_numpy()), dtype="Int64"),
+            "Fin base": _dates(g["bf"].to_numpy()),
+            "Fin actual": _dates(g["cf"].to_numpy()),
+            "Δ fin (días hábiles)": pd.array(self._slip_days(g["bf"].to_numpy(), g["cf"].to_numpy()), dtype="Int64"),
+            "Tareas atrasadas": g["late"].to_numpy(),
+        })
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["SPI"] = np.round(np.where(g["pv"] > 0, g["ev"] / g["pv"], np.nan), 2)
+        return out
+
+    def phase_trend(self) -> pd.DataFrame:
+        """Δ fin de cada Fase (filas) contra cada base (columnas), todas a la vez."""
+        n_b = len(self.baselines)
+        codes = self.phases.codes
+        bf = np.where(self.rows >= 0, _nan_days(self.base_finish), np.nan)       # (B, N)
+        cf = np.where(self.rows >= 0, _nan_days(self.current_finish)[None, :], np.nan)
+        frame = pd.DataFrame(np.concatenate([bf, cf]).T)
+        ends = frame.groupby(codes, sort=True).max()                              # (F, 2B)
+        slip = self._slip_days(ends.iloc[:, :n_b].to_numpy(), ends.iloc[:, n_b:].to_numpy())
+        labels = self.phases.categories.take(ends.index.to_numpy()).astype(str)
+        out = pd.DataFrame(slip, index=labels, columns=self.baseline_names)
+        out.index.name = "Fase"
+        return out
+
+    def gates_report(self) -> pd.DataFrame:
+        """Δ fin de cada gate (y de la salida) contra cada base: una columna por base."""
+        g = self.gates
+        out = pd.DataFrame({
+            "ID": [self.ids[i] for i in g.tolist()],
+            "Tarea": [self.names[i] for i in g.tolist()],
+            "Fin actual": _dates(self.current_finish[g]),
+        })
+        for k, name in enumerate(self.baseline_names):
+            out[name] = pd.array(self.finish_slip[k, g], dtype="Int64")
+        return out
+
+    def _slip(self, base: np.ndarray, current: np.ndarray) -> np.ndarray:
+        """Días hábiles entre fechas datetime64[D] (NaN si falta alguna)."""
+        return self._slip_days(_nan_days(base), _nan_days(current))
+
+    def _slip_days(self, base: np.ndarray, current: np.ndarray) -> np.ndarray:
+        return _business_slip(self.ordinals, base, current)
+
+
+def _nanmean(a: np.ndarray) -> np.ndarray:
+    n = (~np.isnan(a)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, np.nansum(a, axis=1) / np.maximum(n, 1), np.nan)
+
+
+def _nan_days(days: np.ndarray) -> np.ndarray:
+    """Días desde 1970 como float (NaN = sin fecha); acepta int32 con NO_DATE o datetime64."""
+    if days.dtype.kind == "M":
+        out = days.astype("datetime64[D]").astype(np.float64)
+        out[np.isnat(days)] = np.nan
+        return out
+    return np.where(days == NO_DATE, np.nan, days.astype(np.float64))
+
+
+def _dates(days: np.ndarray) -> pd.Series:
+    f = _nan_days(np.asarray(days))
+    out = np.full(f.shape, np.datetime64("NaT"), dtype="datetime64[D]")
+    ok = ~np.isnan(f)
+    out[ok] = f[ok].astype(np.int64).astype("datetime64[D]")
+    return pd.Series(pd.to_datetime(out)).dt.date
+
+
+class _Ordinals:
+    """Ordinal hábil de cada día en [first, last]: ord(d) - ord(e) = días hábiles entre e y d."""
+
+    def __init__(self, calendar: BusinessCalendar, first: int, last: int):
+        self.first = first
+        days = np.arange(first, last + 2, dtype=np.int64).astype("datetime64[D]")
+        self.table = calendar.count(days[0], days).astype(np.float64)
+
+    def __call__(self, days: np.ndarray) -> np.ndarray:
+        """
+        Días -> ordinal hábil, como float con NaN donde no hay fecha. Acepta int32 con
+        NO_DATE (las matrices de la base: sin máscaras booleanas, un take) o float con NaN.
+        """
+        days = np.asarray(days)
+        missing = np.isnan(days) if days.dtype.kind == "f" else days == NO_DATE
+        at = np.where(missing, self.first, days).astype(np.int64) - self.first
+        out = self.table.take(np.clip(at, 0, len(self.table) - 1))
+        out[missing] = np.nan
+        return out
+
+
+def _business_slip(ordinals: _Ordinals, base: np.ndarray, current: np.ndarray) -> np.ndarray:
+    return ordinals(current) - ordinals(base)
+
+
+def baseline_report(
+    baselines: list[Baseline],
+    schedule: pd.DataFrame,
+    calendar: BusinessCalendar | bool,
+    as_of: date | None = None,
+) -> BaselineReport:
+    """
+    Variación del cronograma vigente (`schedule`, con Inicio/Fin/Estado) contra todas las
+    `baselines` a la vez, y valor ganado a la fecha `as_of` (hoy por defecto).
+
+    Valor planificado (PV) = duración base x fracción que la base esperaba lista a `as_of`
+    (días hábiles transcurridos desde su inicio / duración); valor ganado (EV) = duración base
+    x avance según Estado (EARNED_FRACTION). SPI = EV / PV. Se miden en días-tarea: el plan
+    no tiene costos, así que no hay CPI.
+    """
+    cal = as_calendar(calendar)
+    as_of = as_of or date.today()
+    ids = schedule["ID"].astype(str).str.strip()
+    n, n_b = len(ids), len(baselines)
+
+    # un cruce por juego de IDs distinto (las bases de un mismo plan suelen compartirlo)
+    indexers: dict[str, np.ndarray] = {}
+    rows = np.empty((n_b, n), dtype=np.int64)
+    for k, b in enumerate(baselines):
+        if b.ids_key not in indexers:
+            indexers[b.ids_key] = b.ids.get_indexer(ids.to_numpy(dtype=object))
+        rows[k] = indexers[b.ids_key]
+    present = rows >= 0
+    safe = np.where(present, rows, 0)
+
+    def aligned(attr: str, fill: int) -> np.ndarray:
+        out = np.full((n_b, n), fill, dtype=np.int32)
+        for k, b in enumerate(baselines):
+            if len(b):
+                out[k] = getattr(b, attr)[safe[k]]
+        out[~present] = fill
+        return out
+
+    base_start, base_finish = aligned("start", NO_DATE), aligned("finish", NO_DATE)
+    base_duration = aligned("duration", 0)
+    current_start = _day_numbers(schedule["Inicio"])
+    current_finish = _day_numbers(schedule["Fin"])
+
+    # tabla de ordinales hábiles que cubre todas las fechas en juego (incluida as_of)
+    t = np.datetime64(as_of, "D").astype(np.int64)
+    dated = [a[a != NO_DATE] for a in (base_start, base_finish, current_start, current_finish)]
+    spans = [int(a.min()) for a in dated if len(a)] + [int(t)], [int(a.max()) for a in dated if len(a)] + [int(t)]
+    ordinals = _Ordinals(cal, min(spans[0]), max(spans[1]) + 1)
+
+    base_start_ord = ordinals(base_start)
+    start_slip = ordinals(current_start)[None, :] - base_start_ord
+    finish_slip = ordinals(current_finish)[None, :] - ordinals(base_finish)
+
+    # avance planificado: días hábiles desde el inicio base hasta as_of inclusive / duración
+    elapsed = ordinals(np.array([t + 1])) - base_start_ord
+    with np.errstate(invalid="ignore", divide="ignore"):
+        planned = np.clip(np.nan_to_num(elapsed / np.maximum(base_duration, 1)), 0.0, 1.0)
+    planned[~present] = 0.0
+
+    status = schedule["Estado"].astype(str)
+    earned = status.map(EARNED_FRACTION).fillna(0.0).to_numpy(dtype=np.float64)
+    fases = schedule["Fase"].astype(str).to_numpy(dtype=object)
+    phases = pd.Categorical(fases, categories=pd.unique(fases))      # en el orden del plan
+    gates = np.flatnonzero(np.asarray(phases == "Gates") | (ids == GO_LIVE_ID).to_numpy())
+
+    return BaselineReport(
+        baselines=list(baselines), as_of=as_of, rows=rows,
+        base_start=base_start, base_finish=base_finish, base_duration=base_duration,
+        start_slip=start_slip, finish_slip=finish_slip, planned=planned, earned=earned,
+        current_start=current_start, current_finish=current_finish,
+        ids=ids.tolist(), names=schedule["Tarea"].astype(str).tolist(), phases=phases, gates=gates,
+        ordinals=ordinals,
+    )
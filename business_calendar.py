@@ -0,0 +1,168 @@
+from collections.abc import Iterable
+from datetime import date, timedelta
+
+import numpy as np
+
+
+WEEKMASK_LUN_VIE = "1111100"
+WEEKMASK_CORRIDO = "1111111"
+
+
+# =========================
+# FERIADOS (Chile)
+# =========================
+def easter_sunday(year: int) -> date:
+    # algoritmo gregoriano anónimo (Meeus/Jones/Butcher)
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _june_solstice_chile(year: int) -> date:
+    # solsticio medio (Meeus, cap. 27) llevado a hora de Chile (UTC-4 en junio)
+    y = (year - 2000) / 1000
+    jde = 2451716.56767 + 365241.62603 * y + 0.00325 * y**2 + 0.00888 * y**3 - 0.00030 * y**4
+    return date(2000, 1, 1) + timedelta(days=int(jde - 4 / 24 - 2451544.5))
+
+
+def _monday_rule(d: date) -> date:
+    # Ley 19.668: mar/mié/jue -> lunes de esa semana; vie -> lunes siguiente
+    wd = d.weekday()
+    if wd in (1, 2, 3):
+        return d - timedelta(days=wd)
+    if wd == 4:
+        return d + timedelta(days=3)
+    return d
+
+
+def chile_holidays(years: Iterable[int]) -> list[date]:
+    """
+    Feriados nacionales de Chile (irrenunciables + religiosos + trasladables).
+    No incluye feriados regionales ni electorales: agrégalos a mano si aplican.
+    """
+    out = []
+    for y in years:
+        easter = easter_sunday(y)
+        days = [
+            date(y, 1, 1),
+            easter - timedelta(days=2),   # Viernes Santo
+            easter - timedelta(days=1),   # Sábado Santo
+            date(y, 5, 1),
+            date(y, 5, 21),
+            _june_solstice_chile(y),      # Día de los Pueblos Indígenas
+            _monday_rule(date(y, 6, 29)),  # San Pedro y San Pablo
+            date(y, 7, 16),
+            date(y, 8, 15),
+            date(y, 9, 18),
+            date(y, 9, 19),
+            _monday_rule(date(y, 10, 12)),  # Encuentro de Dos Mundos
+            date(y, 11, 1),
+            date(y, 12, 8),
+            date(y, 12, 25),
+        ]
+        if date(y, 1, 2).weekday() == 0:
+            days.append(date(y, 1, 2))
+        if date(y, 9, 17).weekday() == 0:
+            days.append(date(y, 9, 17))
+        if date(y, 9, 20).weekday() == 4:
+            days.append(date(y, 9, 20))
+
+        # Iglesias Evangélicas (Ley 20.299): martes -> viernes anterior, miércoles -> viernes siguiente
+        reformation = date(y, 10, 31)
+        if reformation.weekday() == 1:
+            reformation = date(y, 10, 27)
+        elif reformation.weekday() == 2:
+            reformation = date(y, 11, 2)
+        days.append(reformation)
+
+        out.extend(days)
+    return sorted(set(out))
+
+
+CHILE_HOLIDAYS = chile_holidays(range(2020, 2041))
+
+
+# =========================
+# CALENDARIO HÁBIL
+# =========================
+class BusinessCalendar:
+    """
+    Calendario de días hábiles sobre numpy.busdaycalendar.
+    Las fechas del cronograma se calculan como desplazamientos enteros (en días
+    hábiles) desde el kickoff y se convierten a fechas en una sola operación.
+    """
+
+    def __init__(self, weekmask: str = WEEKMASK_LUN_VIE, holidays: Iterable[date] = ()):
+        self.weekmask = weekmask
+        self.holidays = tuple(sorted(set(holidays)))
+        self._cal = np.busdaycalendar(
+            weekmask=weekmask,
+            holidays=np.array(self.holidays, dtype="datetime64[D]"),
+        )
+
+    @classmethod
+    def preset(cls, exclude_weekends: bool, exclude_holidays: bool = False) -> "BusinessCalendar":
+        """
+        Presets de la UI: 'Excluir fines de semana' y 'Excluir feriados (Chile)'.
+        """
+        return cls(
+            weekmask=WEEKMASK_LUN_VIE if exclude_weekends else WEEKMASK_CORRIDO,
+            holidays=CHILE_HOLIDAYS if exclude_holidays else (),
+        )
+
+    @property
+    def key(self) -> tuple:
+        return (self.weekmask, self.holidays)
+
+    @property
+    def excludes_weekends(self) -> bool:
+        return self.weekmask == WEEKMASK_LUN_VIE
+
+    def __repr__(self) -> str:
+        return f"BusinessCalendar(weekmask={self.weekmask!r}, holidays={len(self.holidays)})"
+
+    def roll(self, d: date) -> np.datetime64:
+        """Primer día hábil >= d."""
+        return np.busday_offset(np.datetime64(d, "D"), 0, roll="forward", busdaycal=self._cal)
+
+    def offset_dates(self, anchor, offsets) -> np.ndarray:
+        """
+        Fechas a `offsets` días hábiles de `anchor` (vectorizado, datetime64[D]).
+        anchor y offsets se difunden (broadcast) entre sí.
+        """
+        return np.busday_offset(anchor, offsets, roll="forward", busdaycal=self._cal)
+
+    def count(self, begin, end) -> np.ndarray:
+        """Días hábiles en [begin, end) (vectorizado)."""
+        return np.busday_count(begin, end, busdaycal=self._cal)
+
+    def is_business_day(self, d: date) -> bool:
+        return bool(np.is_busday(np.datetime64(d, "D"), busdaycal=self._cal))
+
+    def business_mask(self, days) -> np.ndarray:
+        """True donde el día es hábil (vectorizado)."""
+        return np.is_busday(days, busdaycal=self._cal)
+
+    def next_business_day(self, d: date) -> date:
+        return self.roll(d).astype(date)
+
+    def add_business_days(self, start: date, n: int) -> date:
+        """
+        Fecha final al sumar n días hábiles a start.
+        Convención: si n=1, termina el mismo día (start).
+        """
+        return self.offset_dates(self.roll(start), max(n, 1) - 1).astype(date)
+
+    def next_day_after(self, end_date: date) -> date:
+        return self.offset_dates(np.datetime64(end_date, "D") + 1, 0).astype(date)
+
+    def holidays_between(self, start: date, end: date) -> list[date]:
+        return [h for h in self.holidays if start <= h <= end]
@@ -0,0 +1,218 @@
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+
+
+# =========================
+# TRAZA POR RERUN
+# =========================
+# Cada sesión de Streamlit corre su script en su propio hilo: la traza activa es del hilo.
+# Sin traza activa, span()/count() solo hacen una búsqueda en el thread-local (costo ~nulo),
+# así que la instrumentación puede quedar en el código siempre.
+_local = threading.local()
+_NULL = nullcontext()
+
+# cuántas funciones mostrar del perfil (orden por tiempo acumulado)
+PROFILE_TOP = 40
+
+
+class Trace:
+    """
+    Tramos cronometrados (anidados) y contadores de un rerun. Opcionalmente, perfil cProfile.
+    """
+
+    def __init__(self, label: str = "", profile: bool = False):
+        self.label = label
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.spans: list[dict] = []        # {name, depth, start, seconds} en orden de inicio
+        self.counters: dict[str, float] = {}
+        self.total = 0.0
+        self.profile_text = ""
+        self._t0 = time.perf_counter()
+        self._depth = 0
+        self._profiler = cProfile.Profile() if profile else None
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    @contextmanager
+    def span(self, name: str):
+        entry = {"name": name, "depth": self._depth, "start": time.perf_counter() - self._t0, "seconds": 0.0}
+        self.spans.append(entry)
+        self._depth += 1
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            # también si el tramo termina con st.rerun()/st.stop() (excepciones de control)
+            entry["seconds"] = time.perf_counter() - t
+            self._depth -= 1
+
+    def count(self, name: str, value: float = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def finish(self):
+        self.total = time.perf_counter() - self._t0
+        if self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            self.profile_text = out.getvalue()
+            self._profiler = None
+
+    def by_name(self) -> dict[str, tuple[int, float]]:
+        """{tramo: (llamadas, segundos)} sumando las repeticiones de un mismo tramo."""
+        out: dict[str, tuple[int, float]] = {}
+        for s in self.spans:
+            calls, secs = out.get(s["name"], (0, 0.0))
+            out[s["name"]] = (calls + 1, secs + s["seconds"])
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            "label": self.label,
+            "inicio": self.started,
+            "total_segundos": self.total,
+            "tramos": self.spans,
+            "contadores": self.counters,
+        }
+
+
+def begin(enabled: bool, label: str = "", profile: bool = False) -> Trace | None:
+    """
+    Inicia la traza del rerun en este hilo (o la apaga). Descarta una traza anterior que no
+    alcanzó a cerrarse (p. ej. un rerun cortado por st.rerun()).
+    """
+    previous = getattr(_local, "trace", None)
+    if previous is not None and previous._profiler is not None:
+        previous._profiler.disable()
+    _local.trace = Trace(label, profile) if enabled else None
+    return _local.trace
+
+
+def end() -> Trace | None:
+    """Cierra la traza del hilo, la suma a los totales del proceso y la devuelve."""
+    trace = getattr(_local, "trace", None)
+    _local.trace = None
+    if trace is None:
+        return None
+    trace.finish()
+    TOTALS.add(trace)
+    return trace
+
+
+def active() -> bool:
+    return getattr(_local, "trace", None) is not None
+
+
+def span(name: str):
+    trace = getattr(_local, "trace", None)
+    return _NULL if trace is None else trace.span(name)
+
+
+def count(name: str, value: float = 1):
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.count(name, value)
+
+
+def traced(name: str):
+    """Decorador: la función completa es un tramo."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = getattr(_local, "trace", None)
+            if trace is None:
+                return fn(*args, **kwargs)
+            with trace.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# =========================
+# TOTALES DEL PROCESO + EXPORTACIÓN
+# =========================
+class Totals:
+    """Acumulado de las trazas cerradas en este proceso (todas las sesiones con diagnóstico activo)."""
+
+    def __init__(self):
+        self.reruns = 0
+        self.span_calls: dict[str, int] = {}
+        self.span_seconds: dict[str, float] = {}
+        self.counters: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        with self._lock:
+            self.reruns += 1
+            for name, (calls, secs) in trace.by_name().items():
+                self.span_calls[name] = self.span_calls.get(name, 0) + calls
+                self.span_seconds[name] = self.span_seconds.get(name, 0.0) + secs
+            for name, value in trace.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "reruns": self.reruns,
+                "tramos": {n: {"llamadas": self.span_calls[n], "segundos": self.span_seconds[n]} for n in self.span_calls},
+                "contadores": dict(self.counters),
+            }
+
+
+TOTALS = Totals()
+
+
+def to_json(trace: Trace | None) -> str:
+    return json.dumps(
+        {"rerun": trace.to_dict() if trace else None, "proceso": TOTALS.to_dict()}, ensure_ascii=False, indent=2
+    )
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def to_prometheus(trace: Trace | None = None) -> str:
+    """
+    Formato de texto de Prometheus: contadores acumulados del proceso y, si se entrega,
+    la duración de cada tramo del último rerun como gauge.
+    """
+    totals = TOTALS.to_dict()
+    lines = [
+        "# HELP cronograma_reruns_total Reruns con diagnóstico activo.",
+        "# TYPE cronograma_reruns_total counter",
+        f"cronograma_reruns_total {totals['reruns']}",
+        "# HELP cronograma_tramo_segundos_total Tiempo acumulado por tramo.",
+        "# TYPE cronograma_tramo_segundos_total counter",
+    ]
+    lines += [
+        f'cronograma_tramo_segundos_total{{tramo="{_label(n)}"}} {v["segundos"]:.6f}' for n, v in totals["tramos"].items()
+    ]
+    lines += [
+        "# HELP cronograma_tramo_llamadas_total Veces que se ejecutó cada tramo.",
+        "# TYPE cronograma_tramo_llamadas_total counter",
+    ]
+    lines += [f'cronograma_tramo_llamadas_total{{tramo="{_label(n)}"}} {v["llamadas"]}' for n, v in totals["tramos"].items()]
+    lines += [
+        "# HELP cronograma_contador_total Contadores (bytes escritos, filas, recálculos...).",
+        "# TYPE cronograma_contador_total counter",
+    ]
+    lines += [f'cronograma_contador_total{{contador="{_label(n)}"}} {v:g}' for n, v in totals["contadores"].items()]
+    if trace is not None:
+        lines += [
+            "# HELP cronograma_ultimo_rerun_segundos Duración de cada tramo en el último rerun.",
+            "# TYPE cronograma_ultimo_rerun_segundos gauge",
+            f'cronograma_ultimo_rerun_segundos{{tramo="total"}} {trace.total:.6f}',
+        ]
+        lines += [
+            f'cronograma_ultimo_rerun_segundos{{tramo="{_label(n)}"}} {secs:.6f}'
+            for n, (_, secs) in trace.by_name().items()
+        ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,247 @@
+import json
+import os
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+import diagnostics
+from business_calendar import BusinessCalendar
+from scheduling import build_schedule
+from state_store import SETTINGS_KEYS, TASK_COLUMNS, pad_row
+
+
+# nueva instantánea cuando el log creció esto desde la última: acota lo que hay que re-aplicar
+SNAPSHOT_BYTES = 256 * 1024
+
+ROW_FIELD = "*"   # evento de fila completa (alta/baja); el resto son cambios de una celda
+FIELDS = list(TASK_COLUMNS)
+
+
+def _now() -> str:
+    # en UTC: la hora local se repite al terminar el horario de verano y el historial dejaría
+    # de estar en orden (la repetición corta antes de tiempo y elige mal la instantánea)
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _utc(ts: str) -> datetime:
+    # los historiales anteriores guardaban la hora local sin zona: se interpreta como local
+    return datetime.fromisoformat(ts).astimezone(timezone.utc)
+
+
+def local_time(ts: str) -> str:
+    """Fecha de un evento en hora local, para mostrar."""
+    return _utc(ts).astimezone().replace(tzinfo=None).isoformat(sep=" ", timespec="seconds")
+
+
+def _as_of_utc(when: date | datetime | None) -> datetime | None:
+    # una fecha sola incluye todo ese día (hora local); un datetime sin zona también es local
+    if when is None:
+        return None
+    if not isinstance(when, datetime):
+        # hasta la medianoche siguiente: el fin del día puede repetirse al cambiar la hora
+        return datetime.combine(when + timedelta(days=1), time.min).astimezone(timezone.utc) - timedelta(microseconds=1)
+    return when.astimezone(timezone.utc)
+
+
+def diff_events(
+    before_rows: list[tuple],
+    before_meta: dict[str, str],
+    after_rows: list[tuple],
+    after_meta: dict[str, str],
+    positions: list[int],
+) -> list[dict]:
+    """
+    Eventos (sin versión ni fecha) que llevan de before a after: una celda por evento,
+    altas/bajas de fila como ROW_FIELD y cambios de configuración con pos=None.
+    Solo se revisan las filas `positions` (las que se escribieron).
+    """
+    events = []
+    for pos in positions:
+        new = after_rows[pos]
+        old = before_rows[pos] if pos < len(before_rows) else None
+        if old is None:
+            events.append({"pos": pos, "id": new[1], "field": ROW_FIELD, "old": None, "new": list(new)})
+            continue
+        for name, o, n in zip(FIELDS, old, new):
+            if o != n:
+                events.append({"pos": pos, "id": new[1], "field": name, "old": o, "new": n})
+    for pos in range(len(after_rows), len(before_rows)):
+        events.append({"pos": pos, "id": before_rows[pos][1], "field": ROW_FIELD, "old": list(before_rows[pos]), "new": None})
+    for key in SETTINGS_KEYS:
+        if before_meta.get(key) != after_meta.get(key):
+            events.append({"pos": None, "id": None, "field": key, "old": before_meta.get(key), "new": after_meta.get(key)})
+    return events
+
+
+def apply_event(rows: list[list | None], meta: dict[str, str], event: dict):
+    pos, field = event["pos"], event["field"]
+    if pos is None:
+        meta[field] = event["new"]
+    elif field == ROW_FIELD:
+        while len(rows) <= pos:
+            rows.append(None)
+        rows[pos] = None if event["new"] is None else list(pad_row(event["new"]))
+    else:
+        rows[pos][FIELDS.index(field)] = event["new"]
+
+
+class EventLog:
+    """
+    Historial append-only de cambios (JSON Lines): quién cambió qué campo de qué tarea,
+    valor anterior/nuevo y cuándo. Cada cierto tamaño se guarda una instantánea completa;
+    el estado a cualquier fecha = última instantánea anterior + re-aplicar los eventos siguientes.
+
+    SqliteStateStore llama a record() después de confirmar cada escritura: el historial solo
+    tiene versiones que quedaron guardadas. Entre procesos, dos guardados casi simultáneos
+    pueden quedar en el archivo fuera de orden; la lectura re-aplica por versión.
+    """
+
+    def __init__(self, events_path: Path, snapshot_dir: Path):
+        self.events_path = Path(events_path)
+        self.snapshot_dir = Path(snapshot_dir)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def beside(cls, db_path: Path) -> "EventLog":
+        """Log junto al SQLite: <base>.events.jsonl y <base>.snapshots/."""
+        base = Path(db_path).with_suffix("")
+        return cls(Path(f"{base}.events.jsonl"), Path(f"{base}.snapshots"))
+
+    # ---- escritura
+    def record(
+        self,
+        version: int,
+        before_rows: list[tuple],
+        before_meta: dict[str, str],
+        after_rows: list[tuple],
+        after_meta: dict[str, str],
+        positions: list[int],
+        actor: str = "",
+    ) -> int:
+        """
+        Registra una escritura del store (versión `version`). Devuelve eventos escritos.
+        """
+        ts = _now()
+        with self._lock:
+            index = self._index()
+            if not index:
+                # primera escritura con log: el estado previo es la base del historial
+                self._write_snapshot(version - 1, ts, before_rows, before_meta)
+                index = self._index()
+
+            events = diff_events(before_rows, before_meta, after_rows, after_meta, positions)
+            if events:
+                lines = "".join(
+                    json.dumps({"v": version, "ts": ts, "actor": actor, **e}, ensure_ascii=False) + "\n"
+                    for e in events
+                )
+                with open(self.events_path, "a", encoding="utf-8") as f:
+                    f.write(lines)  # una sola escritura por guardado
+                if diagnostics.active():
+                    diagnostics.count("bytes escritos (historial)", len(lines.encode("utf-8")))
+
+            if self._size() - index[-1]["offset"] >= SNAPSHOT_BYTES:
+                self._write_snapshot(version, ts, after_rows, after_meta)
+            return len(events)
+
+    def _write_snapshot(self, version: int, ts: str, rows: list[tuple], meta: dict[str, str]):
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{version:010d}.json"
+        tmp = self.snapshot_dir / f"{name}.tmp"
+        tmp.write_text(json.dumps({"rows": [list(r) for r in rows], "meta": meta}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.snapshot_dir / name)  # la instantánea aparece completa o no aparece
+        entry = {"v": version, "ts": ts, "offset": self._size(), "file": name}
+        with open(self.snapshot_dir / "index.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    # ---- lectura
+    def _size(self) -> int:
+        return self.events_path.stat().st_size if self.events_path.exists() else 0
+
+    def _index(self) -> list[dict]:
+        path = self.snapshot_dir / "index.jsonl"
+        if not path.exists():
+            return []
+        return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line]
+
+    def state_at(self, when: date | datetime | None = None) -> tuple[list[tuple], dict[str, str]] | None:
+        """
+        (filas, meta) como estaban en `when` (None = ahora). Si `when` es anterior al
+        historial, devuelve el estado más antiguo registrado. None si no hay historial.
+        """
+        index = self._index()
+        if not index:
+            return None
+        until = _as_of_utc(when)
+        usable = [s for s in index if until is None or _utc(s["ts"]) <= until] or index[:1]
+        snap = usable[-1]
+
+        data = json.loads((self.snapshot_dir / snap["file"]).read_text(encoding="utf-8"))
+        # filas de instantáneas anteriores a las columnas de recursos: se completan con defaults
+        rows: list[list | None] = [list(pad_row(r)) for r in data["rows"]]
+        meta = dict(data["meta"])
+        if self.events_path.exists():
+            # lo escrito desde la instantánea (acotado por SNAPSHOT_BYTES); un guardado de otro
+            # proceso puede haber llegado después de una versión mayor o de la instantánea misma
+            pending = []
+            with open(self.events_path, encoding="utf-8") as f:
+                f.seek(snap["offset"])
+                for line in f:
+                    event = json.loads(line)
+                    if event["v"] > snap["v"] and (until is None or _utc(event["ts"]) <= until):
+                        pending.append(event)
+            for event in sorted(pending, key=lambda e: e["v"]):  # estable: dentro de una versión, en orden
+                apply_event(rows, meta, event)
+        return [tuple(r) for r in rows if r is not None], meta
+
+    def events(self, limit: int = 200, task_id: str | None = None) -> list[dict]:
+        """Últimos eventos, del más reciente al más antiguo (opcionalmente de una tarea)."""
+        if not self.events_path.exists():
+            return []
+        out = []
+        for line in _reverse_lines(self.events_path):
+            event = json.loads(line)
+            if task_id is None or event["id"] == task_id:
+                out.append(event)
+                if len(out) >= limit:
+                    break
+        return out
+
+
+def _reverse_lines(path: Path, block: int = 64 * 1024):
+    # lee desde el final por bloques: el historial reciente no depende del tamaño del archivo
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        tail = b""
+        while end > 0:
+            start = max(0, end - block)
+            f.seek(start)
+            chunk = f.read(end - start) + tail
+            lines = chunk.split(b"\n")
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.decode("utf-8")
+            end = start
+        if tail:
+            yield tail.decode("utf-8")
+
+
+def frame_from_rows(rows: list[tuple]) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=FIELDS)
+
+
+def schedule_as_of(log: EventLog, when: date | datetime) -> pd.DataFrame | None:
+    """
+    Cronograma calculado con el plan (tareas, kickoff y calendario) tal como estaba en `when`.
+    """
+    state = log.state_at(when)
+    if state is None or not state[0]:
+        return None
+    rows, meta = state
+    calendar = BusinessCalendar.preset(meta.get("excludes_weekends", "1") == "1", meta.get("excludes_holidays", "0") == "1")
+    kickoff = date.fromisoformat(meta.get("start_date", date.today().isoformat()))
+    return build_schedule(frame_from_rows(rows), kickoff, calendar)
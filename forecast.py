@@ -0,0 +1,219 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from business_calendar import BusinessCalendar
+from scheduling import (
+    GO_LIVE_ID,
+    TaskGraph,
+    as_calendar,
+    build_task_graph,
+    effective_durations,
+    schedule_offsets,
+    sweep_kickoffs,
+)
+
+
+PERCENTILES = (50, 80, 95)
+
+# sin historial de desviaciones: -20% / +50% alrededor de la duración efectiva
+DEFAULT_OPTIMISM = 0.2
+DEFAULT_PESSIMISM = 0.5
+
+
+def slip_ratios(df: pd.DataFrame) -> tuple[float, float]:
+    """
+    (optimismo, pesimismo) relativos a partir de las desviaciones ya registradas en el plan:
+    promedio de desviación/duración base de las tareas adelantadas y de las atrasadas.
+    """
+    base = pd.to_numeric(df["Duración (días hábiles)"], errors="coerce").fillna(1).clip(lower=1)
+    dev = pd.to_numeric(df["Desviación (días hábiles)"], errors="coerce").fillna(0)
+    ratio = (dev / base).to_numpy()
+
+    ahead = -ratio[ratio < 0]
+    late = ratio[ratio > 0]
+    optimism = float(np.clip(ahead.mean(), 0.05, 0.9)) if len(ahead) else DEFAULT_OPTIMISM
+    pessimism = float(np.clip(late.mean(), 0.1, 2.0)) if len(late) else DEFAULT_PESSIMISM
+    return optimism, pessimism
+
+
+# escenarios por tramo: la matriz tareas x escenarios de un tramo ronda las CHUNK_CELLS celdas,
+# sea cual sea el tamaño del plan o la cantidad de escenarios
+CHUNK_CELLS = 4_000_000
+CHUNK_MIN, CHUNK_MAX = 256, 4_096
+
+# tope de tareas x escenarios por pronóstico (~1.000 tareas a 20.000 escenarios): en planes
+# grandes se simulan menos escenarios, nunca menos de MIN_SAMPLES
+MAX_TASK_SAMPLES = 20_000_000
+MIN_SAMPLES = 1_000
+
+
+def sample_budget(n_tasks: int, n_samples: int) -> int:
+    """Escenarios que se simulan de verdad para un plan de `n_tasks` tareas."""
+    return min(n_samples, max(MIN_SAMPLES, MAX_TASK_SAMPLES // max(n_tasks, 1)))
+
+
+def duration_ranges(df: pd.DataFrame, optimism: float, pessimism: float) -> tuple[np.ndarray, ...]:
+    """(mín, moda, máx, finalizadas) por tarea: la triangular de cada duración."""
+    mode = effective_durations(df).to_numpy(dtype=np.float64)
+    left = np.maximum(1.0, mode * (1 - optimism))
+    right = np.maximum(mode * (1 + pessimism), left + 1e-6)
+    done = (df["Estado"].astype(str) == "Finalizado").to_numpy()
+    return left, mode, right, done
+
+
+def sample_durations(ranges: tuple[np.ndarray, ...], n_samples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Matriz (tareas x escenarios) de duraciones en días hábiles.
+    Triangular(min, moda, max) con moda = duración efectiva; las tareas Finalizadas no varían.
+    Se muestrea por la inversa de la distribución, en float32 y casi todo en el lugar
+    (rng.triangular con parámetros por fila es bastante más lento).
+    """
+    left, mode, right, done = ranges
+    span = (right - left).astype(np.float32)[:, None]
+    peak = ((mode - left) / (right - left)).astype(np.float32)[:, None]
+
+    u = rng.random((len(mode), n_samples), dtype=np.float32)
+    low = u < peak
+    rise = np.sqrt(u * peak)                      # rama izquierda: u < peak
+    np.subtract(1, u, out=u)
+    np.multiply(u, 1 - peak, out=u)
+    np.sqrt(u, out=u)
+    np.subtract(1, u, out=u)                      # rama derecha
+    np.copyto(u, rise, where=low)
+    np.multiply(u, span, out=u)
+    np.add(u, left.astype(np.float32)[:, None], out=u)
+    np.rint(u, out=u)
+    out = np.maximum(u, 1, out=u).astype(np.int32)
+    out[done] = mode[done, None].astype(np.int32)
+    return out
+
+
+def simulate_end_offsets(graph: TaskGraph, durations: np.ndarray) -> np.ndarray:
+    """
+    Propaga todos los escenarios a la vez por el grafo: una operación de arreglo por arista,
+    en orden topológico. Devuelve fines (tareas x escenarios) en días hábiles desde el kickoff.
+    """
+    n_tasks, n_samples = durations.shape
+    end = np.full((n_tasks, n_samples), -1, dtype=np.int32)
+    start = np.empty(n_samples, dtype=np.int32)
+    for i in graph.order:
+        start.fill(0)
+        for p, lag in zip(graph.preds[i], graph.lags[i]):
+            np.maximum(start, end[p] + (1 + lag), out=start)
+        np.add(start, durations[i] - 1, out=end[i])
+    return end
+
+
+def milestone_targets(df: pd.DataFrame, pos: dict[str, int], ids: list[str], everything) -> list[tuple[str, list[int]]]:
+    """Hitos que se pronostican: (etiqueta, posiciones): salida, cada Gate y fin del proyecto."""
+    targets = []
+    if GO_LIVE_ID in pos:
+        targets.append((f"{GO_LIVE_ID} (salida)", [pos[GO_LIVE_ID]]))
+    gates = np.flatnonzero((df["Fase"].astype(str) == "Gates").to_numpy())
+    targets += [(ids[g], [g]) for g in gates]
+    targets.append(("Fin proyecto", list(everything)))
+    return targets
+
+
+def forecast_milestones(
+    df: pd.DataFrame,
+    kickoff: date,
+    calendar: BusinessCalendar | bool,
+    n_samples: int = 20_000,
+    seed: int | None = 0,
+    graph: TaskGraph | None = None,
+) -> pd.DataFrame:
+    """
+    Pronóstico Monte Carlo de la salida (t14), de cada Gate y del fin del proyecto:
+    fecha del plan, P50/P80/P95 y probabilidad de cumplir la fecha del plan.
+    Simula sample_budget(tareas, n_samples) escenarios, por tramos de memoria acotada.
+    """
+    if graph is None:
+        graph = build_task_graph(df)
+    cal = as_calendar(calendar)
+    rng = np.random.default_rng(seed)
+
+    _, plan_end = schedule_offsets(graph, effective_durations(df).tolist())
+    targets = [
+        (label, dated)
+        for label, positions in milestone_targets(df, graph.pos, graph.ids, graph.order)
+        if (dated := [p for p in positions if plan_end[p] >= 0])
+    ]
+    if not targets:
+        return pd.DataFrame()
+
+    # por tramos de escenarios: de cada tramo solo quedan los fines de los hitos (hitos x escenarios,
+    # acotado por MAX_TASK_SAMPLES), nunca la matriz completa de tareas x escenarios
+    ranges = duration_ranges(df, *slip_ratios(df))
+    n_samples = sample_budget(len(df), n_samples)
+    chunk = int(np.clip(CHUNK_CELLS // max(len(df), 1), CHUNK_MIN, CHUNK_MAX))
+    sim = np.empty((len(targets), n_samples), dtype=np.int32)
+    for done in range(0, n_samples, chunk):
+        end = simulate_end_offsets(graph, sample_durations(ranges, min(chunk, n_samples - done), rng))
+        for k, (_, positions) in enumerate(targets):
+            np.max(end[positions], axis=0, out=sim[k, done:done + end.shape[1]])
+
+    plan = np.array([plan_end[positions].max() for _, positions in targets])
+    pct = np.percentile(sim, PERCENTILES, axis=1, method="higher").astype(np.int64).T
+    on_time = (sim <= plan[:, None]).mean(axis=1)
+
+    anchor = cal.roll(kickoff)
+    rows = []
+    for (label, _), plan_offset, offsets, prob in zip(targets, plan, pct, on_time):
+        dates = cal.offset_dates(anchor, np.concatenate([[plan_offset], offsets])).astype(date)
+        rows.append({
+            "Hito": label,
+            "Plan": dates[0],
+            **{f"P{q}": d for q, d in zip(PERCENTILES, dates[1:])},
+            "Prob. a tiempo": float(prob),
+        })
+    return pd.DataFrame(rows)
+
+
+# =========================
+# SENSIBILIDAD AL KICKOFF
+# =========================
+def kickoff_sweep(
+    schedule: pd.DataFrame,
+    kickoff: date,
+    calendar: BusinessCalendar | bool,
+    days: int = 90,
+) -> pd.DataFrame:
+    """
+    Salida, cierre de cada Gate y fin del proyecto para cada kickoff de los `days` días corridos
+    desde `kickoff`. El cronograma (`schedule`, con Fin) se pasa a desplazamientos hábiles una
+    vez y se re-ancla en todos los kickoffs a la vez (scheduling.sweep_kickoffs): fines de
+    semana y feriados cambian las fechas de cada hito de forma distinta según el día de partida.
+    Vale también para el cronograma nivelado, que tampoco depende del kickoff.
+    Fechas como datetime64 (una fila por kickoff, una columna por hito).
+    """
+    cal = as_calendar(calendar)
+    fin = schedule["Fin"].to_numpy(dtype="datetime64[D]")
+    dated = ~np.isnat(fin)
+    offsets = np.full(len(fin), -1, dtype=np.int64)
+    offsets[dated] = cal.count(cal.roll(kickoff), fin[dated])
+    ids = schedule["ID"].astype(str).str.strip().tolist()
+    targets = milestone_targets(schedule, dict(zip(ids, range(len(ids)))), ids, range(len(ids)))
+
+    # un desplazamiento por hito: el fin más tardío de sus tareas
+    flat = offsets.tolist()
+    labels, ends = [], []
+    for label, positions in targets:
+        end = flat[positions[0]] if len(positions) == 1 else int(offsets[positions].max()) if positions else -1
+        if end >= 0:
+            labels.append(label)
+            ends.append(end)
+
+    kickoffs = np.datetime64(kickoff, "D") + np.arange(days)
+    dates = sweep_kickoffs(cal, kickoffs, np.asarray(ends, dtype=np.int64))
+    # un solo bloque (puede haber miles de gates), ya en la resolución de pandas: sin conversión
+    out = pd.DataFrame(dates.astype("datetime64[s]"), columns=labels)
+    out.insert(0, "Inicio efectivo", cal.offset_dates(kickoffs, 0))
+    out.insert(0, "Kickoff", kickoffs)
+    if labels:
+        # días corridos hasta la salida (o hasta el fin del proyecto si el plan no tiene salida)
+        main = 0 if labels[0].startswith(GO_LIVE_ID) else len(labels) - 1
+        out["Días corridos hasta " + labels[main]] = (dates[:, main] - kickoffs).astype(np.int64)
+    return out
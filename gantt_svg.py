@@ -0,0 +1,165 @@
+from datetime import date
+from html import escape
+
+import numpy as np
+import pandas as pd
+
+from business_calendar import BusinessCalendar
+
+
+# mismos colores que la leyenda / themeVariables del Gantt Mermaid
+STATUS_STYLES = {
+    "Pendiente": ("#CBD5E1", "#94A3B8"),
+    "En proceso": ("#3B82F6", "#2563EB"),
+    "Finalizado": ("#22C55E", "#16A34A"),
+    "Atrasado": ("#EF4444", "#DC2626"),
+}
+TODAY_COLOR = "#F59E0B"
+CRITICAL_COLOR = "#7C3AED"
+TEXT_COLOR = "#0F172A"
+GRID_COLOR = "rgba(2, 8, 23, 0.12)"
+SECTION_FILLS = ("rgba(241, 245, 249, 0.9)", "rgba(255, 255, 255, 0.0)")
+NON_WORKING_FILL = "rgba(148, 163, 184, 0.12)"
+
+BAR_HEIGHT = 22
+BAR_GAP = 10
+TOP_PADDING = 35
+LEFT_PADDING = 240
+RIGHT_PADDING = 20
+FONT_SIZE = 12
+FONT_FAMILY = "system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif"
+
+
+def _day_width(n_days: int) -> float:
+    # ~900 px de timeline, con límites para que ni proyectos cortos ni largos queden ilegibles
+    return max(4.0, min(40.0, 900.0 / max(n_days, 1)))
+
+
+def render_gantt_svg(
+    schedule_df: pd.DataFrame,
+    today: date | None = None,
+    calendar: BusinessCalendar | None = None,
+    title: str = "Cronograma Plan 4 (E-Commerce)",
+) -> str:
+    """
+    Carta Gantt como SVG estático a partir del cronograma ya calculado
+    (Fase/ID/Tarea/Estado/Inicio/Fin y, si está, Crítica). No necesita JS ni CDN:
+    el navegador solo pinta el SVG, así que funciona sin internet y con cientos de tareas.
+    """
+    df = schedule_df.dropna(subset=["Inicio", "Fin"])
+    if df.empty:
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="600" height="40" font-family="{FONT_FAMILY}">'
+            f'<text x="10" y="25" font-size="{FONT_SIZE}" fill="{TEXT_COLOR}">Sin tareas con fechas.</text></svg>'
+        )
+
+    starts = df["Inicio"].to_numpy(dtype="datetime64[D]")
+    ends = df["Fin"].to_numpy(dtype="datetime64[D]")
+    first = starts.min()
+    last = ends.max() + np.timedelta64(1, "D")
+    n_days = int((last - first) / np.timedelta64(1, "D"))
+    dw = _day_width(n_days)
+
+    x0 = LEFT_PADDING
+    timeline_w = n_days * dw
+    row_h = BAR_HEIGHT + BAR_GAP
+    height = TOP_PADDING + len(df) * row_h + 30
+    width = x0 + timeline_w + RIGHT_PADDING + 160  # margen para textos fuera de la barra
+
+    def x_of(d) -> float:
+        return x0 + float((d - first) / np.timedelta64(1, "D")) * dw
+
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width:.0f} {height}" '
+        f'width="{width:.0f}" height="{height}" font-family="{FONT_FAMILY}" font-size="{FONT_SIZE}">',
+        f'<text x="{width / 2:.0f}" y="18" text-anchor="middle" font-size="16" font-weight="600" '
+        f'fill="{TEXT_COLOR}">{escape(title)}</text>',
+    ]
+
+    # secciones (Fase) en orden de aparición, con fondo alternado
+    fases = df["Fase"].astype(str)
+    order = []
+    for k, fase in enumerate(pd.unique(fases)):
+        idx = np.flatnonzero((fases == fase).to_numpy())
+        y = TOP_PADDING + len(order) * row_h
+        out.append(
+            f'<rect x="0" y="{y}" width="{width:.0f}" height="{len(idx) * row_h}" '
+            f'fill="{SECTION_FILLS[k % 2]}"/>'
+        )
+        out.append(
+            f'<text x="10" y="{y + row_h / 2 + 4:.1f}" fill="{TEXT_COLOR}" font-weight="600">'
+            f'{escape(fase)}</text>'
+        )
+        order.extend(idx.tolist())
+
+    # días no hábiles sombreados + grilla semanal con eje dd-mm
+    days = np.arange(first, last, dtype="datetime64[D]")
+    if calendar is not None:
+        non_working = ~calendar.business_mask(days)
+        for d in days[non_working]:
+            out.append(
+                f'<rect x="{x_of(d):.1f}" y="{TOP_PADDING}" width="{dw:.1f}" '
+                f'height="{len(df) * row_h}" fill="{NON_WORKING_FILL}"/>'
+            )
+    step = 1 if dw >= 28 else 7
+    ticks = days[::step] if step == 1 else days[(days.astype("datetime64[W]") == days)]
+    for d in ticks:
+        x = x_of(d)
+        label = d.astype(date).strftime("%d-%m")
+        out.append(
+            f'<line x1="{x:.1f}" y1="{TOP_PADDING}" x2="{x:.1f}" y2="{height - 25}" stroke="{GRID_COLOR}"/>'
+            f'<text x="{x:.1f}" y="{height - 10}" text-anchor="middle" fill="{TEXT_COLOR}" '
+            f'opacity="0.7">{label}</text>'
+        )
+
+    # barras
+    estados = df["Estado"].astype(str).to_numpy()
+    tareas = df["Tarea"].astype(str).to_numpy()
+    ids = df["ID"].astype(str).to_numpy()
+    critical = df["Crítica"].to_numpy() if "Crítica" in df.columns else np.zeros(len(df), dtype=bool)
+    for row, i in enumerate(order):
+        fill, stroke = STATUS_STYLES.get(estados[i], STATUS_STYLES["Pendiente"])
+        if critical[i]:
+            stroke, stroke_w = CRITICAL_COLOR, 3
+        else:
+            stroke_w = 1
+        x = x_of(starts[i])
+        w = x_of(ends[i] + np.timedelta64(1, "D")) - x
+        y = TOP_PADDING + row * row_h + BAR_GAP / 2
+        out.append(
+            f'<rect id="{escape(ids[i])}" x="{x:.1f}" y="{y:.1f}" width="{w:.1f}" height="{BAR_HEIGHT}" '
+            f'rx="7" ry="7" fill="{fill}" stroke="{stroke}" stroke-width="{stroke_w}">'
+            f'<title>{escape(ids[i])} — {escape(tareas[i])} ({escape(estados[i])})</title></rect>'
+        )
+        # texto dentro de la barra si cabe (aprox. 6.5 px por carácter), si no a la derecha
+        text = escape(tareas[i])
+        ty = y + BAR_HEIGHT / 2 + 4
+        if len(tareas[i]) * 6.5 < w - 8:
+            out.append(
+                f'<text x="{x + w / 2:.1f}" y="{ty:.1f}" text-anchor="middle" font-weight="600" '
+                f'fill="{TEXT_COLOR}">{text}</text>'
+            )
+        else:
+            out.append(f'<text x="{x + w + 4:.1f}" y="{ty:.1f}" font-weight="600" fill="{TEXT_COLOR}">{text}</text>')
+
+    # marcador de hoy
+    today = today or date.today()
+    t = np.datetime64(today, "D")
+    if first <= t < last:
+        x = x_of(t)
+        out.append(
+            f'<line x1="{x:.1f}" y1="{TOP_PADDING - 5}" x2="{x:.1f}" y2="{height - 25}" '
+            f'stroke="{TODAY_COLOR}" stroke-width="2" stroke-dasharray="6 4"/>'
+        )
+
+    out.append("</svg>")
+    return "\n".join(out)
+
+
+def svg_height(svg: str) -> int:
+    """Alto del viewBox (para dimensionar el contenedor en la UI)."""
+    head = svg[: svg.find(">")]
+    try:
+        return int(float(head.split('viewBox="', 1)[1].split('"', 1)[0].split()[3]))
+    except (IndexError, ValueError):
+        return 400
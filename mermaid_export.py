@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from business_calendar import BusinessCalendar
+from scheduling import clean_id, column_values, effective_duration_list, resolve_dependencies
+
+
+# =========================
+# EXPORTACIÓN MERMAID (sin pandas: tabla = DataFrame o dict de columnas)
+# =========================
+def status_flag(status: str) -> str:
+    if status == "En proceso":
+        return "active, "
+    if status == "Finalizado":
+        return "done, "
+    if status == "Atrasado":
+        return "crit, "
+    return ""
+
+
+def mermaid_safe_text(text: str) -> str:
+    """
+    Sanitiza texto para Mermaid Gantt.
+    El carácter ':' dentro del nombre rompe la sintaxis porque Mermaid lo usa como separador.
+    """
+    return (
+        str(text)
+        .replace(":", " -")
+        .replace("\n", " ")
+        .strip()
+    )
+
+
+def _iso_day(value) -> str | None:
+    # Timestamp, date o datetime64 -> 'YYYY-MM-DD'; None / NaT -> None
+    if value is None or value != value:
+        return None
+    return str(value)[:10]
+
+
+def build_mermaid(
+    df_in,
+    kickoff_iso: str,
+    calendar: BusinessCalendar,
+    schedule_df=None,
+) -> str:
+    """
+    Mermaid propaga cambios usando duración efectiva (base + desviación).
+    Los feriados del calendario se pasan como 'excludes' explícitos.
+    Varias dependencias => 'after a b c'. Mermaid no soporta desfases: las tareas con
+    desfase usan el inicio ya calculado en schedule_df (si se entrega). Las tareas de la ruta
+    crítica (columna 'Crítica' de schedule_df) se marcan con 'crit'.
+    """
+    ids = [clean_id(x) for x in column_values(df_in, "ID")]
+    known_ids = set(ids)
+    starts, critical = {}, set()
+    if schedule_df is not None:
+        sched_ids = [clean_id(x) for x in column_values(schedule_df, "ID")]
+        starts = dict(zip(sched_ids, column_values(schedule_df, "Inicio")))
+        if "Crítica" in schedule_df:
+            critical = {tid for tid, crit in zip(sched_ids, column_values(schedule_df, "Crítica")) if crit}
+
+    lines = []
+    lines.append("gantt")
+    lines.append("    title Cronograma Plan 4 (E-Commerce)")
+    lines.append("    dateFormat  YYYY-MM-DD")
+    lines.append("    axisFormat  %d-%m")
+    kickoff = date.fromisoformat(kickoff_iso)
+    holidays = [h.isoformat() for h in calendar.holidays_between(kickoff, kickoff + timedelta(days=730))]
+    excludes = (["weekends"] if calendar.excludes_weekends else []) + holidays
+    if excludes:
+        lines.append("    excludes    " + ", ".join(excludes))
+    lines.append("")
+
+    # filas por Fase, en orden de aparición
+    sections: dict[str, list[int]] = {}
+    for i, fase in enumerate(column_values(df_in, "Fase")):
+        sections.setdefault(fase, []).append(i)
+
+    tareas = column_values(df_in, "Tarea")
+    estados = column_values(df_in, "Estado")
+    depende = column_values(df_in, "Depende_de")
+    dur_eff = effective_duration_list(df_in)
+
+    for fase, rows in sections.items():
+        lines.append(f"    section {mermaid_safe_text(fase)}")
+        for i in rows:
+            tid = ids[i]
+            flag = status_flag(str(estados[i]))
+            if tid in critical and "crit" not in flag:
+                flag = "crit, " + flag
+            name = mermaid_safe_text(str(tareas[i]).strip())
+            deps = resolve_dependencies(depende[i], known_ids)
+            start = _iso_day(starts.get(tid))
+
+            if tid == "t0":
+                lines.append(f"    {name} :{flag}{tid}, {kickoff_iso}, {dur_eff[i]}d")
+            else:
+                if deps and any(lag for _, lag in deps) and start is not None:
+                    lines.append(f"    {name} :{flag}{tid}, {start}, {dur_eff[i]}d")
+                elif deps:
+                    after = " ".join(d for d, _ in deps)
+                    lines.append(f"    {name} :{flag}{tid}, after {after}, {dur_eff[i]}d")
+                else:
+                    lines.append(f"    {name} :{flag}{tid}, {kickoff_iso}, {dur_eff[i]}d")
+
+        lines.append("")
+    return "\n".join(lines)
@@ -0,0 +1,116 @@
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+from plan_templates import TEMPLATES
+from portfolio import Portfolio, summarize_portfolio
+
+
+st.set_page_config(page_title="Portafolio de proyectos", layout="wide")
+
+
+@st.cache_resource
+def get_portfolio() -> Portfolio:
+    return Portfolio()
+
+
+portfolio = get_portfolio()
+
+st.title("Portafolio de proyectos")
+st.caption(
+    "Cada proyecto tiene su propio plan, kickoff y calendario. Los cronogramas se calculan en paralelo "
+    "y solo se recalculan los proyectos cuyas entradas cambiaron."
+)
+
+# =========================
+# NUEVO PROYECTO
+# =========================
+with st.expander("Nuevo proyecto", expanded=not portfolio.slugs()):
+    with st.form("nuevo_proyecto", clear_on_submit=True):
+        n1, n2, n3 = st.columns([2, 1.6, 1.2])
+        with n1:
+            name = st.text_input("Nombre")
+        with n2:
+            template = st.selectbox("Plantilla", options=list(TEMPLATES))
+        with n3:
+            kickoff = st.date_input("Kickoff", value=date.today())
+        n4, n5 = st.columns(2)
+        with n4:
+            ew = st.toggle("Excluir fines de semana", value=True)
+        with n5:
+            eh = st.toggle("Excluir feriados (Chile)", value=False)
+        if st.form_submit_button("Crear proyecto"):
+            try:
+                slug = portfolio.create(name, template, kickoff, ew, eh)
+                st.success(f"Proyecto '{slug}' creado.")
+            except ValueError as e:
+                st.error(str(e))
+
+projects = portfolio.load_all()
+if not projects:
+    st.info("Aún no hay proyectos en el portafolio.")
+    st.stop()
+
+report = summarize_portfolio(projects)
+summary = report.projects
+
+# =========================
+# RESUMEN
+# =========================
+salidas = summary["Salida"].dropna()
+m1, m2, m3, m4 = st.columns(4)
+m1.metric("Proyectos", len(summary))
+m2.metric("Próxima salida", min(salidas).isoformat() if len(salidas) else "—")
+m3.metric("Última salida", max(salidas).isoformat() if len(salidas) else "—")
+m4.metric("Tareas atrasadas", int(summary["Atrasadas"].sum()))
+st.caption(f"Recalculados en esta carga: {report.recomputed} de {len(projects)} proyectos.")
+
+st.subheader("Proyectos")
+table = summary.assign(Abrir="/?proyecto=" + summary["slug"]).drop(columns=["slug"])
+edited = st.data_editor(
+    table,
+    use_container_width=True,
+    hide_index=True,
+    disabled=[c for c in table.columns if c not in ("Kickoff", "Excluir fines de semana", "Excluir feriados")],
+    column_config={
+        "Abrir": st.column_config.LinkColumn("Abrir", display_text="Editar plan"),
+        "Kickoff": st.column_config.DateColumn("Kickoff", required=True),
+    },
+)
+
+# solo kickoff / calendario se editan aquí; el plan se edita en la página principal
+cols = ["Kickoff", "Excluir fines de semana", "Excluir feriados"]
+changed = (edited[cols] != table[cols]).any(axis=1).to_numpy()
+if changed.any():
+    for i in changed.nonzero()[0]:
+        row = edited.iloc[i]
+        result = portfolio.update_settings(
+            summary["slug"].iloc[i],
+            pd.Timestamp(row["Kickoff"]).date(),
+            bool(row["Excluir fines de semana"]),
+            bool(row["Excluir feriados"]),
+        )
+        for msg in result.conflicts:
+            st.toast(f"{summary['Proyecto'].iloc[i]}: {msg}")
+    st.rerun()
+
+st.subheader("Gates por proyecto (fecha de cierre)")
+st.dataframe(report.gates, use_container_width=True)
+
+st.subheader("Carga compartida (tareas activas por semana y fase)")
+if report.load.empty:
+    st.caption("Sin tareas con fechas.")
+else:
+    st.bar_chart(report.load)
+
+with st.expander("Eliminar proyecto"):
+    d1, d2 = st.columns([2, 1])
+    with d1:
+        to_delete = st.selectbox(
+            "Proyecto", options=summary["slug"].tolist(), format_func=dict(zip(summary["slug"], summary["Proyecto"])).get
+        )
+    with d2:
+        if st.button("Eliminar", type="primary", use_container_width=True):
+            portfolio.delete(to_delete)
+            st.rerun()
@@ -0,0 +1,398 @@
+"""
+Benchmarks de los caminos calientes: grafo, cronograma (completo e incremental), calendario,
+validación de la tabla, cambios en lote, guardado en SQLite, Mermaid, Gantt SVG, nivelación
+por recursos, escenarios, importación/exportación CSV, líneas base, pronóstico Monte Carlo y
+sensibilidad al kickoff.
+
+    python plan_bench.py -o bench.json
+    python plan_bench.py --tamaños 30 1000 --formas cadena -o nuevo.json --comparar bench.json
+
+Los planes son sintéticos, armados repitiendo la plantilla TASKS_DEFAULT:
+  cadena    cada tarea depende de la anterior (profundidad = n)
+  ancho     bloques de la plantilla en paralelo, todos colgando de t0 (poca profundidad)
+  profundo  bloques de la plantilla encadenados: cada bloque parte cuando termina el anterior
+
+El resultado es JSON (una fila por etapa x forma x tamaño, con tiempo y memoria pico).
+Con --comparar, sale con código 1 si alguna etapa quedó más lenta que la base más allá de
+la tolerancia.
+"""
+import argparse
+import io
+import json
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import replace
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from baselines import Baseline, baseline_report
+from business_calendar import BusinessCalendar
+from forecast import forecast_milestones, kickoff_sweep
+from gantt_svg import render_gantt_svg
+from mermaid_export import build_mermaid
+from plan_engine import Plan, schedule_plan
+from plan_io import export_schedule, import_plan
+from plan_templates import TASKS_DEFAULT
+from resource_leveling import build_leveled_schedule
+from scenarios import SCENARIO_FIELDS, Scenario, ScenarioBase, scenario_schedule
+from scheduling import IncrementalScheduler, build_schedule, build_task_graph, split_dependencies
+from state_store import TASK_COLUMNS, SqliteStateStore
+from status_rules import apply_status_batch, diff_rows, validate_status_edits
+
+
+SIZES = (30, 1_000, 10_000, 100_000)
+SHAPES = ("cadena", "ancho", "profundo")
+KICKOFF = date(2026, 3, 2)
+
+# filas editadas en la etapa de validación (lo que cambia un usuario entre dos reruns)
+EDITED_ROWS = 200
+
+# una regresión tiene que superar la tolerancia relativa Y este mínimo absoluto (ruido del reloj)
+MIN_DELTA_SECONDS = 0.005
+
+
+# =========================
+# PLANES SINTÉTICOS
+# =========================
+def synthetic_plan(n: int, shape: str, seed: int = 0) -> pd.DataFrame:
+    """
+    Plan de n tareas con las fases/nombres/duraciones de TASKS_DEFAULT y la forma pedida.
+    Desviaciones chicas al azar (semilla fija: mismo plan en cada corrida). Responsables:
+    cada tramo de 25 tareas lo reparte un equipo de 5 personas (un responsable cada ~60 tareas).
+    """
+    rng = random.Random(seed)
+    t0, *block = TASKS_DEFAULT
+    last_id = "t14"  # salida: el siguiente bloque del plan profundo arranca ahí
+
+    rows = [t0]
+    if shape == "cadena":
+        for i in range(1, n):
+            fase, _, tarea, _, dur = block[(i - 1) % len(block)]
+            rows.append((fase, f"c{i}", tarea, rows[-1][1], dur))
+    elif shape in ("ancho", "profundo"):
+        k = 0
+        while len(rows) < n:
+            anchor = "t0" if shape == "ancho" or k == 0 else f"{last_id}_{k - 1}"
+            for fase, tid, tarea, deps, dur in block:
+                refs = [anchor if d == "t0" else f"{d}_{k}" for d in split_dependencies(deps)]
+                rows.append((fase, f"{tid}_{k}", tarea, ", ".join(refs), dur))
+            k += 1
+    else:
+        raise ValueError(f"Forma desconocida: {shape}.")
+
+    rows = rows[:n]
+    people = max(5, len(rows) // 60)
+    assignees = [f"p{(i // 25 * 5 + rng.randrange(5)) % people}" for i in range(len(rows))]
+    return pd.DataFrame(
+        {
+            "Fase": [r[0] for r in rows],
+            "ID": [r[1] for r in rows],
+            "Tarea": [r[2] for r in rows],
+            "Depende_de": [r[3] for r in rows],
+            "Duración (días hábiles)": [r[4] for r in rows],
+            "Estado": ["Pendiente"] * len(rows),
+            "Desviación (días hábiles)": [rng.choice((-1, 0, 0, 0, 0, 1, 2)) for _ in rows],
+            "Responsable": assignees,
+            "Dedicación (%)": [rng.choice((50, 100, 100)) for _ in rows],
+        },
+        columns=list(TASK_COLUMNS),
+    )
+
+
+# =========================
+# ETAPAS
+# =========================
+# cada etapa: setup(plan) -> función sin argumentos a medir. El setup no se mide.
+def _stage_grafo(ctx):
+    return lambda: build_task_graph(ctx["df"])
+
+
+def _stage_cronograma(ctx):
+    return lambda: build_schedule(ctx["df"], KICKOFF, ctx["cal"])
+
+
+def _stage_incremental(ctx):
+    # re-programación tras editar la desviación de una tarea temprana (alterna dos versiones
+    # para que cada llamada tenga de verdad un cambio que propagar)
+    scheduler = IncrementalScheduler()
+    scheduler.schedule(ctx["df"], KICKOFF, ctx["cal"])
+    col = ctx["df"].columns.get_loc("Desviación (días hábiles)")
+    versions = [ctx["df"].copy() for _ in range(2)]
+    for k, df in enumerate(versions):
+        df.iat[min(1, len(df) - 1), col] = 3 + k
+    state = {"k": 0}
+
+    def run():
+        state["k"] ^= 1
+        scheduler.schedule(versions[state["k"]], KICKOFF, ctx["cal"])
+    return run
+
+
+def _stage_dias_habiles(ctx):
+    durations = ctx["df"]["Duración (días hábiles)"].tolist()
+    cal = ctx["cal"]
+    return lambda: [cal.add_business_days(KICKOFF, d) for d in durations]
+
+
+def _stage_validacion(ctx):
+    # lo que hace la app tras editar la tabla: diff, y reglas de estado solo en filas cambiadas
+    df = ctx["df"]
+    rows = np.array(sorted(random.Random(1).sample(range(len(df)), min(EDITED_ROWS, len(df)))))
+    edited = df.copy()
+    edited.iloc[rows, edited.columns.get_loc("Estado")] = "En proceso"
+
+    def run():
+        changed = diff_rows(df, edited)
+        validate_status_edits(df, edited.copy(), changed, ctx["graph"])
+    return run
+
+
+def _stage_lote(ctx):
+    # cerrar todas las tareas de dos fases en un solo cambio
+    df = ctx["df"]
+    ids = df["ID"][df["Fase"].isin(["Inicio", "Base técnica"])].tolist()
+    return lambda: apply_status_batch(df, ids, "Finalizado", ctx["graph"])
+
+
+def _stage_guardar(ctx):
+    def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            SqliteStateStore(Path(tmp) / "plan.sqlite").save(ctx["df"], KICKOFF, True, False)
+    return run
+
+
+def _stage_guardar_incremental(ctx):
+    # guardado optimista de una sola fila cambiada sobre un plan ya guardado
+    tmp = tempfile.mkdtemp()
+    ctx["cleanup"].append(tmp)
+    store = SqliteStateStore(Path(tmp) / "plan.sqlite")
+    base = store.save(ctx["df"], KICKOFF, True, False).snapshot
+    col = ctx["df"].columns.get_loc("Desviación (días hábiles)")
+    versions = [ctx["df"].copy() for _ in range(2)]
+    for k, df in enumerate(versions):
+        df.iat[len(df) // 2, col] = 10 + k
+    state = {"k": 0, "base": base}
+
+    def run():
+        # alterna entre dos versiones: cada llamada escribe de verdad una fila
+        state["k"] ^= 1
+        state["base"] = store.save(versions[state["k"]], KICKOFF, True, False, base=state["base"]).snapshot
+    return run
+
+
+def _stage_mermaid(ctx):
+    return lambda: build_mermaid(ctx["df"], KICKOFF.isoformat(), ctx["cal"], ctx["schedule"])
+
+
+def _stage_gantt_svg(ctx):
+    return lambda: render_gantt_svg(ctx["schedule"], KICKOFF, ctx["cal"])
+
+
+def _stage_nivelacion(ctx):
+    return lambda: build_leveled_schedule(ctx["df"], KICKOFF, ctx["cal"], {}, ctx["graph"])
+
+
+def _stage_escenario(ctx):
+    # escenario que atrasa una tarea temprana, sobre la base ya calculada (lo que cachea la app)
+    base = ScenarioBase.from_table(ctx["df"], ctx["graph"])
+    scenario = Scenario("bench").with_overrides([(ctx["df"]["ID"].iat[min(1, len(ctx["df"]) - 1)], SCENARIO_FIELDS[1], 3)])
+    return lambda: scenario_schedule(base, scenario)
+
+
+def _stage_exportar(ctx):
+    return lambda: export_schedule(ctx["schedule"], io.BytesIO(), "csv")
+
+
+def _stage_importar(ctx):
+    # lectura por tramos + validación de un CSV con el cronograma exportado
+    data = io.BytesIO()
+    export_schedule(ctx["schedule"], data, "csv")
+    return lambda: import_plan(data, "csv")
+
+
+def _stage_lineas_base(ctx):
+    # 20 líneas base semanales (cada una con un atraso distinto) contra el plan vigente
+    sched = ctx["schedule"]
+    rng = np.random.default_rng(0)
+    first = Baseline.capture("bench", sched, KICKOFF)
+    baselines = [
+        replace(first, name=f"semana {k}", finish=first.finish - rng.integers(0, 3, len(first)).astype(np.int32))
+        for k in range(20)
+    ]
+
+    def run():
+        report = baseline_report(baselines, sched, ctx["cal"], KICKOFF)
+        report.summary()
+        report.phase_trend()
+    return run
+
+
+def _stage_pronostico(ctx):
+    # Monte Carlo con los escenarios por defecto de la app
+    return lambda: forecast_milestones(ctx["df"], KICKOFF, ctx["cal"], n_samples=20_000, graph=ctx["graph"])
+
+
+def _stage_barrido_kickoff(ctx):
+    # salida, gates y fin del proyecto para 90 kickoffs consecutivos
+    return lambda: kickoff_sweep(ctx["schedule"], KICKOFF, ctx["cal"], days=90)
+
+
+def _stage_motor(ctx):
+    # camino sin pandas de la CLI (plan_engine)
+    tasks = {c: ctx["df"][c].tolist() for c in TASK_COLUMNS}
+    return lambda: schedule_plan(Plan("bench", tasks, KICKOFF))
+
+
+STAGES = {
+    "grafo": _stage_grafo,
+    "cronograma": _stage_cronograma,
+    "cronograma_incremental": _stage_incremental,
+    "add_business_days": _stage_dias_habiles,
+    "validacion": _stage_validacion,
+    "lote": _stage_lote,
+    "guardar": _stage_guardar,
+    "guardar_incremental": _stage_guardar_incremental,
+    "mermaid": _stage_mermaid,
+    "gantt_svg": _stage_gantt_svg,
+    "nivelacion": _stage_nivelacion,
+    "escenario": _stage_escenario,
+    "exportar_csv": _stage_exportar,
+    "importar_csv": _stage_importar,
+    "lineas_base": _stage_lineas_base,
+    "pronostico": _stage_pronostico,
+    "barrido_kickoff": _stage_barrido_kickoff,
+    "motor_cli": _stage_motor,
+}
+
+
+def _peak_kib(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def run_stage(name: str, ctx: dict, repeat: int, memory: bool) -> dict:
+    fn = STAGES[name](ctx)
+    fn()  # calentamiento: cachés de numpy/pandas, imports perezosos
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return {
+        "etapa": name,
+        "segundos": min(times),
+        "mediana": statistics.median(times),
+        "repeticiones": repeat,
+        "memoria_pico_kib": _peak_kib(fn) if memory else None,
+    }
+
+
+def run_benchmarks(
+    sizes=SIZES, shapes=SHAPES, stages=tuple(STAGES), repeat: int = 3, memory: bool = True, log=None
+) -> list[dict]:
+    results = []
+    cal = BusinessCalendar.preset(True, True)
+    for shape in shapes:
+        for n in sizes:
+            df = synthetic_plan(n, shape)
+            ctx = {"df": df, "cal": cal, "cleanup": []}
+            ctx["graph"] = build_task_graph(df)
+            ctx["schedule"] = build_schedule(df, KICKOFF, cal, graph=ctx["graph"])
+            for name in stages:
+                row = {"forma": shape, "n": n, **run_stage(name, ctx, repeat, memory)}
+                results.append(row)
+                if log:
+                    log(row)
+            for tmp in ctx["cleanup"]:
+                shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+
+# =========================
+# COMPARACIÓN CON UNA CORRIDA BASE
+# =========================
+def _key(row: dict) -> tuple:
+    return row["etapa"], row["forma"], row["n"]
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """
+    Regresiones respecto a `baseline`: etapas (misma forma y tamaño) cuyo mejor tiempo
+    empeoró más que `tolerance` (relativo) y más que MIN_DELTA_SECONDS (absoluto).
+    """
+    before = {_key(r): r["segundos"] for r in baseline}
+    out = []
+    for row in results:
+        old = before.get(_key(row))
+        if old is None:
+            continue
+        new = row["segundos"]
+        if new > old * (1 + tolerance) and new - old > MIN_DELTA_SECONDS:
+            etapa, forma, n = _key(row)
+            out.append(f"{etapa} [{forma}, n={n}]: {old * 1000:.1f} ms -> {new * 1000:.1f} ms (+{new / old - 1:.0%})")
+    return out
+
+
+def _meta() -> dict:
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="plan_bench", description="Benchmarks del cronograma.")
+    parser.add_argument("--tamaños", nargs="+", type=int, default=list(SIZES), help="tareas por plan")
+    parser.add_argument("--formas", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--etapas", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--repeticiones", type=int, default=3, help="se informa el mejor tiempo")
+    parser.add_argument("--sin-memoria", action="store_true", help="no medir memoria pico (tracemalloc)")
+    parser.add_argument("-o", "--salida", type=Path, help="JSON de resultados; por defecto, stdout")
+    parser.add_argument("--comparar", type=Path, help="JSON de una corrida base")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="empeoramiento relativo aceptado (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    def log(row):
+        mem = f"{row['memoria_pico_kib']:>10.0f} KiB" if row["memoria_pico_kib"] is not None else ""
+        print(f"{row['forma']:>9} {row['n']:>7} {row['etapa']:<24}{row['segundos'] * 1000:>10.2f} ms{mem}", file=sys.stderr)
+
+    results = run_benchmarks(
+        args.tamaños, args.formas, args.etapas, max(1, args.repeticiones), not args.sin_memoria, log
+    )
+    report = {"meta": _meta(), "resultados": results}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.salida:
+        args.salida.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.comparar:
+        baseline = json.loads(args.comparar.read_text(encoding="utf-8"))["resultados"]
+        regressions = compare(results, baseline, args.tolerancia)
+        for msg in regressions:
+            print(f"REGRESIÓN {msg}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("Sin regresiones respecto a la base.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
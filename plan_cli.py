@@ -0,0 +1,123 @@
+"""
+Cronograma por línea de comandos, sin Streamlit ni pandas.
+
+    python plan_cli.py cronograma plan.csv -o cronograma.csv
+    python plan_cli.py cronograma cliente.xlsx -o cronograma.parquet --formato parquet
+    python plan_cli.py fechas portafolio/*.sqlite --formato json
+    python plan_cli.py mermaid plan.sqlite -o salida/
+
+Con varios planes, 'cronograma' y 'mermaid' escriben un archivo por plan en la carpeta -o;
+'fechas' junta todos los planes en una sola salida.
+"""
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+# formatos que se escriben con plan_io (cargan pandas): solo a archivo
+BINARY_FORMATS = ("parquet", "xlsx")
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="plan_cli",
+        description="Calcula el cronograma de uno o varios planes (.csv, .json, .sqlite, .parquet o .xlsx) sin abrir la app.",
+    )
+    sub = parser.add_subparsers(dest="comando", required=True)
+    helps = {
+        "cronograma": "tabla de tareas con Inicio, Fin, holgura y ruta crítica",
+        "fechas": "fechas clave: kickoff, salida, fin y cierre de cada gate",
+        "mermaid": "texto Mermaid del Gantt (formato de exportación de la app)",
+    }
+    for name, text in helps.items():
+        p = sub.add_parser(name, help=text, description=text)
+        p.add_argument("planes", nargs="+", type=Path, help="archivos de plan")
+        p.add_argument("-o", "--salida", type=Path, help="archivo (o carpeta, con varios planes); por defecto, stdout")
+        if name == "cronograma":
+            p.add_argument(
+                "--formato", choices=("csv", "json") + BINARY_FORMATS, default="csv",
+                help="parquet y xlsx se escriben por tramos y requieren -o",
+            )
+        elif name == "fechas":
+            p.add_argument("--formato", choices=("csv", "json"), default="csv")
+        p.add_argument("--kickoff", type=date.fromisoformat, help="YYYY-MM-DD; reemplaza el del archivo")
+        p.add_argument(
+            "--excluir-fines-de-semana", action=argparse.BooleanOptionalAction, default=None,
+            help="reemplaza la configuración del archivo",
+        )
+        p.add_argument(
+            "--excluir-feriados", action=argparse.BooleanOptionalAction, default=None,
+            help="feriados de Chile; reemplaza la configuración del archivo",
+        )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parser().parse_args(argv)
+    fmt = getattr(args, "formato", "mmd")
+    per_plan = args.comando != "fechas" and len(args.planes) > 1
+    if per_plan and args.salida is None:
+        print("Con varios planes, -o debe indicar una carpeta de salida.", file=sys.stderr)
+        return 2
+    binary = fmt in BINARY_FORMATS
+    if binary and args.salida is None:
+        print(f"--formato {fmt} requiere -o (archivo o carpeta de salida).", file=sys.stderr)
+        return 2
+
+    # el motor (numpy + calendario) se importa recién aquí: --help y errores de uso no lo cargan
+    from plan_engine import critical_dates, plan_mermaid, read_plan, schedule_plan, write_dates, write_schedule
+
+    if per_plan:
+        args.salida.mkdir(parents=True, exist_ok=True)
+    shared = None
+    if not per_plan:
+        if binary:
+            shared = open(args.salida, "wb")
+        else:
+            shared = open(args.salida, "w", encoding="utf-8", newline="") if args.salida else sys.stdout
+
+    failed = written = 0
+    try:
+        for path in args.planes:
+            try:
+                plan = read_plan(path, args.kickoff, args.excluir_fines_de_semana, args.excluir_feriados)
+            except ValueError as e:
+                msg = str(e)
+                print(msg if msg.startswith(str(path)) else f"{path}: {msg}", file=sys.stderr)
+                failed += 1
+                continue
+            except OSError as e:
+                print(f"{path}: {e.strerror}", file=sys.stderr)
+                failed += 1
+                continue
+            sched = schedule_plan(plan)
+            for problem in sched.graph.problems():
+                print(f"{path}: {problem}", file=sys.stderr)
+
+            if shared is not None:
+                out = shared
+            else:
+                target = args.salida / f"{path.stem}.{fmt}"
+                out = open(target, "wb") if binary else open(target, "w", encoding="utf-8", newline="")
+            try:
+                if binary:
+                    from plan_io import export_schedule, schedule_frame
+
+                    export_schedule(schedule_frame(sched), out, fmt)
+                elif args.comando == "cronograma":
+                    write_schedule(sched, out, fmt)
+                elif args.comando == "fechas":
+                    write_dates(critical_dates(sched), out, fmt, header=written == 0)
+                else:
+                    out.write(plan_mermaid(sched) + "\n")
+            finally:
+                if out is not shared:
+                    out.close()
+            written += 1
+    finally:
+        if shared is not None and shared is not sys.stdout:
+            shared.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import csv
+import json
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import TextIO
+
+import numpy as np
+
+from business_calendar import BusinessCalendar
+from scheduling import (
+    GO_LIVE_ID,
+    TaskGraph,
+    build_task_graph,
+    column_values,
+    effective_duration_list,
+    offsets_to_timestamps,
+    schedule_offsets,
+    total_float,
+)
+from state_store import REQUIRED_COLUMNS, TASK_COLUMNS, read_state_rows
+
+
+# Motor sin Streamlit ni pandas: lee un plan (CSV, JSON anterior o SQLite de la app),
+# calcula el cronograma con las mismas funciones que la app y lo escribe como CSV/JSON/Mermaid.
+# Pensado para procesos por lotes: importar este módulo solo carga numpy.
+
+SCHEDULE_COLUMNS = list(TASK_COLUMNS) + [
+    "Inicio",
+    "Fin",
+    "Duración efectiva (días hábiles)",
+    "Holgura (días hábiles)",
+    "Crítica",
+]
+
+_INT_COLUMNS = {"Duración (días hábiles)": 1, "Desviación (días hábiles)": 0, "Dedicación (%)": 100}
+
+
+# =========================
+# LECTURA DE PLANES
+# =========================
+@dataclass
+class Plan:
+    name: str
+    tasks: dict[str, list]     # columna -> valores (mismas columnas que la tabla de la app)
+    kickoff: date
+    excludes_weekends: bool = True
+    excludes_holidays: bool = False
+
+    def __len__(self) -> int:
+        return len(self.tasks["ID"])
+
+    @property
+    def calendar(self) -> BusinessCalendar:
+        return BusinessCalendar.preset(self.excludes_weekends, self.excludes_holidays)
+
+
+def _int(value, default: int) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return default
+
+
+def _columns_from_records(records: list[dict], source: Path) -> dict[str, list]:
+    found = set(records[0]) if records else set(REQUIRED_COLUMNS)
+    missing = REQUIRED_COLUMNS - found
+    if missing:
+        raise ValueError(f"{source}: faltan columnas {', '.join(sorted(missing))}.")
+    tasks = {}
+    for col in TASK_COLUMNS:
+        values = [r.get(col) for r in records]
+        if col in _INT_COLUMNS:
+            tasks[col] = [_int(v, _INT_COLUMNS[col]) for v in values]
+        else:
+            tasks[col] = ["" if v is None else str(v) for v in values]
+    return tasks
+
+
+def _flag(meta: dict, key: str, default: bool) -> bool:
+    value = meta.get(key)
+    if value is None:
+        return default
+    return value in (True, 1, "1", "true", "True")
+
+
+def read_plan(
+    path: Path,
+    kickoff: date | None = None,
+    excludes_weekends: bool | None = None,
+    excludes_holidays: bool | None = None,
+) -> Plan:
+    """
+    Lee un plan desde .csv (columnas de la tabla de tareas), .json (formato anterior de la app),
+    .sqlite/.db (estado de la app o de un proyecto del portafolio) o .parquet/.xlsx (plan_io,
+    con mapeo de columnas; carga pandas).
+    Kickoff y calendario salen del archivo si los trae; los argumentos los reemplazan.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    meta: dict = {}
+    if suffix == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            tasks = _columns_from_records(list(csv.DictReader(f)), path)
+    elif suffix == ".json":
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(raw, list):
+            raw = {"tasks": raw}
+        tasks = _columns_from_records(raw.get("tasks", []), path)
+        meta = raw
+    elif suffix in (".sqlite", ".db"):
+        state = read_state_rows(path)
+        if state is None:
+            raise ValueError(f"{path}: no es un plan guardado por la app.")
+        rows, meta = state
+        tasks = {col: [r[k] for r in rows] for k, col in enumerate(TASK_COLUMNS)}
+    elif suffix in (".parquet", ".xlsx"):
+        from plan_io import import_plan
+
+        result = import_plan(path)
+        if not result.ok:
+            raise ValueError(f"{path}: " + " ".join(result.errors))
+        tasks = {col: result.df[col].tolist() for col in TASK_COLUMNS}
+    else:
+        raise ValueError(f"{path}: formato no soportado (usa .csv, .json, .sqlite, .parquet o .xlsx).")
+
+    if kickoff is None:
+        kickoff = date.fromisoformat(meta.get("start_date") or date.today().isoformat())
+    return Plan(
+        name=meta.get("nombre") or path.stem,
+        tasks=tasks,
+        kickoff=kickoff,
+        excludes_weekends=_flag(meta, "excludes_weekends", True) if excludes_weekends is None else excludes_weekends,
+        excludes_holidays=_flag(meta, "excludes_holidays", False) if excludes_holidays is None else excludes_holidays,
+    )
+
+
+# =========================
+# CÁLCULO
+# =========================
+@dataclass
+class PlanSchedule:
+    plan: Plan
+    graph: TaskGraph
+    durations: list[int]
+    start: np.ndarray      # desplazamientos en días hábiles desde el kickoff (-1 = sin fechas)
+    end: np.ndarray
+    slack: np.ndarray      # holgura total (-1 = sin fechas)
+    inicio: np.ndarray     # datetime64[D], NaT = sin fechas
+    fin: np.ndarray
+
+    def columns(self) -> dict[str, list]:
+        """Cronograma como {columna: valores}: fechas ISO o None, holgura None si no hay fechas."""
+        return {
+            **self.plan.tasks,
+            "Inicio": _iso_days(self.inicio),
+            "Fin": _iso_days(self.fin),
+            "Duración efectiva (días hábiles)": self.durations,
+            "Holgura (días hábiles)": [int(s) if s >= 0 else None for s in self.slack],
+            "Crítica": (self.slack == 0).tolist(),
+        }
+
+
+def _iso_days(values: np.ndarray) -> list[str | None]:
+    return [None if d == "NaT" else d for d in np.datetime_as_string(values, unit="D")]
+
+
+def schedule_plan(plan: Plan) -> PlanSchedule:
+    """
+    Mismo cálculo que build_schedule (orden topológico, desfases, CPM) sobre las columnas del plan.
+    """
+    cal = plan.calendar
+    graph = build_task_graph(plan.tasks)
+    dur = effective_duration_list(plan.tasks)
+    start, end = schedule_offsets(graph, dur)
+    slack = total_float(graph, dur, end.tolist())
+    anchor = cal.roll(plan.kickoff)
+    return PlanSchedule(
+        plan=plan,
+        graph=graph,
+        durations=dur,
+        start=start,
+        end=end,
+        slack=slack,
+        inicio=offsets_to_timestamps(cal, anchor, start).astype("datetime64[D]"),
+        fin=offsets_to_timestamps(cal, anchor, end).astype("datetime64[D]"),
+    )
+
+
+def critical_dates(sched: PlanSchedule) -> dict:
+    """
+    Fechas clave del plan: fin del proyecto, salida (GO_LIVE_ID), cierre de cada gate,
+    ruta crítica en orden topológico y problemas del grafo.
+    """
+    fin = _iso_days(sched.fin)
+    ids = sched.graph.ids
+    fases = column_values(sched.plan.tasks, "Fase")
+    go_live = sched.graph.pos.get(GO_LIVE_ID)
+    scheduled = [d for d in fin if d is not None]
+    return {
+        "plan": sched.plan.name,
+        "kickoff": sched.plan.kickoff.isoformat(),
+        "fin": max(scheduled) if scheduled else None,
+        "salida": fin[go_live] if go_live is not None else None,
+        "gates": {tid: d for tid, f, d in zip(ids, fases, fin) if str(f) == "Gates" and d is not None},
+        "ruta_crítica": [ids[i] for i in sched.graph.order if sched.slack[i] == 0],
+        "problemas": sched.graph.problems(),
+    }
+
+
+def plan_mermaid(sched: PlanSchedule) -> str:
+    from mermaid_export import build_mermaid
+
+    starts = {"ID": sched.graph.ids, "Inicio": _iso_days(sched.inicio), "Crítica": (sched.slack == 0).tolist()}
+    return build_mermaid(sched.plan.tasks, sched.plan.kickoff.isoformat(), sched.plan.calendar, starts)
+
+
+# =========================
+# ESCRITURA
+# =========================
+def write_schedule(sched: PlanSchedule, out: TextIO, fmt: str = "csv"):
+    cols = sched.columns()
+    records = [dict(zip(SCHEDULE_COLUMNS, row)) for row in zip(*(cols[c] for c in SCHEDULE_COLUMNS))]
+    if fmt == "json":
+        json.dump(records, out, ensure_ascii=False, indent=2)
+        out.write("\n")
+        return
+    writer = csv.DictWriter(out, fieldnames=SCHEDULE_COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(records)
+
+
+DATES_CSV_COLUMNS = ["plan", "hito", "ID", "fecha"]
+
+
+def write_dates(dates: dict, out: TextIO, fmt: str = "csv", header: bool = True):
+    """
+    JSON: un objeto por línea (varios planes se concatenan). CSV: una fila por hito.
+    """
+    if fmt == "json":
+        out.write(json.dumps(dates, ensure_ascii=False) + "\n")
+        return
+    writer = csv.writer(out, lineterminator="\n")
+    if header:
+        writer.writerow(DATES_CSV_COLUMNS)
+    name = dates["plan"]
+    writer.writerow([name, "kickoff", "", dates["kickoff"]])
+    writer.writerow([name, "salida", GO_LIVE_ID, dates["salida"] or ""])
+    writer.writerow([name, "fin", "", dates["fin"] or ""])
+    for tid, d in dates["gates"].items():
+        writer.writerow([name, "gate", tid, d])
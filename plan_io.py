@@ -0,0 +1,444 @@
+import importlib
+import importlib.util
+import io
+import re
+import unicodedata
+import zipfile
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+import diagnostics
+from plan_engine import SCHEDULE_COLUMNS, PlanSchedule
+from resource_leveling import SHIFT_COLUMN
+from scheduling import build_task_graph
+from state_store import REQUIRED_COLUMNS
+from task_table import INT_COLUMNS, STATUS_OPTIONS, TEXT_COLUMNS, TaskTable
+
+
+# Importación/exportación masiva de planes en CSV, Parquet y Excel. Los archivos se leen por
+# tramos (nunca el archivo completo como texto en memoria) y cada tramo se pasa de inmediato
+# a columnas compactas; la validación corre sobre la tabla completa con operaciones por columna.
+# Parquet necesita pyarrow y Excel openpyxl: se importan solo al usar ese formato.
+
+FORMATS = ("csv", "parquet", "xlsx")
+MIME_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# filas por tramo al leer y al escribir
+CHUNK_ROWS = 50_000
+EXPORT_CHUNK_ROWS = 20_000
+
+# filas de ejemplo que se citan por cada problema
+MAX_EXAMPLES = 5
+
+# nombres de columna que se reconocen (normalizados: sin tildes, minúsculas, sin unidades)
+COLUMN_ALIASES = {
+    "Fase": ("fase", "phase", "etapa", "stage", "carril"),
+    "ID": ("id", "codigo", "code", "task_id", "id_tarea"),
+    "Tarea": ("tarea", "task", "nombre", "name", "descripcion", "description"),
+    "Depende_de": (
+        "depende_de", "depende", "dependencias", "dependencia", "predecesoras", "predecesora",
+        "depends_on", "dependencies", "predecessors",
+    ),
+    "Duración (días hábiles)": ("duracion", "duration", "dias", "days", "duracion_dias"),
+    "Estado": ("estado", "status", "state"),
+    "Desviación (días hábiles)": ("desviacion", "deviation", "desvio", "atraso", "delay"),
+    "Responsable": ("responsable", "responsables", "owner", "assignee", "asignado", "recurso", "resource"),
+    "Dedicación (%)": ("dedicacion", "allocation", "asignacion", "carga"),
+}
+
+_DEP_SEP = r"[,;\s]+"
+_LAG = r"^(.+?)[+-]\d+$"
+
+
+def _normalize(name) -> str:
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = re.sub(r"\(.*?\)", "", text)          # unidades: "(días hábiles)", "(%)"
+    return re.sub(r"[^a-z0-9]+", "_", text).strip("_")
+
+
+_ALIAS_INDEX = {alias: col for col, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+
+def detect_mapping(headers: list[str]) -> dict[str, str]:
+    """{columna de la tabla: encabezado del archivo} para los encabezados que se reconocen."""
+    mapping: dict[str, str] = {}
+    for h in headers:
+        col = _ALIAS_INDEX.get(_normalize(h))
+        if col is not None and col not in mapping:
+            mapping[col] = h
+    return mapping
+
+
+def detect_format(name: str) -> str:
+    suffix = Path(str(name)).suffix.lower()
+    if suffix in (".csv", ".txt"):
+        return "csv"
+    if suffix in (".parquet", ".pq"):
+        return "parquet"
+    if suffix == ".xlsx":
+        return "xlsx"
+    raise ValueError(f"{name}: formato no soportado (usa .csv, .parquet o .xlsx).")
+
+
+def available_formats() -> list[str]:
+    """Formatos cuyo paquete opcional está instalado (CSV siempre)."""
+    needs = {"parquet": "pyarrow", "xlsx": "openpyxl"}
+    return [f for f in FORMATS if f not in needs or importlib.util.find_spec(needs[f]) is not None]
+
+
+def _require(module: str, fmt: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ValueError(f"Para leer o escribir {fmt.upper()} falta el paquete '{module}' (pip install {module}).") from None
+
+
+# =========================
+# LECTURA POR TRAMOS
+# =========================
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def _csv_separator(source) -> str:
+    # planillas exportadas con configuración regional en español suelen usar ';'
+    if hasattr(source, "read"):
+        first = source.readline()
+        _rewind(source)
+        if isinstance(first, bytes):
+            first = first.decode("utf-8-sig", errors="replace")
+    else:
+        with open(source, encoding="utf-8-sig", errors="replace") as f:
+            first = f.readline()
+    return ";" if first.count(";") > first.count(",") else ","
+
+
+def _xlsx_rows(source):
+    openpyxl = _require("openpyxl", "xlsx")
+    try:
+        wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, OSError) as e:
+        raise ValueError(f"No se pudo leer el Excel: {e}") from None
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def read_headers(source, fmt: str) -> list[str]:
+    """Encabezados del archivo (para proponer y ajustar el mapeo de columnas)."""
+    _rewind(source)
+    if fmt == "csv":
+        headers = list(pd.read_csv(source, nrows=0, sep=_csv_separator(source), encoding="utf-8-sig").columns)
+    elif fmt == "parquet":
+        pq = _require("pyarrow.parquet", "parquet")
+        headers = list(pq.ParquetFile(source).schema_arrow.names)
+    elif fmt == "xlsx":
+        first = next(_xlsx_rows(source), ())
+        headers = ["" if h is None else str(h) for h in first]
+    else:
+        raise ValueError(f"Formato no soportado: {fmt}.")
+    _rewind(source)
+    return headers
+
+
+def iter_chunks(source, fmt: str, columns: list[str], chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Tramos de hasta `chunk_rows` filas con solo las `columns` pedidas (encabezados del archivo)."""
+    _rewind(source)
+    if fmt == "csv":
+        # todo como texto: la conversión (y sus avisos) es la misma para los tres formatos
+        yield from pd.read_csv(
+            source,
+            sep=_csv_separator(source),
+            usecols=columns,
+            dtype=str,
+            keep_default_na=False,
+            encoding="utf-8-sig",
+            chunksize=chunk_rows,
+        )
+    elif fmt == "parquet":
+        pq = _require("pyarrow.parquet", "parquet")
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    elif fmt == "xlsx":
+        rows = _xlsx_rows(source)
+        headers = ["" if h is None else str(h) for h in next(rows, ())]
+        keep = [headers.index(c) for c in columns]
+        buf = []
+        for row in rows:
+            if row is None or all(v is None for v in row):
+                continue  # filas vacías al final de la hoja
+            buf.append([row[k] if k < len(row) else None for k in keep])
+            if len(buf) == chunk_rows:
+                yield pd.DataFrame(buf, columns=columns, dtype=object)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=columns, dtype=object)
+    else:
+        raise ValueError(f"Formato no soportado: {fmt}.")
+
+
+# =========================
+# NORMALIZACIÓN Y VALIDACIÓN (por columna)
+# =========================
+@dataclass
+class _Issues:
+    """Problemas por tipo: cuántas filas y las primeras filas de ejemplo (numeración de la planilla)."""
+    counts: dict[str, int] = field(default_factory=dict)
+    examples: dict[str, list[str]] = field(default_factory=dict)
+
+    def add(self, kind: str, mask: np.ndarray, first_row: int, values: pd.Series | None = None):
+        hits = np.flatnonzero(mask)
+        if not len(hits):
+            return
+        self.counts[kind] = self.counts.get(kind, 0) + len(hits)
+        seen = self.examples.setdefault(kind, [])
+        for k in hits[:MAX_EXAMPLES - len(seen)].tolist():
+            # fila 1 = encabezado
+            seen.append(f"fila {first_row + k + 2}" + (f" ('{values.iat[k]}')" if values is not None else ""))
+
+    def messages(self) -> list[str]:
+        return [f"{kind}: {n} fila{'s' if n > 1 else ''} (p. ej. {', '.join(self.examples[kind])})." for kind, n in self.counts.items()]
+
+
+def _as_text(values: pd.Series) -> pd.Series:
+    values = values.astype(object).where(values.notna(), "")
+    return values.astype(str).str.strip()
+
+
+def _normalize_chunk(chunk: pd.DataFrame, mapping: dict[str, str], first_row: int, errors: _Issues, warnings: _Issues):
+    """Un tramo del archivo -> columnas compactas (Categorical / int) con las reglas de la tabla."""
+    n = len(chunk)
+    text, ints = {}, {}
+    for col in TEXT_COLUMNS:
+        values = _as_text(chunk[mapping[col]]) if col in mapping else pd.Series([""] * n, dtype=object)
+        if col == "Estado":
+            # vacío -> Pendiente; mayúsculas/minúsculas se corrigen; cualquier otro valor es error
+            raw, empty = values, (values == "").to_numpy()
+            by_lower = {s.lower(): s for s in STATUS_OPTIONS}
+            values = values.where(values.isin(STATUS_OPTIONS), values.str.lower().map(by_lower))
+            bad = values.isna().to_numpy() & ~empty
+            errors.add(f"Estado no válido (usa {', '.join(STATUS_OPTIONS)})", bad, first_row, raw)
+            values = values.fillna("Pendiente")
+        text[col] = pd.Categorical(values)
+    for col, default in INT_COLUMNS.items():
+        if col not in mapping:
+            ints[col] = np.full(n, default, dtype=np.int64)
+            continue
+        raw = chunk[mapping[col]]
+        numbers = pd.to_numeric(raw, errors="coerce")
+        empty = _as_text(raw).eq("").to_numpy()
+        bad = numbers.isna().to_numpy() & ~empty
+        warnings.add(f"{col}: no es un número, se usó {default}", bad, first_row, _as_text(raw))
+        values = np.trunc(numbers.fillna(default).to_numpy(dtype=np.float64)).astype(np.int64)
+        if col == "Duración (días hábiles)":
+            warnings.add(f"{col} menor que 1 (se programa con 1)", values < 1, first_row)
+        ints[col] = values
+    return text, ints
+
+
+def _dependency_issues(ids: pd.Series, deps: pd.Series) -> tuple[int, list[str]]:
+    """(dependencias a IDs inexistentes, ejemplos 'tarea → dependencia'), sin recorrer filas en Python."""
+    tokens = deps.str.split(_DEP_SEP, regex=True).explode()
+    tokens = tokens[tokens.notna() & (tokens != "")].astype(object)
+    # búsqueda por hash en un Index de objetos (isin sobre texto arrow recorre los valores en Python)
+    known = pd.Index(pd.unique(ids.to_numpy(dtype=object)))
+    missing = known.get_indexer(tokens.to_numpy()) < 0
+    if missing.any():
+        # "b3+1" -> "b3" (solo si "b3+1" no es un ID tal cual)
+        rest = tokens[missing]
+        base = rest.str.extract(_LAG, expand=False).fillna(rest)
+        missing[missing] = known.get_indexer(base.to_numpy(dtype=object)) < 0
+    owners = ids.to_numpy(dtype=object)[tokens.index.to_numpy()[missing]]
+    examples = [f"{o} → {t}" for o, t in zip(owners[:MAX_EXAMPLES], tokens.to_numpy()[missing][:MAX_EXAMPLES])]
+    return int(missing.sum()), examples
+
+
+def validate_tasks(df: pd.DataFrame) -> tuple[list[str], list[str]]:
+    """
+    (errores, avisos) de una tabla de tareas completa. Errores: IDs vacíos o duplicados.
+    Avisos: dependencias inexistentes y ciclos (la app los tolera: esas tareas quedan sin fechas).
+    """
+    errors, warnings = [], []
+    ids = df["ID"].astype(str).str.strip().reset_index(drop=True)
+    empty = ids == ""
+    if empty.any():
+        rows = ", ".join(str(k + 2) for k in np.flatnonzero(empty.to_numpy())[:MAX_EXAMPLES])
+        errors.append(f"ID vacío: {int(empty.sum())} filas (p. ej. filas {rows}).")
+    dup = ids[ids.duplicated(keep=False) & ~empty]
+    if len(dup):
+        names = ", ".join(dup.unique()[:MAX_EXAMPLES])
+        errors.append(f"IDs duplicados: {dup.nunique()} IDs en {len(dup)} filas (p. ej. {names}).")
+
+    n_missing, examples = _dependency_issues(ids, df["Depende_de"].astype(str).str.strip().reset_index(drop=True))
+    if n_missing:
+        warnings.append(f"Dependencias a tareas que no existen: {n_missing} (p. ej. {', '.join(examples)}).")
+    if not errors:
+        # ciclos: Kahn lineal del grafo (el mismo de la app); una pasada vectorizada por nivel
+        # sería O(profundidad x tareas) en planes encadenados
+        graph = build_task_graph(df)
+        if graph.cyclic:
+            cyc = graph.cyclic
+            warnings.append(
+                f"Dependencias circulares entre {len(cyc)} tareas (p. ej. {', '.join(cyc[:MAX_EXAMPLES])}); quedan sin fechas."
+            )
+    return errors, warnings
+
+
+@dataclass
+class ImportResult:
+    df: pd.DataFrame                    # tabla compacta, con las columnas de la app
+    mapping: dict[str, str]             # columna de la tabla -> encabezado del archivo
+    errors: list[str]
+    warnings: list[str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+@diagnostics.traced("importar plan")
+def import_plan(source, fmt: str | None = None, mapping: dict[str, str] | None = None, chunk_rows: int = CHUNK_ROWS) -> ImportResult:
+    """
+    Lee un plan por tramos y lo deja como la tabla de la app (TaskTable.to_frame()).
+    `source`: ruta o archivo abierto (p. ej. el de st.file_uploader); `mapping`, el de
+    detect_mapping() si no se entrega. Falta de columnas obligatorias o archivo ilegible:
+    ValueError. Problemas en los datos: errors/warnings del resultado.
+    """
+    name = getattr(source, "name", source)
+    fmt = fmt or detect_format(name)
+    if mapping is None:
+        mapping = detect_mapping(read_headers(source, fmt))
+    missing = REQUIRED_COLUMNS - set(mapping)
+    if missing:
+        raise ValueError(f"{name}: faltan columnas {', '.join(sorted(missing))}.")
+
+    errors, warnings = _Issues(), _Issues()
+    text_parts: dict[str, list[pd.Categorical]] = {c: [] for c in TEXT_COLUMNS}
+    int_parts: dict[str, list[np.ndarray]] = {c: [] for c in INT_COLUMNS}
+    rows = 0
+    try:
+        for chunk in iter_chunks(source, fmt, list(dict.fromkeys(mapping.values())), chunk_rows):
+            text, ints = _normalize_chunk(chunk, mapping, rows, errors, warnings)
+            for c in TEXT_COLUMNS:
+                text_parts[c].append(text[c])
+            for c in INT_COLUMNS:
+                int_parts[c].append(ints[c])
+            rows += len(chunk)
+            diagnostics.count("filas importadas", len(chunk))
+    except (pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise ValueError(f"{name}: no se pudo leer el archivo ({e}).") from None
+
+    columns = {}
+    for c in TEXT_COLUMNS:
+        parts = text_parts[c]
+        columns[c] = union_categoricals(parts) if parts else pd.Categorical([])
+    for c in INT_COLUMNS:
+        columns[c] = np.concatenate(int_parts[c]) if int_parts[c] else np.empty(0, dtype=np.int64)
+    df = TaskTable.from_frame(pd.DataFrame(columns)).to_frame()
+
+    data_errors, data_warnings = validate_tasks(df) if rows else (["El archivo no tiene tareas."], [])
+    return ImportResult(
+        df=df,
+        mapping=mapping,
+        errors=errors.messages() + data_errors,
+        warnings=warnings.messages() + data_warnings,
+    )
+
+
+# =========================
+# EXPORTACIÓN POR TRAMOS
+# =========================
+def export_columns(schedule_df: pd.DataFrame) -> list[str]:
+    return [c for c in SCHEDULE_COLUMNS + [SHIFT_COLUMN] if c in schedule_df.columns]
+
+
+def schedule_frame(sched: PlanSchedule) -> pd.DataFrame:
+    """Cronograma de la CLI (plan_engine) con los tipos del de la app, para exportarlo."""
+    df = pd.DataFrame(sched.plan.tasks)
+    df["Inicio"] = sched.inicio.astype("datetime64[ns]")
+    df["Fin"] = sched.fin.astype("datetime64[ns]")
+    df["Duración efectiva (días hábiles)"] = sched.durations
+    df["Holgura (días hábiles)"] = pd.Series(sched.slack).where(sched.slack >= 0).astype("Int64")
+    df["Crítica"] = sched.slack == 0
+    return df
+
+
+def _arrow_schema(pa, columns: list[str]):
+    types = {"Inicio": pa.date32(), "Fin": pa.date32(), "Crítica": pa.bool_()}
+    fields = []
+    for c in columns:
+        if c in types:
+            fields.append((c, types[c]))
+        elif c in TEXT_COLUMNS:
+            fields.append((c, pa.string()))
+        else:
+            fields.append((c, pa.int64()))
+    return pa.schema(fields)
+
+
+def _plain(part: pd.DataFrame) -> pd.DataFrame:
+    # categóricas -> texto y fechas -> date (sin hora), tramo por tramo
+    out = {}
+    for c in part.columns:
+        s = part[c]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            out[c] = s.astype(str)
+        elif s.dtype.kind == "M":
+            out[c] = s.dt.date
+    return part.assign(**out) if out else part
+
+
+@diagnostics.traced("exportar cronograma")
+def export_schedule(schedule_df: pd.DataFrame, out: BinaryIO, fmt: str, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """
+    Escribe el cronograma (salida de build_schedule) en `out` (archivo binario) por tramos de
+    filas: la memoria extra es la de un tramo, no la del archivo completo.
+    """
+    columns = export_columns(schedule_df)
+    n = len(schedule_df)
+    parts = (schedule_df.iloc[a:a + chunk_rows][columns] for a in range(0, max(n, 1), chunk_rows))
+    if fmt == "csv":
+        text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+        for k, part in enumerate(parts):
+            _plain(part).to_csv(text, header=k == 0, index=False, lineterminator="\n")
+        text.flush()
+        text.detach()  # `out` sigue abierto para quien lo entregó
+    elif fmt == "parquet":
+        pa = _require("pyarrow", "parquet")
+        pq = _require("pyarrow.parquet", "parquet")
+        schema = _arrow_schema(pa, columns)
+        with pq.ParquetWriter(out, schema) as writer:
+            for part in parts:
+                writer.write_table(pa.Table.from_pandas(_plain(part), schema=schema, preserve_index=False))
+    elif fmt == "xlsx":
+        openpyxl = _require("openpyxl", "xlsx")
+        wb = openpyxl.Workbook(write_only=True)   # escribe las filas a disco a medida que llegan
+        ws = wb.create_sheet("Cronograma")
+        ws.append(columns)
+        for part in parts:
+            for row in _plain(part).astype(object).itertuples(index=False, name=None):
+                ws.append([None if v is None or v is pd.NA or v is pd.NaT or v != v else v for v in row])
+        wb.save(out)
+    else:
+        raise ValueError(f"Formato no soportado: {fmt}.")
+    diagnostics.count("filas exportadas", n)
+
+
+def schedule_file(schedule_df: pd.DataFrame, fmt: str) -> bytes:
+    """El archivo exportado como bytes (botón de descarga de la app)."""
+    buf = io.BytesIO()
+    export_schedule(schedule_df, buf, fmt)
+    return buf.getvalue()
@@ -0,0 +1,301 @@
+import os
+import re
+import shutil
+import threading
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from business_calendar import BusinessCalendar
+from event_log import EventLog
+from forecast import GO_LIVE_ID
+from plan_templates import TEMPLATES, template_df
+from schedule_cache import PORTFOLIO, frame_fingerprint
+from scheduling import build_schedule, build_task_graph
+from state_store import SaveResult, SqliteStateStore
+
+
+PORTFOLIO_DIR = Path("portafolio")
+
+# con menos proyectos por recalcular no compensa repartir en procesos
+POOL_MIN_MISSES = 4
+
+
+# =========================
+# PROYECTOS (un SQLite por proyecto)
+# =========================
+_STORES: dict[Path, SqliteStateStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def open_store(path: Path) -> SqliteStateStore:
+    """
+    Un SqliteStateStore por archivo y por proceso: la app y la página del portafolio
+    comparten la misma instancia (y su última versión conocida de las filas).
+    """
+    path = Path(path).resolve()
+    with _STORES_LOCK:
+        if path not in _STORES:
+            _STORES[path] = SqliteStateStore(path, event_log=EventLog.beside(path))
+        return _STORES[path]
+
+
+def slugify(name: str) -> str:
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+@dataclass
+class ProjectInputs:
+    slug: str
+    name: str
+    template: str
+    tasks: pd.DataFrame
+    kickoff: date
+    excludes_weekends: bool
+    excludes_holidays: bool
+    digest: str = ""   # hash de las filas según el store; vacío = hashear la tabla
+
+    @property
+    def key(self) -> tuple:
+        # clave del caché por proyecto: cambia solo si cambian sus entradas
+        return (
+            self.slug,
+            self.digest or frame_fingerprint(self.tasks),
+            self.kickoff.isoformat(),
+            self.excludes_weekends,
+            self.excludes_holidays,
+        )
+
+
+class Portfolio:
+    """
+    Carpeta con un plan por proyecto (<slug>.sqlite, mismo formato que el plan principal).
+    Nombre y plantilla van en la tabla meta de cada proyecto.
+    """
+
+    def __init__(self, root: Path = PORTFOLIO_DIR):
+        self.root = Path(root)
+        # entradas ya leídas por proyecto: (versión del plan, archivo) -> ProjectInputs
+        self._inputs: dict[str, tuple[tuple, ProjectInputs]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, slug: str) -> Path:
+        return self.root / f"{slug}.sqlite"
+
+    def slugs(self) -> list[str]:
+        return sorted(p.stem for p in self.root.glob("*.sqlite"))
+
+    def exists(self, slug: str) -> bool:
+        return bool(slug) and self.path(slug).exists()
+
+    def store(self, slug: str) -> SqliteStateStore:
+        if not self.exists(slug):
+            raise KeyError(f"No existe el proyecto '{slug}'.")
+        return open_store(self.path(slug))
+
+    def create(
+        self,
+        name: str,
+        template: str,
+        kickoff: date,
+        excludes_weekends: bool = True,
+        excludes_holidays: bool = False,
+    ) -> str:
+        slug = slugify(name)
+        if not slug:
+            raise ValueError("El nombre del proyecto no puede quedar vacío.")
+        if self.exists(slug):
+            raise ValueError(f"Ya existe un proyecto '{slug}'.")
+        if template not in TEMPLATES:
+            raise ValueError(f"Plantilla desconocida: {template}.")
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        store = open_store(self.path(slug))
+        store.save(template_df(TEMPLATES[template]), kickoff, excludes_weekends, excludes_holidays)
+        store.set_meta("nombre", name.strip())
+        store.set_meta("plantilla", template)
+        return slug
+
+    def delete(self, slug: str):
+        path = self.path(slug)
+        with _STORES_LOCK:
+            _STORES.pop(path.resolve(), None)
+        with self._lock:
+            self._inputs.pop(slug, None)
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+        log = EventLog.beside(path)
+        log.events_path.unlink(missing_ok=True)
+        shutil.rmtree(log.snapshot_dir, ignore_errors=True)
+
+    def update_settings(self, slug: str, kickoff: date, excludes_weekends: bool, excludes_holidays: bool) -> SaveResult:
+        # contra lo recién leído: las filas no se tocan (ni se pisan cambios de otra sesión)
+        # y la configuración pasa por el mismo control de versión que un guardado normal
+        store = self.store(slug)
+        snap = store.load_snapshot()
+        return store.save(snap.df, kickoff, excludes_weekends, excludes_holidays, base=snap)
+
+    def load(self, slug: str) -> ProjectInputs | None:
+        """
+        Entradas del proyecto. Primero se lee solo la meta (una consulta chica): si la versión
+        del plan no cambió desde la última lectura, se reutilizan las filas ya leídas y solo se
+        actualizan nombre y plantilla (que no suben la versión).
+        """
+        store = self.store(slug)
+        meta = store.meta()
+        stamp = (meta.get("version"), self.path(slug).stat().st_ino)
+        with self._lock:
+            cached = self._inputs.get(slug)
+        if cached is not None and cached[0] == stamp:
+            return replace(cached[1], name=meta.get("nombre", slug), template=meta.get("plantilla", "—"))
+
+        snap = store.load_snapshot()
+        if snap is None:
+            return None
+        inputs = ProjectInputs(
+            slug=slug,
+            name=snap.meta.get("nombre", slug),
+            template=snap.meta.get("plantilla", "—"),
+            tasks=snap.df,
+            kickoff=snap.start_date,
+            excludes_weekends=snap.excludes_weekends,
+            excludes_holidays=snap.excludes_holidays,
+            digest=snap.table.fingerprint(),
+        )
+        with self._lock:
+            # la versión de lo leído (puede ser más nueva que la de la meta de arriba)
+            self._inputs[slug] = ((snap.meta.get("version"), stamp[1]), inputs)
+        return inputs
+
+    def load_all(self) -> list[ProjectInputs]:
+        return [p for p in map(self.load, self.slugs()) if p is not None]
+
+
+# =========================
+# RESUMEN POR PROYECTO (corre en procesos)
+# =========================
+def weekly_load(schedule_df: pd.DataFrame) -> pd.Series:
+    """
+    Tareas activas por (semana, Fase): cada tarea cuenta en todas las semanas (lunes)
+    que toca entre su Inicio y su Fin. Vectorizado con np.repeat.
+    """
+    sched = schedule_df.dropna(subset=["Inicio", "Fin"])
+    if sched.empty:
+        return pd.Series(dtype="int64")
+    # datetime64[W] cuenta semanas desde 1970-01-01 (jueves): correr 3 días para que partan en lunes
+    shift = np.timedelta64(3, "D")
+    ini = (sched["Inicio"].to_numpy(dtype="datetime64[D]") + shift).astype("datetime64[W]")
+    fin = (sched["Fin"].to_numpy(dtype="datetime64[D]") + shift).astype("datetime64[W]")
+    n_weeks = (fin - ini).astype(np.int64) + 1
+
+    starts = np.repeat(ini, n_weeks)
+    step = np.arange(n_weeks.sum()) - np.repeat(np.cumsum(n_weeks) - n_weeks, n_weeks)
+    weeks = (starts + step).astype("datetime64[D]") - shift
+    fases = np.repeat(sched["Fase"].astype(str).to_numpy(), n_weeks)
+    return pd.Series(1, index=pd.MultiIndex.from_arrays([weeks, fases], names=["Semana", "Fase"])).groupby(
+        level=[0, 1]
+    ).sum()
+
+
+def project_summary(tasks: pd.DataFrame, kickoff: date, excludes_weekends: bool, excludes_holidays: bool) -> dict:
+    """
+    Cronograma de un proyecto reducido a lo que muestra el portafolio (hitos, conteos, carga).
+    Devuelve solo datos chicos: es lo que viaja de vuelta desde el proceso trabajador.
+    """
+    calendar = BusinessCalendar.preset(excludes_weekends, excludes_holidays)
+    graph = build_task_graph(tasks)
+    sched = build_schedule(tasks, kickoff, calendar, graph=graph)
+
+    fin = sched["Fin"]
+    ids = sched["ID"].astype(str).str.strip()
+    go_live = fin[ids == GO_LIVE_ID].dropna()
+    gates = sched["Fase"].astype(str) == "Gates"
+    estados = sched["Estado"].astype(str)
+    return {
+        "salida": go_live.iloc[-1].date() if len(go_live) else None,
+        "fin": fin.max().date() if fin.notna().any() else None,
+        "gates": {tid: d.date() for tid, d in zip(ids[gates], fin[gates]) if not pd.isna(d)},
+        "tareas": len(sched),
+        "finalizadas": int((estados == "Finalizado").sum()),
+        "atrasadas": int((estados == "Atrasado").sum()),
+        "críticas": int(sched["Crítica"].sum()),
+        "problemas": len(graph.problems()),
+        "carga": weekly_load(sched),
+    }
+
+
+_POOL: ProcessPoolExecutor | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def _executor() -> ProcessPoolExecutor:
+    # pool persistente: levantar procesos (e importar pandas) en cada rerun costaría más que calcular
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+        return _POOL
+
+
+@dataclass
+class PortfolioReport:
+    projects: pd.DataFrame   # una fila por proyecto
+    gates: pd.DataFrame      # proyecto x gate -> fecha de cierre
+    load: pd.DataFrame       # semana x Fase -> tareas activas (todos los proyectos)
+    recomputed: int          # proyectos recalculados en esta llamada (el resto vino del caché)
+
+
+def summarize_portfolio(projects: list[ProjectInputs]) -> PortfolioReport:
+    """
+    Resume todos los proyectos. Los que no cambiaron salen del caché por proyecto;
+    los demás se calculan en un pool de procesos (o en línea si son pocos).
+    """
+    summaries = [PORTFOLIO.get(p.key) for p in projects]
+    misses = [i for i, s in enumerate(summaries) if s is None]
+
+    args = [
+        (projects[i].tasks, projects[i].kickoff, projects[i].excludes_weekends, projects[i].excludes_holidays)
+        for i in misses
+    ]
+    if len(misses) >= POOL_MIN_MISSES:
+        results = _executor().map(project_summary, *zip(*args))
+    else:
+        results = (project_summary(*a) for a in args)
+    for i, summary in zip(misses, results):
+        PORTFOLIO.put(projects[i].key, summary)
+        summaries[i] = summary
+
+    rows = []
+    for p, s in zip(projects, summaries):
+        rows.append({
+            "Proyecto": p.name,
+            "slug": p.slug,
+            "Plantilla": p.template,
+            "Kickoff": p.kickoff,
+            "Excluir fines de semana": p.excludes_weekends,
+            "Excluir feriados": p.excludes_holidays,
+            "Salida": s["salida"],
+            "Fin": s["fin"],
+            "Tareas": s["tareas"],
+            "Finalizadas": s["finalizadas"],
+            "Atrasadas": s["atrasadas"],
+            "Problemas": s["problemas"],
+        })
+    projects_df = pd.DataFrame(rows)
+
+    gates_df = pd.DataFrame([s["gates"] for s in summaries], index=[p.name for p in projects])
+    gates_df.index.name = "Proyecto"
+
+    loads = [s["carga"] for s in summaries if len(s["carga"])]
+    if loads:
+        load_df = pd.concat(loads).groupby(level=[0, 1]).sum().unstack("Fase", fill_value=0).sort_index()
+    else:
+        load_df = pd.DataFrame()
+
+    return PortfolioReport(projects_df, gates_df, load_df, recomputed=len(misses))
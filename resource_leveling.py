@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import heapq
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from business_calendar import BusinessCalendar
+from scheduling import (
+    TaskGraph,
+    as_calendar,
+    attach_dates,
+    build_task_graph,
+    column_values,
+    effective_duration_list,
+    offsets_to_timestamps,
+    schedule_offsets,
+    total_float,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# como scheduling: pandas solo en build_leveled_schedule, el núcleo trabaja con listas y numpy
+
+RESOURCE_COLUMN = "Responsable"
+ALLOCATION_COLUMN = "Dedicación (%)"
+SHIFT_COLUMN = "Corrimiento por recursos (días hábiles)"
+
+# capacidad diaria de un recurso sin configurar: una persona a tiempo completo
+DEFAULT_CAPACITY = 100
+
+# días que se revisan de una vez al buscar un hueco (búsqueda vectorizada por tramos)
+_SCAN_DAYS = 128
+
+_SEP = re.compile(r"\s*[,;]\s*")
+
+
+def split_assignees(value) -> list[str]:
+    """'Ana, Beto' -> ['Ana', 'Beto']. Cada responsable aporta la dedicación completa de la fila."""
+    if value is None or (isinstance(value, float) and value != value):
+        return []
+    return [a for a in dict.fromkeys(_SEP.split(str(value).strip())) if a]
+
+
+# =========================
+# CARGA POR RECURSO
+# =========================
+class _Profile:
+    """
+    Carga diaria (% de una persona) de un recurso en un arreglo denso que cubre solo los días
+    que el recurso usa (crece hacia ambos lados): la memoria es proporcional al tramo ocupado
+    de cada persona, no a personas x horizonte del portafolio.
+    """
+    __slots__ = ("origin", "load", "hints")
+
+    def __init__(self):
+        self.origin = 0
+        self.load = np.zeros(0, dtype=np.int32)
+        # libre pedido -> día antes del cual ningún día tiene ese libre. La carga solo sube,
+        # así que la marca nunca retrocede: una persona copada no se vuelve a recorrer desde 0
+        self.hints: dict[int, int] = {}
+
+    def segment(self, t: int, length: int) -> np.ndarray:
+        """Carga de los días [t, t + length) (0 fuera de lo reservado)."""
+        lo, hi = t - self.origin, t - self.origin + length
+        if lo >= 0 and hi <= len(self.load):
+            return self.load[lo:hi]
+        out = np.zeros(length, dtype=np.int32)
+        a, b = max(lo, 0), min(hi, len(self.load))
+        if a < b:
+            out[a - lo:b - lo] = self.load[a:b]
+        return out
+
+    def book(self, t: int, d: int, alloc: int):
+        if not len(self.load):
+            self.origin, self.load = t, np.zeros(max(2 * d, 64), dtype=np.int32)
+        lo, hi = t - self.origin, t - self.origin + d
+        if lo < 0 or hi > len(self.load):
+            # crece al doble (amortizado) del lado que falta
+            grow_left = max(-lo, 0) and max(-lo, len(self.load))
+            grow_right = max(hi - len(self.load), 0) and max(hi - len(self.load), len(self.load))
+            self.load = np.concatenate(
+                [np.zeros(grow_left, dtype=np.int32), self.load, np.zeros(grow_right, dtype=np.int32)]
+            )
+            self.origin -= grow_left
+            lo += grow_left
+            hi += grow_left
+        self.load[lo:hi] += alloc
+
+
+def _fits_from(profile: _Profile, t: int, d: int, alloc: int, capacity: int) -> int:
+    """Primer día >= t desde el que el recurso tiene `alloc` libre durante d días seguidos."""
+    free = capacity - alloc
+    hint = profile.hints.get(free, 0)
+    t = max(t, hint)
+    if profile.segment(t, d).max() <= free:
+        return t  # caso común: cabe donde pide
+    while True:
+        bad = profile.segment(t, d + _SCAN_DAYS) > free
+        if t == hint:
+            # el tramo parte en la marca: avanzarla hasta el primer día con ese libre
+            first = int(np.argmin(bad)) if not bad.all() else len(bad)
+            hint = profile.hints[free] = t + first
+        # ventanas de d días sin ningún día excedido, buscadas en todo el tramo a la vez
+        run = np.concatenate(([0], np.cumsum(bad)))
+        ok = run[d:] == run[:-d]
+        k = int(ok.argmax())
+        if ok[k]:
+            return t + k
+        t = max(t + _SCAN_DAYS + 1, hint)
+
+
+@dataclass
+class Leveling:
+    """
+    Cronograma nivelado por recursos (desplazamientos en días hábiles desde el kickoff, -1 = sin
+    fechas) y la carga diaria de cada recurso.
+    """
+    start: np.ndarray
+    end: np.ndarray
+    shift: np.ndarray                   # días que la capacidad corrió el inicio de cada tarea
+    resources: list[str]
+    capacity: np.ndarray                # % diario por recurso
+    origins: np.ndarray                 # primer día del arreglo de carga de cada recurso
+    loads: list[np.ndarray]             # carga diaria (%) de cada recurso desde su origen
+    tasks_per_resource: np.ndarray
+    over_allocated: list[str] = field(default_factory=list)   # dedicación > capacidad del recurso
+
+    @property
+    def horizon(self) -> int:
+        scheduled = self.end[self.end >= 0]
+        return int(scheduled.max()) + 1 if len(scheduled) else 0
+
+    def load_matrix(self, horizon: int | None = None, rows: list[int] | None = None) -> np.ndarray:
+        """Carga diaria (%) como matriz recursos x días [0, horizon); `rows` elige recursos."""
+        horizon = self.horizon if horizon is None else horizon
+        rows = list(range(len(self.resources))) if rows is None else rows
+        out = np.zeros((len(rows), horizon), dtype=np.int32)
+        for k, r in enumerate(rows):
+            o, load = int(self.origins[r]), self.loads[r]
+            a, b = max(o, 0), min(o + len(load), horizon)
+            if a < b:
+                out[k, a:b] = load[a - o:b - o]
+        return out
+
+    def utilization(self, horizon: int | None = None, rows: list[int] | None = None) -> np.ndarray:
+        """Carga / capacidad por recurso y día (1.0 = recurso completo)."""
+        rows = list(range(len(self.resources))) if rows is None else rows
+        return self.load_matrix(horizon, rows) / self.capacity[rows, None].astype(np.float64)
+
+    def summary(self) -> list[dict]:
+        """Una fila por recurso: tareas, persona-días, uso medio en su tramo activo y pico."""
+        rows = []
+        for r, name in enumerate(self.resources):
+            load = self.loads[r]
+            busy = np.flatnonzero(load)
+            span = load[busy[0]:busy[-1] + 1] if len(busy) else load[:0]
+            cap = float(self.capacity[r])
+            rows.append({
+                "Recurso": name,
+                "Capacidad (%)": int(cap),
+                "Tareas": int(self.tasks_per_resource[r]),
+                "Persona-días": round(float(load.sum()) / 100, 1),
+                "Uso medio (%)": round(100 * float(span.mean()) / cap, 1) if len(span) else 0.0,
+                "Uso pico (%)": round(100 * float(span.max()) / cap, 1) if len(span) else 0.0,
+            })
+        return rows
+
+    def problems(self) -> list[str]:
+        if not self.over_allocated:
+            return []
+        return [
+            "Dedicación mayor que la capacidad del responsable (se programó con la capacidad completa): "
+            + ", ".join(self.over_allocated) + "."
+        ]
+
+
+# =========================
+# NIVELACIÓN
+# =========================
+def level_offsets(
+    graph: TaskGraph,
+    durations: list[int],
+    assignees: list[list[str]],
+    allocations: list[int],
+    capacities: dict[str, int] | None = None,
+    priority: list[int] | None = None,
+) -> Leveling:
+    """
+    Programación por lista de prioridad con recursos limitados (esquema serial):
+    un heap guarda las tareas cuyas dependencias ya tienen fecha, ordenadas por `priority`
+    (por defecto, inicio tardío del CPM sin recursos: primero lo que tiene menos holgura).
+    Cada tarea que sale del heap va al primer día >= su inicio más temprano en que todos sus
+    responsables tienen la dedicación libre durante toda la duración; si no cabe, se corre.
+    Las tareas sin responsable no consumen capacidad. Costo ~ tareas x log(tareas) + días revisados.
+    """
+    capacities = capacities or {}
+    n = len(durations)
+    start0, end0 = schedule_offsets(graph, durations)   # sin recursos: referencia del corrimiento
+    if priority is None:
+        priority = (start0 + total_float(graph, durations, end0.tolist())).tolist()
+
+    names: dict[str, int] = {}
+    task_res = []
+    for rs in assignees:
+        task_res.append([names.setdefault(a, len(names)) for a in rs])
+    resources = list(names)
+    capacity = [max(1, int(capacities.get(a, DEFAULT_CAPACITY))) for a in resources]
+    profiles = [_Profile() for _ in resources]
+    tasks_per_resource = [0] * len(resources)
+
+    start = [-1] * n
+    end = [-1] * n
+    in_order = [False] * n
+    for i in graph.order:
+        in_order[i] = True
+    waiting = [len(p) for p in graph.preds]
+    heap = [(priority[i], i) for i in graph.order if not waiting[i]]
+    heapq.heapify(heap)
+    over = []
+
+    while heap:
+        _, i = heapq.heappop(heap)
+        es = 0
+        for p, lag in zip(graph.preds[i], graph.lags[i]):
+            es = max(es, end[p] + 1 + lag)
+        d = durations[i]
+        rs = task_res[i]
+        t = es
+        if rs:
+            alloc = [min(allocations[i], capacity[r]) for r in rs]
+            if any(allocations[i] > capacity[r] for r in rs):
+                over.append(graph.ids[i])
+            if len(rs) == 1:
+                t = _fits_from(profiles[rs[0]], t, d, alloc[0], capacity[rs[0]])
+            else:
+                # cada responsable puede correr el inicio; se repite hasta que todos calzan el mismo día
+                settled = False
+                while not settled:
+                    settled = True
+                    for r, a in zip(rs, alloc):
+                        fit = _fits_from(profiles[r], t, d, a, capacity[r])
+                        if fit != t:
+                            t, settled = fit, False
+            for r, a in zip(rs, alloc):
+                profiles[r].book(t, d, a)
+                tasks_per_resource[r] += 1
+        start[i], end[i] = t, t + d - 1
+
+        for c in graph.children[i]:
+            waiting[c] -= 1
+            if not waiting[c] and in_order[c]:
+                heapq.heappush(heap, (priority[c], c))
+
+    start_arr = np.array(start, dtype=np.int64)
+    return Leveling(
+        start=start_arr,
+        end=np.array(end, dtype=np.int64),
+        shift=np.where(start_arr >= 0, start_arr - start0, 0),
+        resources=resources,
+        capacity=np.array(capacity, dtype=np.int64),
+        origins=np.array([p.origin for p in profiles], dtype=np.int64),
+        loads=[p.load for p in profiles],
+        tasks_per_resource=np.array(tasks_per_resource, dtype=np.int64),
+        over_allocated=over,
+    )
+
+
+def task_resources(table) -> tuple[list[list[str]], list[int]]:
+    """(responsables, dedicación %) por fila; sin las columnas opcionales, nadie consume capacidad."""
+    n = len(column_values(table, "ID"))
+    if RESOURCE_COLUMN not in table:
+        return [[] for _ in range(n)], [DEFAULT_CAPACITY] * n
+    assignees = [split_assignees(v) for v in column_values(table, RESOURCE_COLUMN)]
+    if ALLOCATION_COLUMN not in table:
+        return assignees, [DEFAULT_CAPACITY] * n
+    allocations = []
+    for v in column_values(table, ALLOCATION_COLUMN):
+        try:
+            allocations.append(max(1, int(v)))
+        except Exception:
+            allocations.append(DEFAULT_CAPACITY)
+    return assignees, allocations
+
+
+def build_leveled_schedule(
+    df_in: pd.DataFrame,
+    kickoff: date,
+    calendar: BusinessCalendar | bool,
+    capacities: dict[str, int] | None = None,
+    graph: TaskGraph | None = None,
+) -> tuple[pd.DataFrame, Leveling]:
+    """
+    Igual que build_schedule, pero respetando la capacidad diaria de cada responsable
+    (ver level_offsets). Agrega la columna SHIFT_COLUMN; la holgura es la de las
+    dependencias sobre las fechas niveladas.
+    """
+    df = df_in.copy(deep=False)
+    if graph is None:
+        graph = build_task_graph(df)
+    cal = as_calendar(calendar)
+
+    dur = effective_duration_list(df)
+    assignees, allocations = task_resources(df)
+    leveling = level_offsets(graph, dur, assignees, allocations, capacities)
+    slack = total_float(graph, dur, leveling.end.tolist())
+    anchor = cal.roll(kickoff)
+
+    attach_dates(
+        df,
+        offsets_to_timestamps(cal, anchor, leveling.start),
+        offsets_to_timestamps(cal, anchor, leveling.end),
+        dur,
+        slack,
+    )
+    df[SHIFT_COLUMN] = leveling.shift
+    return df, leveling
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from business_calendar import BusinessCalendar
+from scheduling import (
+    TaskGraph,
+    as_calendar,
+    clean_id,
+    column_values,
+    effective_duration_list,
+    offsets_to_timestamps,
+    propagate_durations,
+    schedule_offsets,
+    topological_rank,
+)
+
+if TYPE_CHECKING:
+    from datetime import date
+
+    import pandas as pd
+
+# como scheduling: pandas solo para armar las tablas de diferencias (scenario_diff)
+
+# campos que un escenario puede cambiar (los que mueven fechas sin tocar la estructura)
+SCENARIO_FIELDS = ("Duración (días hábiles)", "Desviación (días hábiles)")
+
+_DEFAULTS = {"Duración (días hábiles)": 1, "Desviación (días hábiles)": 0}
+
+
+# =========================
+# ESCENARIOS (capa de cambios sobre el plan)
+# =========================
+# Un escenario no copia la tabla: guarda solo los campos que cambia, por ID de tarea, y su
+# cronograma se calcula desde el del plan base re-programando solo lo que queda aguas abajo
+# de esos cambios. Lo que se guarda del resultado son las tareas que se movieron.
+@dataclass(frozen=True)
+class Scenario:
+    """
+    Escenario "¿qué pasa si…?" sobre el plan vigente: (ID, campo, valor) por cada cambio.
+    Inmutable y hashable: sirve de clave de caché junto con la del plan.
+    """
+    name: str
+    overrides: tuple[tuple[str, str, int], ...] = ()
+
+    def with_overrides(self, overrides) -> Scenario:
+        """Mismo escenario con otros cambios (el último valor de un mismo ID y campo gana)."""
+        merged: dict[tuple[str, str], int] = {}
+        for tid, fld, value in overrides:
+            merged[(clean_id(tid), fld)] = int(value)
+        return replace(self, overrides=tuple((tid, fld, v) for (tid, fld), v in merged.items()))
+
+
+def validate_overrides(overrides) -> tuple[bool, str]:
+    for tid, fld, value in overrides:
+        if not clean_id(tid):
+            return False, "Cada cambio del escenario necesita el ID de una tarea."
+        if fld not in SCENARIO_FIELDS:
+            return False, f"{tid}: un escenario solo cambia {' o '.join(SCENARIO_FIELDS)}."
+        if fld == "Duración (días hábiles)" and int(value) < 1:
+            return False, f"{tid}: la duración mínima es 1 día hábil."
+    return True, ""
+
+
+def scenarios_to_json(scenarios: list[Scenario]) -> str:
+    return json.dumps({s.name: [list(o) for o in s.overrides] for s in scenarios}, ensure_ascii=False)
+
+
+def scenarios_from_json(text: str | None) -> list[Scenario]:
+    """Escenarios guardados en la meta del plan; un JSON dañado se ignora (sin escenarios)."""
+    try:
+        raw = json.loads(text or "{}")
+        out = [Scenario(str(name)).with_overrides((str(t), str(f), int(v)) for t, f, v in ovs) for name, ovs in raw.items()]
+    except (ValueError, TypeError, AttributeError):
+        return []
+    return [s for s in out if validate_overrides(s.overrides)[0]]
+
+
+@dataclass
+class ScenarioBase:
+    """
+    Cronograma del plan base en desplazamientos (días hábiles desde el kickoff), compartido
+    por todos los escenarios de esa versión del plan.
+    """
+    graph: TaskGraph
+    rank: list[int]
+    base_durations: list[int]           # "Duración" de la tabla (sin desviación)
+    deviations: list[int]
+    durations: np.ndarray               # duración efectiva (base + desviación, mín. 1)
+    start: list[int]
+    end: list[int]
+    project_end: int                    # -1 = sin fechas
+
+    @classmethod
+    def from_table(cls, table, graph: TaskGraph) -> ScenarioBase:
+        """`table` = DataFrame o dict de columnas; `graph`, el de esa tabla."""
+        dur = effective_duration_list(table)
+        start, end = schedule_offsets(graph, dur)
+        return cls(
+            graph=graph,
+            rank=topological_rank(graph),
+            base_durations=_ints(table, SCENARIO_FIELDS[0]),
+            deviations=_ints(table, SCENARIO_FIELDS[1]),
+            durations=np.asarray(dur, dtype=np.int64),
+            start=start.tolist(),
+            end=end.tolist(),
+            project_end=int(end.max()) if len(end) else -1,
+        )
+
+
+def _ints(table, name: str) -> list[int]:
+    if name not in table:
+        return [_DEFAULTS[name]] * len(column_values(table, "ID"))
+    out = []
+    for v in column_values(table, name):
+        try:
+            out.append(int(float(v)))
+        except (TypeError, ValueError, OverflowError):
+            out.append(_DEFAULTS[name])
+    return out
+
+
+@dataclass
+class ScenarioSchedule:
+    """Resultado de un escenario: solo las tareas que cambian de duración o de fechas."""
+    scenario: Scenario
+    changed: np.ndarray                 # posiciones con duración efectiva distinta a la base
+    durations: np.ndarray               # duración efectiva nueva de `changed`
+    moved: np.ndarray                   # posiciones que cambian de fechas (orden de fila)
+    start: np.ndarray                   # inicio/fin nuevos de `moved`
+    end: np.ndarray
+    project_end: int
+    unknown: list[str]                  # IDs del escenario que ya no están en el plan
+
+    @property
+    def nbytes(self) -> int:
+        return self.changed.nbytes + self.durations.nbytes + self.moved.nbytes + self.start.nbytes + self.end.nbytes
+
+
+def scenario_schedule(base: ScenarioBase, scenario: Scenario) -> ScenarioSchedule:
+    """
+    Cronograma del escenario: aplica sus cambios a las duraciones efectivas y propaga solo
+    aguas abajo de las tareas cambiadas (scheduling.propagate_durations), cortando donde
+    las fechas ya no cambian. Costo ~ tareas movidas, no tamaño del plan.
+    """
+    pos = base.graph.pos
+    fields: dict[int, dict[str, int]] = {}
+    unknown = []
+    for tid, fld, value in scenario.overrides:
+        if tid in pos:
+            fields.setdefault(pos[tid], {})[fld] = value
+        else:
+            unknown.append(tid)
+
+    new_dur = {}
+    for i, f in fields.items():
+        d = max(1, f.get(SCENARIO_FIELDS[0], base.base_durations[i]) + f.get(SCENARIO_FIELDS[1], base.deviations[i]))
+        if d != base.durations[i]:
+            new_dur[i] = d
+
+    moved: dict[int, tuple[int, int]] = {}
+    if new_dur:
+        durations = _DurationOverlay(base.durations, new_dur)
+        moved = propagate_durations(base.graph, base.rank, durations, base.start, base.end, sorted(new_dur))
+
+    # int32: un escenario que corre casi todo el plan pesa ~12 bytes por tarea movida
+    positions = np.array(sorted(moved), dtype=np.int32)
+    start = np.array([moved[i][0] for i in positions.tolist()], dtype=np.int32)
+    end = np.array([moved[i][1] for i in positions.tolist()], dtype=np.int32)
+    return ScenarioSchedule(
+        scenario=scenario,
+        changed=np.array(sorted(new_dur), dtype=np.int32),
+        durations=np.array([new_dur[i] for i in sorted(new_dur)], dtype=np.int32),
+        moved=positions,
+        start=start,
+        end=end,
+        project_end=_project_end(base, positions, end),
+        unknown=unknown,
+    )
+
+
+class _DurationOverlay:
+    """Duraciones base + cambios del escenario, sin copiar el arreglo base."""
+    __slots__ = ("base", "changes")
+
+    def __init__(self, base: np.ndarray, changes: dict[int, int]):
+        self.base = base
+        self.changes = changes
+
+    def __getitem__(self, i: int) -> int:
+        d = self.changes.get(i)
+        return self.base[i] if d is None else d
+
+
+def _project_end(base: ScenarioBase, moved: np.ndarray, end: np.ndarray) -> int:
+    if not len(moved):
+        return base.project_end
+    if end.max() >= base.project_end:
+        return int(end.max())
+    # alguna tarea se adelantó: el fin puede bajar si era la que lo definía
+    ends = np.asarray(base.end, dtype=np.int64)
+    ends[moved] = end
+    return int(ends.max())
+
+
+# =========================
+# DIFERENCIAS CONTRA EL PLAN BASE
+# =========================
+def scenario_summary(
+    base: ScenarioBase, results: list[ScenarioSchedule], kickoff: date, calendar: BusinessCalendar | bool
+) -> list[dict]:
+    """Una fila por escenario: cambios, tareas movidas y fin del proyecto contra la base."""
+    cal = as_calendar(calendar)
+    anchor = cal.roll(kickoff)
+    ends = np.array([base.project_end] + [r.project_end for r in results], dtype=np.int64)
+    dates = offsets_to_timestamps(cal, anchor, ends)
+    rows = []
+    for k, r in enumerate(results, start=1):
+        rows.append({
+            "Escenario": r.scenario.name,
+            "Cambios": len(r.scenario.overrides),
+            "Tareas movidas": len(r.moved),
+            "Fin base": dates[0],
+            "Fin escenario": dates[k],
+            "Δ fin (días hábiles)": int(ends[k] - ends[0]) if ends[k] >= 0 and ends[0] >= 0 else None,
+        })
+    return rows
+
+
+def scenario_diff(
+    base: ScenarioBase, result: ScenarioSchedule, table, kickoff: date, calendar: BusinessCalendar | bool
+) -> pd.DataFrame:
+    """
+    Tareas del escenario que cambian de duración o de fechas, lado a lado con el plan base
+    (Δ en días hábiles; positivo = atraso). Ordenadas por posición en la tabla.
+    """
+    import pandas as pd
+
+    cal = as_calendar(calendar)
+    anchor = cal.roll(kickoff)
+    rows = np.union1d(result.moved, result.changed)
+    base_start = np.asarray(base.start, dtype=np.int64)[rows]
+    base_end = np.asarray(base.end, dtype=np.int64)[rows]
+    base_dur = base.durations[rows]
+    new_start, new_end, new_dur = base_start.copy(), base_end.copy(), base_dur.copy()
+    moved_at = np.searchsorted(rows, result.moved)
+    new_start[moved_at] = result.start
+    new_end[moved_at] = result.end
+    new_dur[np.searchsorted(rows, result.changed)] = result.durations
+
+    ids = column_values(table, "ID")
+    names = column_values(table, "Tarea")
+    return pd.DataFrame({
+        "ID": [ids[i] for i in rows.tolist()],
+        "Tarea": [names[i] for i in rows.tolist()],
+        "Duración base": base_dur,
+        "Duración escenario": new_dur,
+        "Inicio base": offsets_to_timestamps(cal, anchor, base_start),
+        "Inicio escenario": offsets_to_timestamps(cal, anchor, new_start),
+        "Δ inicio (días hábiles)": new_start - base_start,
+        "Fin base": offsets_to_timestamps(cal, anchor, base_end),
+        "Fin escenario": offsets_to_timestamps(cal, anchor, new_end),
+        "Δ fin (días hábiles)": new_end - base_end,
+    })
@@ -0,0 +1,219 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from datetime import date
+
+import pandas as pd
+
+import diagnostics
+from baselines import Baseline, BaselineReport, baseline_report
+from business_calendar import BusinessCalendar
+from resource_leveling import Leveling, build_leveled_schedule
+from scenarios import Scenario, ScenarioBase, ScenarioSchedule, scenario_schedule
+from scheduling import IncrementalScheduler, TaskGraph, build_schedule, build_task_graph
+
+
+class LRUCache:
+    """
+    Caché LRU acotado y thread-safe (cada sesión de Streamlit corre en su propio hilo).
+    Los valores se comparten entre reruns y sesiones: NO mutarlos.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = compute()  # fuera del lock: no bloquear otras sesiones mientras se calcula
+        self.put(key, value)
+        return value
+
+    def get(self, key: Hashable, default=None):
+        """Lectura sin calcular (cuenta hit/miss), para llenar varios misses de una vez con put()."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Hash estable del contenido de la tabla (columnas + valores, en orden de filas).
+    No depende del índice: la misma tabla editada y restaurada da el mismo hash.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def schedule_key(df: pd.DataFrame, kickoff: date, calendar: BusinessCalendar) -> tuple:
+    return (frame_fingerprint(df), kickoff.isoformat(), calendar.key)
+
+
+SCHEDULES = LRUCache(maxsize=32)
+MERMAID = LRUCache(maxsize=32)
+GANTT_SVG = LRUCache(maxsize=32)
+INDEXES = LRUCache(maxsize=64)
+FORECASTS = LRUCache(maxsize=16)
+SWEEPS = LRUCache(maxsize=16)     # barrido de kickoffs por cronograma y ventana
+LEVELED = LRUCache(maxsize=16)
+SCENARIO_BASES = LRUCache(maxsize=8)
+SCENARIOS = LRUCache(maxsize=256)  # liviano: cada resultado guarda solo las tareas que se movieron
+BASELINE_REPORTS = LRUCache(maxsize=8)
+PORTFOLIO = LRUCache(maxsize=512)   # resumen por proyecto del portafolio
+
+
+def task_index(df: pd.DataFrame) -> TaskGraph:
+    """
+    Índice de la tabla (ID -> fila, hijos por tarea) para las reglas de estado.
+    Solo depende de ID/Depende_de: se construye una vez por versión de la estructura.
+    """
+    key = frame_fingerprint(df[["ID", "Depende_de"]])
+    return INDEXES.get_or_compute(key, lambda: build_task_graph(df))
+
+
+def cached_schedule(
+    df: pd.DataFrame,
+    kickoff: date,
+    calendar: BusinessCalendar,
+    key: tuple | None = None,
+    scheduler: IncrementalScheduler | None = None,
+) -> tuple[TaskGraph, pd.DataFrame]:
+    """
+    (grafo, cronograma) servidos desde caché si la tabla, el kickoff y el calendario no cambiaron.
+    En un miss, si se entrega un IncrementalScheduler (uno por sesión) se re-programa
+    solo lo que cambió respecto del último cálculo de esa sesión.
+    """
+    if key is None:
+        key = schedule_key(df, kickoff, calendar)
+
+    def compute():
+        diagnostics.count("recálculos de cronograma")
+        with diagnostics.span("recalcular cronograma"):
+            if scheduler is not None:
+                result = scheduler.schedule(df, kickoff, calendar)
+                diagnostics.count("tareas recalculadas", scheduler.last_recomputed)
+                return result
+            graph = build_task_graph(df)
+            return graph, build_schedule(df, kickoff, calendar, graph=graph)
+
+    return SCHEDULES.get_or_compute(key, compute)
+
+
+def leveled_key(key: tuple, capacities: dict[str, int]) -> tuple:
+    """Clave del cronograma nivelado: la del cronograma + las capacidades por recurso."""
+    return (*key, "nivelado", tuple(sorted(capacities.items())))
+
+
+def cached_leveled_schedule(
+    df: pd.DataFrame,
+    kickoff: date,
+    calendar: BusinessCalendar,
+    capacities: dict[str, int],
+    key: tuple | None = None,
+    graph: TaskGraph | None = None,
+) -> tuple[pd.DataFrame, Leveling]:
+    """
+    (cronograma nivelado por recursos, carga por recurso) servidos desde caché.
+    `key` es la de leveled_key(); `graph`, el de cached_schedule si ya se tiene.
+    """
+    if key is None:
+        key = leveled_key(schedule_key(df, kickoff, calendar), capacities)
+
+    def compute():
+        diagnostics.count("nivelaciones por recursos")
+        with diagnostics.span("nivelar por recursos"):
+            return build_leveled_schedule(df, kickoff, calendar, capacities, graph=graph)
+
+    return LEVELED.get_or_compute(key, compute)
+
+
+def cached_scenario(
+    df: pd.DataFrame, scenario: Scenario, key: tuple, graph: TaskGraph
+) -> tuple[ScenarioBase, ScenarioSchedule]:
+    """
+    (plan base en desplazamientos, resultado del escenario) servidos desde caché.
+    `key` es la del cronograma del plan (schedule_key) y `graph`, su grafo: la base se
+    calcula una vez por versión del plan y la comparten todos los escenarios.
+    """
+    def compute_base():
+        with diagnostics.span("escenarios: plan base"):
+            return ScenarioBase.from_table(df, graph)
+
+    def compute():
+        diagnostics.count("escenarios recalculados")
+        with diagnostics.span("escenario"):
+            return scenario_schedule(base, scenario)
+
+    base = SCENARIO_BASES.get_or_compute(key, compute_base)
+    return base, SCENARIOS.get_or_compute((key, scenario), compute)
+
+
+def cached_baseline_report(
+    baselines: list[Baseline], schedule: pd.DataFrame, key: tuple, calendar: BusinessCalendar, as_of: date
+) -> BaselineReport:
+    """
+    Variación del cronograma contra las líneas base, servida desde caché. `key` es la del
+    cronograma (la de plan_schedule); las bases son inmutables: basta su nombre y fecha.
+    """
+    report_key = (key, tuple((b.name, b.created) for b in baselines), calendar.key, as_of.isoformat())
+
+    def compute():
+        diagnostics.count("reportes de línea base")
+        with diagnostics.span("variación contra líneas base"):
+            return baseline_report(baselines, schedule, calendar, as_of)
+
+    return BASELINE_REPORTS.get_or_compute(report_key, compute)
+
+
+def cache_stats() -> dict[str, dict]:
+    return {
+        "cronograma": SCHEDULES.stats(),
+        "mermaid": MERMAID.stats(),
+        "gantt svg": GANTT_SVG.stats(),
+        "índice": INDEXES.stats(),
+        "pronóstico": FORECASTS.stats(),
+        "barrido kickoff": SWEEPS.stats(),
+        "nivelación": LEVELED.stats(),
+        "escenarios": SCENARIOS.stats(),
+        "líneas base": BASELINE_REPORTS.stats(),
+        "portafolio": PORTFOLIO.stats(),
+    }
@@ -0,0 +1,522 @@
+from __future__ import annotations
+
+import heapq
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from business_calendar import BusinessCalendar
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pandas se importa dentro de las funciones que lo usan: el grafo y los desplazamientos
+# funcionan con cualquier tabla tipo {columna: valores}, así la CLI arranca sin cargarlo.
+
+# hito de salida a producción (pronóstico, portafolio y fechas clave de la CLI)
+GO_LIVE_ID = "t14"
+
+
+# =========================
+# CÁLCULO DE FECHAS (para mostrar fin de proyecto)
+# =========================
+_PRESETS: dict[bool, BusinessCalendar] = {}
+
+
+def as_calendar(calendar: BusinessCalendar | bool) -> BusinessCalendar:
+    """
+    Acepta un BusinessCalendar o el toggle 'excluir fines de semana' (preset).
+    """
+    if isinstance(calendar, BusinessCalendar):
+        return calendar
+    key = bool(calendar)
+    if key not in _PRESETS:
+        _PRESETS[key] = BusinessCalendar.preset(key)
+    return _PRESETS[key]
+
+
+def next_business_day(d: date, calendar: BusinessCalendar | bool) -> date:
+    return as_calendar(calendar).next_business_day(d)
+
+
+def add_business_days(start: date, n: int, calendar: BusinessCalendar | bool) -> date:
+    """
+    Devuelve la fecha final al sumar n días hábiles a start.
+    Convención: si n=1, termina el mismo día (start).
+    """
+    return as_calendar(calendar).add_business_days(start, n)
+
+
+def next_day_after(end_date: date, calendar: BusinessCalendar | bool) -> date:
+    return as_calendar(calendar).next_day_after(end_date)
+
+
+def column_values(table, name: str) -> list:
+    # DataFrame o dict de columnas -> lista de valores
+    values = table[name]
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+def _to_int(value, default: int) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return default
+
+
+def effective_duration_list(table) -> list[int]:
+    """
+    Igual que effective_durations pero sin pandas (tabla = DataFrame o dict de columnas).
+    """
+    base = [_to_int(v, 1) for v in column_values(table, "Duración (días hábiles)")]
+    if "Desviación (días hábiles)" in table:
+        delta = [_to_int(v, 0) for v in column_values(table, "Desviación (días hábiles)")]
+    else:
+        delta = [0] * len(base)
+    return [max(1, b + d) for b, d in zip(base, delta)]
+
+
+def effective_durations(df: pd.DataFrame) -> pd.Series:
+    """
+    Duración efectiva por tarea (base + desviación, mínimo 1), vectorizada.
+    """
+    import pandas as pd
+
+    base = pd.to_numeric(df["Duración (días hábiles)"], errors="coerce").fillna(1).astype(int)
+    if "Desviación (días hábiles)" in df.columns:
+        delta = pd.to_numeric(df["Desviación (días hábiles)"], errors="coerce").fillna(0).astype(int)
+    else:
+        delta = 0
+    return (base + delta).clip(lower=1)
+
+
+# =========================
+# GRAFO DE DEPENDENCIAS
+# =========================
+def clean_id(value) -> str:
+    if value is None or (isinstance(value, float) and value != value):  # None / NaN
+        return ""
+    return str(value).strip()
+
+
+_SEP = re.compile(r"[,;\s]+")
+_LAG = re.compile(r"^(.+?)([+-]\d+)$")
+
+
+def split_dependencies(value) -> list[str]:
+    """
+    'Depende_de' admite varias tareas separadas por coma, punto y coma o espacio,
+    cada una con un desfase fin-a-inicio opcional en días hábiles: "t2, b3+1".
+    """
+    text = clean_id(value)
+    if not _SEP.search(text):
+        return [text] if text else []  # caso común: una sola dependencia
+    return [tok for tok in _SEP.split(text) if tok]
+
+
+def resolve_dependencies(value, known_ids) -> list[tuple[str, int]]:
+    """
+    [(ID, desfase)] de un valor de 'Depende_de'. Un ID que existe tal cual gana sobre
+    la lectura con desfase ("fase-1" no es "fase" menos 1 día).
+    """
+    out = []
+    for token in split_dependencies(value):
+        m = None if token in known_ids else _LAG.match(token)
+        out.append((token, 0) if m is None else (m.group(1), int(m.group(2))))
+    return out
+
+
+@dataclass
+class TaskGraph:
+    """
+    Grafo de dependencias de la tabla de tareas, por posición de fila.
+    Se construye una vez y se recorre en orden topológico (Kahn).
+    También sirve de índice para las reglas: ID -> fila en O(1) e hijos en O(hijos).
+    """
+    ids: list[str]
+    pos: dict[str, int]                 # ID -> posición de fila
+    preds: list[list[int]]              # posiciones de las dependencias (vacío = arranca en el kickoff)
+    lags: list[list[int]]               # desfase fin-a-inicio de cada dependencia (días hábiles)
+    children: list[list[int]]           # posiciones de las tareas que dependen de cada una
+    order: list[int]                    # orden topológico de las tareas programables
+    missing: dict[str, list[str]] = field(default_factory=dict)   # tarea -> dependencias inexistentes
+    cyclic: list[str] = field(default_factory=list)               # tareas en ciclo
+    blocked: list[str] = field(default_factory=list)              # tareas aguas abajo de un problema
+    duplicates: list[str] = field(default_factory=list)
+
+    def problems(self) -> list[str]:
+        msgs = []
+        for tid in dict.fromkeys(self.duplicates):
+            rows = [i + 1 for i, t in enumerate(self.ids) if t == tid]
+            earlier = ", ".join(str(r) for r in rows[:-1])
+            msgs.append(f"ID duplicado: '{tid}' en las filas {earlier} y {rows[-1]}; "
+                        f"se usa la fila {rows[-1]} y las anteriores quedan sin fechas.")
+        for tid, deps in self.missing.items():
+            names = ", ".join(f"'{d}'" for d in deps)
+            msgs.append(f"{tid}: depende de {names}, que no existe{'n' if len(deps) > 1 else ''}.")
+        if self.cyclic:
+            msgs.append("Dependencias circulares entre: " + ", ".join(self.cyclic) + ".")
+        if self.blocked:
+            msgs.append("Sin fechas por dependencias no resueltas: " + ", ".join(self.blocked) + ".")
+        return msgs
+
+
+def _cyclic_nodes(nodes: set[int], children: list[list[int]]) -> set[int]:
+    """
+    Tareas que pertenecen a un ciclo (componentes fuertemente conexas de Tarjan, iterativo),
+    mirando solo el subgrafo `nodes` que Kahn no pudo ordenar.
+    """
+    index: dict[int, int] = {}
+    low: dict[int, int] = {}
+    on_stack = set()
+    stack: list[int] = []
+    out = set()
+
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(children[root]))]
+        while work:
+            v, it = work[-1]
+            for w in it:
+                if w not in nodes:
+                    continue
+                if w not in index:
+                    index[w] = low[w] = len(index)
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(children[w])))
+                    break
+                if w in on_stack:
+                    low[v] = min(low[v], index[w])
+            else:
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    low[u] = min(low[u], low[v])
+                if low[v] == index[v]:
+                    comp = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        comp.append(w)
+                        if w == v:
+                            break
+                    if len(comp) > 1 or v in children[v]:
+                        out.update(comp)
+    return out
+
+
+def build_task_graph(df: pd.DataFrame) -> TaskGraph:
+    ids = [clean_id(x) for x in column_values(df, "ID")]
+    deps = column_values(df, "Depende_de")
+    n = len(ids)
+
+    pos: dict[str, int] = {}
+    duplicates = []
+    for i, tid in enumerate(ids):
+        if tid in pos:
+            duplicates.append(tid)
+        pos[tid] = i
+
+    preds: list[list[int]] = [[] for _ in range(n)]
+    lags: list[list[int]] = [[] for _ in range(n)]
+    children: list[list[int]] = [[] for _ in range(n)]
+    indegree = [0] * n
+    missing: dict[str, list[str]] = {}
+
+    for i, (tid, dep) in enumerate(zip(ids, deps)):
+        if tid == "t0" or pos[tid] != i:
+            continue  # t0 arranca en el kickoff; una fila tapada por un ID repetido queda fuera del grafo
+        for dep_id, lag in resolve_dependencies(dep, pos):
+            p = pos.get(dep_id)
+            if p is None:
+                missing.setdefault(tid, []).append(dep_id)
+                indegree[i] += 1  # nunca se libera: queda sin fechas
+                continue
+            preds[i].append(p)
+            lags[i].append(lag)
+            children[p].append(i)
+            indegree[i] += 1
+
+    # Kahn: una sola pasada, cada arista se visita una vez
+    queue = deque(i for i in range(n) if indegree[i] == 0 and pos[ids[i]] == i)
+    order = []
+    while queue:
+        i = queue.popleft()
+        order.append(i)
+        for c in children[i]:
+            indegree[c] -= 1
+            if indegree[c] == 0:
+                queue.append(c)
+
+    # lo que quedó sin ordenar: ciclos o tareas colgando de un ciclo / dependencia inexistente
+    left = {i for i in range(n) if indegree[i] > 0}
+    cyclic = _cyclic_nodes(left, children)
+    blocked = left - cyclic - {pos[tid] for tid in missing}
+
+    return TaskGraph(
+        ids=ids,
+        pos=pos,
+        preds=preds,
+        lags=lags,
+        children=children,
+        order=order,
+        missing=missing,
+        cyclic=[ids[i] for i in sorted(cyclic)],
+        blocked=[ids[i] for i in sorted(blocked)],
+        duplicates=duplicates,
+    )
+
+
+def _earliest_start(graph: TaskGraph, i: int, end: list[int]) -> int:
+    # máximo sobre las dependencias de (fin + 1 + desfase); nunca antes del kickoff
+    s = 0
+    for p, lag in zip(graph.preds[i], graph.lags[i]):
+        s = max(s, end[p] + 1 + lag)
+    return s
+
+
+def schedule_offsets(graph: TaskGraph, durations: list[int]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Inicio/fin de cada tarea como desplazamiento en días hábiles desde el kickoff
+    (0 = día del kickoff). Una pasada en orden topológico, lineal en aristas; -1 = sin fechas.
+    """
+    n = len(durations)
+    start = [-1] * n
+    end = [-1] * n
+    for i in graph.order:
+        s = _earliest_start(graph, i, end)
+        start[i] = s
+        end[i] = s + durations[i] - 1
+    return np.array(start, dtype=np.int64), np.array(end, dtype=np.int64)
+
+
+def topological_rank(graph: TaskGraph) -> list[int]:
+    """Posición de cada tarea en graph.order (-1 = sin fechas)."""
+    rank = [-1] * len(graph.ids)
+    for r, i in enumerate(graph.order):
+        rank[i] = r
+    return rank
+
+
+def propagate_durations(
+    graph: TaskGraph,
+    rank: list[int],
+    durations,
+    start: list[int],
+    end: list[int],
+    changed,
+) -> dict[int, tuple[int, int]]:
+    """
+    Re-programa los dependientes transitivos de las filas `changed` con las nuevas
+    `durations`, sobre un cronograma ya calculado (start/end, que no se modifican).
+    Devuelve {posición: (inicio, fin)} solo de las tareas cuyas fechas cambian: la
+    propagación se corta donde una tarea queda igual.
+    """
+    moved: dict[int, tuple[int, int]] = {}
+    # orden topológico vía heap (rank): cada tarea se procesa una vez, después de su dependencia
+    heap = [(rank[i], i) for i in changed if rank[i] >= 0]
+    heapq.heapify(heap)
+    done = set()
+    while heap:
+        _, i = heapq.heappop(heap)
+        if i in done:
+            continue
+        done.add(i)
+        s = 0
+        for p, lag in zip(graph.preds[i], graph.lags[i]):
+            s = max(s, (moved[p][1] if p in moved else end[p]) + 1 + lag)
+        e = s + int(durations[i]) - 1
+        if s == start[i] and e == end[i]:
+            continue  # sin cambio de fechas: no propagar
+        moved[i] = (s, e)
+        for c in graph.children[i]:
+            if rank[c] >= 0:  # hijos sin fechas (otra dependencia rota) no se programan
+                heapq.heappush(heap, (rank[c], c))
+    return moved
+
+
+def total_float(graph: TaskGraph, durations: list[int], end: list[int]) -> np.ndarray:
+    """
+    CPM: pasada hacia atrás en orden topológico inverso (lineal en aristas).
+    Fin tardío = mín. sobre sucesores de (inicio tardío - 1 - desfase), con el fin del
+    proyecto como cota. Devuelve la holgura total por tarea (-1 = sin fechas).
+    """
+    n = len(durations)
+    scheduled = [e for e in end if e >= 0]
+    if not scheduled:
+        return np.full(n, -1, dtype=np.int64)
+    project_end = max(scheduled)
+
+    late_finish = [project_end] * n
+    slack = [-1] * n
+    for i in reversed(graph.order):
+        late_start = late_finish[i] - durations[i] + 1
+        slack[i] = late_finish[i] - end[i]
+        for p, lag in zip(graph.preds[i], graph.lags[i]):
+            late_finish[p] = min(late_finish[p], late_start - 1 - lag)
+    return np.array(slack, dtype=np.int64)
+
+
+def attach_dates(df: pd.DataFrame, inicio: np.ndarray, fin: np.ndarray, dur, slack: np.ndarray):
+    import pandas as pd
+
+    df["Inicio"] = inicio
+    df["Fin"] = fin
+    df["Duración efectiva (días hábiles)"] = dur
+    df["Holgura (días hábiles)"] = pd.Series(slack, index=df.index).where(slack >= 0).astype("Int64")
+    df["Crítica"] = slack == 0
+
+
+def offsets_to_timestamps(calendar: BusinessCalendar, anchor, offsets: np.ndarray) -> np.ndarray:
+    """
+    Convierte desplazamientos a fechas en una sola operación (NaT donde offset < 0).
+    """
+    out = np.full(len(offsets), np.datetime64("NaT"), dtype="datetime64[ns]")
+    ok = offsets >= 0
+    out[ok] = calendar.offset_dates(anchor, offsets[ok]).astype("datetime64[ns]")
+    return out
+
+
+def sweep_kickoffs(calendar: BusinessCalendar, kickoffs, offsets: np.ndarray) -> np.ndarray:
+    """
+    Fechas (kickoffs x desplazamientos) del mismo cronograma para varios kickoffs en una sola
+    operación: los desplazamientos en días hábiles no dependen del kickoff, solo el ancla
+    (primer día hábil desde cada kickoff). datetime64[D]; NaT donde offset < 0.
+    """
+    anchors = calendar.offset_dates(np.asarray(kickoffs, dtype="datetime64[D]"), 0)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    out = np.full((len(anchors), len(offsets)), np.datetime64("NaT"), dtype="datetime64[D]")
+    ok = offsets >= 0
+    if not len(anchors) or not ok.any():
+        return out
+    # cada ancla es el día hábil n° rank desde la primera: la fecha de (ancla, offset) es el
+    # día hábil n° rank + offset, que sale de una sola lista de días hábiles (un take)
+    first = anchors.min()
+    rank = calendar.count(first, anchors).astype(np.int64)
+    days = calendar.offset_dates(first, np.arange(rank.max() + offsets[ok].max() + 1))
+    out[:, ok] = days[rank[:, None] + offsets[ok][None, :]]
+    return out
+
+
+def build_schedule(
+    df_in: pd.DataFrame,
+    kickoff: date,
+    calendar: BusinessCalendar | bool,
+    graph: TaskGraph | None = None,
+) -> pd.DataFrame:
+    """
+    Calcula inicio/fin por dependencia, usando duración efectiva (base + desviación).
+    Propaga atrasos/adelantos automáticamente.
+    Una pasada en orden topológico; las tareas en ciclos o con dependencias
+    inexistentes quedan sin fechas (ver TaskGraph.problems()).
+    Agrega holgura total (CPM) y la marca de ruta crítica (holgura 0).
+    `calendar` puede ser un BusinessCalendar o el toggle 'excluir fines de semana'.
+    """
+    df = df_in.copy(deep=False)  # solo se agregan columnas: copy-on-write, sin copiar la tabla
+    if graph is None:
+        graph = build_task_graph(df)
+    cal = as_calendar(calendar)
+
+    dur = effective_durations(df).tolist()
+    start, end = schedule_offsets(graph, dur)
+    slack = total_float(graph, dur, end.tolist())
+    anchor = cal.roll(kickoff)
+
+    attach_dates(
+        df,
+        offsets_to_timestamps(cal, anchor, start),
+        offsets_to_timestamps(cal, anchor, end),
+        dur,
+        slack,
+    )
+    return df
+
+
+class IncrementalScheduler:
+    """
+    Re-programación incremental: guarda el último cronograma (en desplazamientos)
+    y el índice de sucesores (inverso de Depende_de). Si solo cambian duraciones
+    o desviaciones, recalcula los dependientes transitivos de las filas editadas
+    y corta la propagación donde las fechas de una tarea no cambian.
+    Cambios de estructura (IDs, Depende_de), kickoff o calendario => cálculo completo.
+    """
+
+    def __init__(self):
+        self.graph: TaskGraph | None = None
+        self.last_recomputed = 0      # tareas recalculadas en la última llamada
+        self.last_mode = ""           # "completo" | "incremental"
+        self._key = None
+        self._ids: list[str] = []
+        self._deps: list[str] = []
+        self._rank: list[int] = []
+        self._dur = np.empty(0, dtype=np.int64)
+        self._start: list[int] = []
+        self._end: list[int] = []
+        self._inicio = np.empty(0, dtype="datetime64[ns]")
+        self._fin = np.empty(0, dtype="datetime64[ns]")
+
+    def schedule(
+        self,
+        df_in: pd.DataFrame,
+        kickoff: date,
+        calendar: BusinessCalendar | bool,
+    ) -> tuple[TaskGraph, pd.DataFrame]:
+        cal = as_calendar(calendar)
+        ids = [clean_id(x) for x in df_in["ID"].tolist()]
+        deps = [clean_id(x) for x in df_in["Depende_de"].tolist()]
+        dur = effective_durations(df_in).to_numpy(dtype=np.int64)
+        key = (kickoff, cal.key)
+
+        if self.graph is None or key != self._key or ids != self._ids or deps != self._deps:
+            self._full(df_in, kickoff, cal, ids, deps, dur, key)
+        else:
+            self._incremental(kickoff, cal, dur)
+
+        # la holgura depende del fin del proyecto: pasada hacia atrás completa (lineal)
+        slack = total_float(self.graph, dur.tolist(), self._end)
+
+        df = df_in.copy(deep=False)
+        attach_dates(df, self._inicio.copy(), self._fin.copy(), dur, slack)
+        return self.graph, df
+
+    def _full(self, df_in, kickoff, cal, ids, deps, dur, key):
+        graph = build_task_graph(df_in)
+        start, end = schedule_offsets(graph, dur.tolist())
+        anchor = cal.roll(kickoff)
+
+        rank = topological_rank(graph)
+
+        self.graph = graph
+        self._key, self._ids, self._deps = key, ids, deps
+        self._rank, self._dur = rank, dur
+        self._start, self._end = start.tolist(), end.tolist()
+        self._inicio = offsets_to_timestamps(cal, anchor, start)
+        self._fin = offsets_to_timestamps(cal, anchor, end)
+        self.last_recomputed = len(graph.order)
+        self.last_mode = "completo"
+
+    def _incremental(self, kickoff, cal, dur):
+        changed = np.flatnonzero(dur != self._dur)
+        self._dur = dur
+        start, end = self._start, self._end
+        moved = propagate_durations(self.graph, self._rank, dur, start, end, changed.tolist())
+        for i, (s, e) in moved.items():
+            start[i], end[i] = s, e
+        touched = list(moved)
+
+        if touched:
+            anchor = cal.roll(kickoff)
+            pos = np.array(touched, dtype=np.int64)
+            self._inicio[pos] = offsets_to_timestamps(cal, anchor, np.array([start[i] for i in touched]))
+            self._fin[pos] = offsets_to_timestamps(cal, anchor, np.array([end[i] for i in touched]))
+        self.last_recomputed = len(touched)
+        self.last_mode = "incremental"
@@ -0,0 +1,556 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+import diagnostics
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from baselines import Baseline
+    from task_table import TaskTable
+
+
+# columna de la tabla de tareas -> columna SQL
+TASK_COLUMNS = {
+    "Fase": "fase",
+    "ID": "id",
+    "Tarea": "tarea",
+    "Depende_de": "depende_de",
+    "Duración (días hábiles)": "duracion",
+    "Estado": "estado",
+    "Desviación (días hábiles)": "desviacion",
+    "Responsable": "responsable",          # opcionales: nivelación por recursos
+    "Dedicación (%)": "dedicacion",
+}
+
+# valor de las columnas enteras cuando falta o no es un número (el resto de las columnas: "")
+INT_DEFAULTS = {"duracion": 1, "desviacion": 0, "dedicacion": 100}
+
+# columnas agregadas después de la primera versión del esquema (se agregan al abrir bases anteriores)
+ADDED_COLUMNS = {
+    "version": "INTEGER DEFAULT 0",
+    "responsable": "TEXT DEFAULT ''",
+    "dedicacion": "INTEGER DEFAULT 100",
+}
+
+# meta que se versiona igual que las filas (configuración del plan)
+SETTINGS_KEYS = ("start_date", "excludes_weekends", "excludes_holidays")
+
+REQUIRED_COLUMNS = {"Fase", "ID", "Tarea", "Depende_de", "Duración (días hábiles)", "Estado"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    pos         INTEGER PRIMARY KEY,
+    fase        TEXT,
+    id          TEXT,
+    tarea       TEXT,
+    depende_de  TEXT,
+    duracion    INTEGER,
+    estado      TEXT,
+    desviacion  INTEGER DEFAULT 0,
+    responsable TEXT DEFAULT '',
+    dedicacion  INTEGER DEFAULT 100,
+    version     INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS baselines (
+    name    TEXT PRIMARY KEY,
+    created TEXT,
+    actor   TEXT,
+    kickoff TEXT,
+    tasks   INTEGER,
+    ids     BLOB,
+    days    BLOB
+);
+"""
+
+
+def load_json_state(path: Path):
+    """
+    Lee el formato anterior (cronograma_plan4_state.json). None si no existe o es inválido.
+    """
+    if not path.exists():
+        return None
+    try:
+        import pandas as pd
+
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        df = pd.DataFrame(raw["tasks"])
+
+        if not REQUIRED_COLUMNS.issubset(set(df.columns)):
+            return None
+
+        # retro-compat: si el json anterior no tenía desviación
+        if "Desviación (días hábiles)" not in df.columns:
+            df["Desviación (días hábiles)"] = 0
+
+        start_iso = raw.get("start_date", date.today().isoformat())
+        excludes_weekends = bool(raw.get("excludes_weekends", True))
+        excludes_holidays = bool(raw.get("excludes_holidays", False))
+        return df, date.fromisoformat(start_iso), excludes_weekends, excludes_holidays
+    except Exception:
+        return None
+
+
+def read_state_rows(path: Path) -> tuple[list[tuple], dict[str, str]] | None:
+    """
+    (filas, meta) de un SQLite del cronograma, solo lectura y sin pandas (para la CLI).
+    No crea el esquema ni toma locks de escritura. None si no existe o no es un plan.
+    """
+    if not Path(path).exists():
+        return None
+    conn = sqlite3.connect(f"file:{Path(path).resolve()}?mode=ro", uri=True, timeout=10)
+    try:
+        # solo lectura: una base anterior puede no tener las columnas nuevas (valen su default)
+        existing = {r[1] for r in conn.execute("PRAGMA table_info(tasks)")}
+        sql_cols = ", ".join(c if c in existing else f"NULL AS {c}" for c in TASK_COLUMNS.values())
+        rows = _db_rows(conn.execute(f"SELECT {sql_cols} FROM tasks ORDER BY pos").fetchall())
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        conn.close()
+    return rows, meta
+
+
+def _to_int(value, default: int) -> int:
+    try:
+        return int(value)
+    except Exception:
+        return default
+
+
+def _settings_meta(start: date, excludes_weekends: bool, excludes_holidays: bool) -> dict[str, str]:
+    return {
+        "start_date": start.isoformat(),
+        "excludes_weekends": "1" if excludes_weekends else "0",
+        "excludes_holidays": "1" if excludes_holidays else "0",
+    }
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value)
+
+
+def _db_rows(fetched: list[tuple]) -> list[tuple]:
+    """
+    Filas leídas con la misma normalización que TaskTable.from_frame (NULL -> "" / default),
+    para compararlas con las filas de la tabla. Columna por columna: sin llamadas por celda
+    cuando el valor ya tiene el tipo correcto.
+    """
+    if not fetched:
+        return []
+    cols = []
+    for col, values in zip(TASK_COLUMNS.values(), zip(*fetched)):
+        if col in INT_DEFAULTS:
+            default = INT_DEFAULTS[col]
+            cols.append([v if type(v) is int else _to_int(v, default) for v in values])
+        else:
+            cols.append([v if type(v) is str else _text(v) for v in values])
+    return list(zip(*cols))
+
+
+def _json_entries(text: str | None) -> dict:
+    """Diccionario JSON guardado en la meta; vacío si falta o está dañado."""
+    try:
+        raw = json.loads(text or "{}")
+    except ValueError:
+        return {}
+    return raw if isinstance(raw, dict) else {}
+
+
+def pad_row(row) -> tuple:
+    """Completa con defaults una fila guardada antes de que existieran las últimas columnas."""
+    row = tuple(row)
+    missing = list(TASK_COLUMNS.values())[len(row):]
+    return row + tuple(INT_DEFAULTS.get(c, "") for c in missing)
+
+
+def _merge_row(base: tuple | None, mine: tuple, theirs: tuple) -> tuple[tuple, list[str]]:
+    """
+    Mezcla campo a campo una fila que cambiaron dos sesiones desde `base`.
+    Devuelve (fila mezclada, campos en conflicto: ambas cambiaron el campo a valores distintos).
+    """
+    if base is None:  # ambas agregaron una fila en la misma posición
+        return (theirs, []) if mine == theirs else (theirs, list(TASK_COLUMNS))
+    merged, clash = [], []
+    for name, b, m, t in zip(TASK_COLUMNS, base, mine, theirs):
+        if m != b and t != b and m != t:
+            clash.append(name)
+            merged.append(t)
+        else:
+            merged.append(m if m != b else t)
+    return tuple(merged), clash
+
+
+@dataclass
+class Snapshot:
+    """
+    Estado tal como lo leyó una sesión. Es la base de su próximo save(): contra ella se
+    distinguen los cambios propios de los que hicieron otras sesiones entretanto.
+    Las filas se guardan en la TaskTable compacta (df comparte sus categorías), no como tuplas.
+    """
+    df: pd.DataFrame
+    start_date: date
+    excludes_weekends: bool
+    excludes_holidays: bool
+    version: int = 0                                          # contador global al leer
+    table: TaskTable | None = None
+    row_versions: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    meta: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def rows(self) -> list[tuple]:
+        return [] if self.table is None else self.table.rows()
+
+    def as_tuple(self):
+        return self.df, self.start_date, self.excludes_weekends, self.excludes_holidays
+
+
+@dataclass
+class SaveResult:
+    written: int                # filas escritas
+    conflicts: list[str]        # cambios propios rechazados (se mantuvo lo guardado por otra sesión)
+    snapshot: Snapshot          # estado resultante: nueva base de la sesión
+    remote_changes: bool        # el estado incluye cambios de otras sesiones
+
+
+class SqliteStateStore:
+    """
+    Estado del cronograma en SQLite (WAL). Cada fila de la tabla es una fila SQL
+    (clave = posición) con su versión; meta['version'] es un contador global que
+    sube en cada escritura, así una sesión detecta cambios ajenos con una sola consulta.
+
+    Escritura optimista: save() recibe el Snapshot que leyó la sesión y solo escribe las
+    filas que esa sesión cambió. Si otra sesión escribió la misma fila entretanto, se
+    mezclan campo a campo; si ambas cambiaron el mismo campo a valores distintos, el cambio
+    propio se rechaza y se informa. Todo ocurre en una transacción BEGIN IMMEDIATE, que
+    serializa a los escritores (también entre procesos); un corte a mitad no corrompe el estado.
+    """
+
+    def __init__(self, path: Path, legacy_json: Path | None = None, event_log=None):
+        self.path = Path(path)
+        self.legacy_json = legacy_json
+        self.event_log = event_log     # EventLog opcional: historial de cada escritura
+        self.rows_written = 0          # acumulado, para diagnóstico
+        self._lock = threading.Lock()
+        self._table: TaskTable | None = None    # última versión leída/escrita de las filas
+        self._meta: dict[str, str] = {}
+        self._baselines: dict[tuple[str, str], Baseline] = {}   # (nombre, creada) -> base leída
+        self._baseline_ids: dict[str, pd.Index] = {}            # IDs compartidos entre bases
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            columns = {r[1] for r in conn.execute("PRAGMA table_info(tasks)")}
+            for col, decl in ADDED_COLUMNS.items():  # bases creadas con un esquema anterior
+                if col not in columns:
+                    conn.execute(f"ALTER TABLE tasks ADD COLUMN {col} {decl}")
+
+    @contextmanager
+    def _connect(self, immediate: bool = False):
+        # una conexión por operación (una transacción): seguro entre los hilos de las sesiones
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                if immediate:
+                    conn.execute("BEGIN IMMEDIATE")  # toma el lock de escritura antes de leer
+                yield conn
+        finally:
+            conn.close()
+
+    def version(self) -> int:
+        """Contador global de escrituras (consulta de una fila: barato de sondear en cada rerun)."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    @diagnostics.traced("sqlite: leer")
+    def load_snapshot(self) -> Snapshot | None:
+        """
+        Estado actual + versiones, o None si no hay estado. La primera vez migra el JSON anterior si existe.
+        """
+        with self._connect() as conn:
+            rows, versions, meta = self._read(conn)
+        if not rows:
+            return self._migrate_json()
+        return self._snapshot(rows, versions, meta)
+
+    def load(self):
+        """
+        (df, start_date, excludes_weekends, excludes_holidays) o None si no hay estado.
+        """
+        snap = self.load_snapshot()
+        return None if snap is None else snap.as_tuple()
+
+    def _migrate_json(self) -> Snapshot | None:
+        if self.legacy_json is None:
+            return None
+        loaded = load_json_state(self.legacy_json)
+        if loaded is None:
+            return None
+        result = self.save(*loaded)
+        self.set_meta("migrado_desde", str(self.legacy_json))
+        return result.snapshot
+
+    @diagnostics.traced("sqlite: guardar")
+    def save(
+        self,
+        df: pd.DataFrame,
+        start: date,
+        excludes_weekends: bool,
+        excludes_holidays: bool,
+        base: Snapshot | None = None,
+        actor: str = "",
+    ) -> SaveResult:
+        """
+        Escribe los cambios de la sesión respecto de `base` (sin base: respecto de lo guardado,
+        es decir, sin control de concurrencia). Devuelve un SaveResult con el estado resultante.
+        `actor` queda en el historial de cambios si el store tiene event_log.
+        """
+        from task_table import TaskTable
+
+        table = TaskTable.from_frame(df)
+        settings = _settings_meta(start, excludes_weekends, excludes_holidays)
+
+        with self._connect(immediate=True) as conn:
+            cur_rows, cur_versions, cur_meta = self._read(conn)
+            cur_version = int(cur_meta.get("version", 0))
+            if base is None or base.table is None:
+                base_table, base_versions, base_meta = TaskTable.from_rows(cur_rows), cur_versions, cur_meta
+            else:
+                base_table, base_versions, base_meta = base.table, base.row_versions.tolist(), base.meta
+            new_version = cur_version + 1
+            n, n_base = len(table), len(base_table)
+
+            final, final_versions = list(cur_rows), list(cur_versions)
+            writes, conflicts = [], []
+            # solo las filas que la sesión tocó (comparación vectorizada contra su base)
+            touched = table.changed_positions(base_table)
+            in_base = touched[touched < n_base]
+            base_rows = dict(zip(in_base.tolist(), base_table.rows(in_base)))
+            for pos, row in zip(touched.tolist(), table.rows(touched)):
+                base_row = base_rows.get(pos)
+                if pos < len(cur_rows):
+                    if base_row is None or cur_versions[pos] != base_versions[pos]:
+                        # otra sesión escribió esta fila después de nuestra lectura
+                        row, clash = _merge_row(base_row, row, cur_rows[pos])
+                        if clash:
+                            conflicts.append(
+                                f"{cur_rows[pos][1]}: otra sesión cambió {', '.join(clash)}; se mantuvo su versión."
+                            )
+                            continue
+                    if row == cur_rows[pos]:
+                        continue
+                    final[pos], final_versions[pos] = row, new_version
+                else:
+                    final.append(row)
+                    final_versions.append(new_version)
+                writes.append((pos, *row, new_version))
+
+            trim = n < n_base and n < len(cur_rows)
+            if trim and (len(cur_rows) != n_base or cur_versions[n:] != base_versions[n:]):
+                conflicts.append("Las filas a eliminar cambiaron en otra sesión; no se eliminaron.")
+                trim = False
+            if trim:
+                del final[n:], final_versions[n:]
+
+            meta_writes = []
+            for key, mine in settings.items():
+                before, theirs = base_meta.get(key), cur_meta.get(key)
+                if mine == before or mine == theirs:
+                    continue
+                if theirs != before:
+                    conflicts.append(f"Configuración '{key}': otra sesión la cambió; se mantuvo su valor.")
+                    continue
+                meta_writes.append((key, mine))
+
+            final_meta = dict(cur_meta)
+            logged = None
+            if writes or meta_writes or trim:
+                meta_writes.append(("version", str(new_version)))
+                sql_cols = ", ".join(TASK_COLUMNS.values())
+                marks = ", ".join("?" * (len(TASK_COLUMNS) + 2))
+                conn.executemany(f"INSERT OR REPLACE INTO tasks(pos, {sql_cols}, version) VALUES ({marks})", writes)
+                if trim:
+                    conn.execute("DELETE FROM tasks WHERE pos >= ?", (n,))
+                conn.executemany("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", meta_writes)
+                final_meta.update(meta_writes)
+                logged = (new_version, cur_rows, cur_meta, final, final_meta, [w[0] for w in writes])
+
+        if logged is not None and self.event_log is not None:
+            # recién después del COMMIT: si la transacción falla, el historial no queda con
+            # cambios de una versión que nunca se guardó
+            self.event_log.record(*logged, actor)
+        with self._lock:
+            self.rows_written += len(writes)
+        if diagnostics.active():
+            diagnostics.count("filas escritas (SQLite)", len(writes))
+            diagnostics.count("bytes escritos (SQLite)", sum(len(str(v).encode("utf-8")) for w in writes for v in w))
+        return SaveResult(
+            written=len(writes),
+            conflicts=conflicts,
+            snapshot=self._snapshot(final, final_versions, final_meta),
+            remote_changes=base is not None and cur_version != base.version,
+        )
+
+    def digest(self) -> str:
+        """
+        Hash de la última versión leída/escrita de las filas (códigos de la TaskTable, sin
+        recorrer el DataFrame): sirve como clave de caché entre reruns.
+        """
+        with self._lock:
+            table = self._table
+        if table is None:
+            return hashlib.blake2b(b"", digest_size=16).hexdigest()
+        return table.fingerprint()
+
+    def meta(self) -> dict[str, str]:
+        """Metadatos guardados (kickoff, calendario, nombre del proyecto, etc.)."""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT key, value FROM meta").fetchall())
+
+    @diagnostics.traced("sqlite: guardar meta")
+    def save_meta_entries(self, key: str, entries: dict, base: Snapshot | None = None, label: str = "") -> SaveResult:
+        """
+        Guarda un diccionario JSON de la meta (escenarios, capacidades) con el mismo control
+        de concurrencia que save(): cada entrada se compara con la que leyó la sesión (`base`)
+        y con la guardada; si ambas sesiones cambiaron la misma entrada, gana la guardada y se
+        informa. Sube la versión global, así las demás sesiones recargan el cambio.
+        """
+        mine = json.loads(json.dumps(entries, ensure_ascii=False))   # mismos tipos que lo leído
+        with self._connect(immediate=True) as conn:
+            cur_rows, cur_versions, cur_meta = self._read(conn)
+            cur_version = int(cur_meta.get("version", 0))
+            before = _json_entries((base.meta if base is not None else cur_meta).get(key))
+            theirs = _json_entries(cur_meta.get(key))
+
+            final, conflicts, changed = dict(theirs), [], False
+            for name in list(theirs) + [n for n in mine if n not in theirs]:
+                m, b, t = mine.get(name), before.get(name), theirs.get(name)
+                if m == b or m == t:
+                    continue
+                if t != b:
+                    conflicts.append(f"{label} '{name}': otra sesión lo cambió; se mantuvo su versión.")
+                    continue
+                if m is None:
+                    del final[name]
+                else:
+                    final[name] = m
+                changed = True
+
+            final_meta = dict(cur_meta)
+            if changed:
+                meta_writes = [(key, json.dumps(final, ensure_ascii=False)), ("version", str(cur_version + 1))]
+                conn.executemany("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", meta_writes)
+                final_meta.update(meta_writes)
+
+        return SaveResult(
+            written=0,
+            conflicts=conflicts,
+            snapshot=self._snapshot(cur_rows, cur_versions, final_meta),
+            remote_changes=base is not None and cur_version != base.version,
+        )
+
+    def set_meta(self, key: str, value: str):
+        # metadatos descriptivos (nombre, plantilla): no suben la versión del plan
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+            self._meta[key] = value
+
+    # ---- líneas base: inmutables (solo se agregan o eliminan), leídas una vez por proceso
+    def baseline_list(self) -> list[dict]:
+        """Líneas base guardadas (sin sus datos), de la más antigua a la más nueva."""
+        with self._connect() as conn:
+            fetched = conn.execute(
+                "SELECT name, created, actor, kickoff, tasks FROM baselines ORDER BY created, name"
+            ).fetchall()
+        return [dict(zip(("name", "created", "actor", "kickoff", "tasks"), r)) for r in fetched]
+
+    def add_baseline(self, baseline: Baseline) -> tuple[bool, str]:
+        ids, days = baseline.to_blobs()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO baselines(name, created, actor, kickoff, tasks, ids, days) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (baseline.name, baseline.created, baseline.actor, baseline.kickoff.isoformat(), len(baseline), ids, days),
+                )
+        except sqlite3.IntegrityError:
+            return False, f"Ya existe la línea base '{baseline.name}' (las líneas base no se sobrescriben)."
+        with self._lock:
+            self._baselines[(baseline.name, baseline.created)] = baseline
+            self._baseline_ids.setdefault(baseline.ids_key, baseline.ids)
+        return True, ""
+
+    def delete_baseline(self, name: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM baselines WHERE name = ?", (name,))
+        with self._lock:
+            for key in [k for k in self._baselines if k[0] == name]:
+                del self._baselines[key]
+
+    @diagnostics.traced("sqlite: leer líneas base")
+    def load_baselines(self, names: list[str] | None = None) -> list[Baseline]:
+        """
+        Líneas base por nombre (todas si names es None), en orden cronológico. Cada una se
+        descomprime una sola vez: las siguientes lecturas salen de memoria.
+        """
+        from baselines import Baseline
+
+        listed = [b for b in self.baseline_list() if names is None or b["name"] in names]
+        with self._lock:
+            missing = [b["name"] for b in listed if (b["name"], b["created"]) not in self._baselines]
+        if missing:
+            marks = ", ".join("?" * len(missing))
+            with self._connect() as conn:
+                fetched = conn.execute(
+                    f"SELECT name, created, actor, kickoff, ids, days FROM baselines WHERE name IN ({marks})", missing
+                ).fetchall()
+            with self._lock:
+                for name, created, actor, kickoff, ids, days in fetched:
+                    self._baselines[(name, created)] = Baseline.from_blobs(
+                        name, created, actor or "", kickoff, ids, days, shared_ids=self._baseline_ids
+                    )
+        with self._lock:
+            return [self._baselines[(b["name"], b["created"])] for b in listed if (b["name"], b["created"]) in self._baselines]
+
+    def _read(self, conn) -> tuple[list[tuple], list[int], dict[str, str]]:
+        sql_cols = ", ".join(TASK_COLUMNS.values())
+        fetched = conn.execute(f"SELECT {sql_cols}, version FROM tasks ORDER BY pos").fetchall()
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        rows = _db_rows([r[:-1] for r in fetched])
+        versions = [int(r[-1] or 0) for r in fetched]
+        return rows, versions, meta
+
+    def _snapshot(self, rows: list[tuple], versions: list[int], meta: dict[str, str]) -> Snapshot:
+        from task_table import TaskTable
+
+        table = TaskTable.from_rows(rows)
+        with self._lock:
+            self._table = table
+            self._meta = dict(meta)
+        return Snapshot(
+            df=table.to_frame(),
+            start_date=date.fromisoformat(meta.get("start_date", date.today().isoformat())),
+            excludes_weekends=meta.get("excludes_weekends", "1") == "1",
+            excludes_holidays=meta.get("excludes_holidays", "0") == "1",
+            version=int(meta.get("version", 0)),
+            table=table,
+            row_versions=np.asarray(versions, dtype=np.int64),
+            meta=dict(meta),
+        )
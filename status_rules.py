@@ -0,0 +1,228 @@
+import numpy as np
+import pandas as pd
+
+from schedule_cache import task_index
+from scheduling import TaskGraph
+from task_table import STATUS_OPTIONS, set_value
+
+
+# =========================
+# REGLAS DE DEPENDENCIA
+# =========================
+# Las reglas usan el índice de la tabla (TaskGraph: ID -> fila, hijos por tarea) en vez de
+# filtrar el DataFrame completo en cada consulta. Si no se entrega, se obtiene de la caché.
+def get_status(df: pd.DataFrame, task_id: str, index: TaskGraph | None = None) -> str | None:
+    index = index or task_index(df)
+    i = index.pos.get(task_id)
+    return None if i is None else str(df["Estado"].iat[i])
+
+
+def has_dependents_in_progress_or_done(df: pd.DataFrame, task_id: str, index: TaskGraph | None = None) -> bool:
+    index = index or task_index(df)
+    i = index.pos.get(task_id)
+    if i is None:
+        return False
+    estados = df["Estado"]
+    return any(estados.iat[c] in ("En proceso", "Finalizado") for c in index.children[i])
+
+
+def dependency_ids(task_id: str, index: TaskGraph) -> list[str]:
+    """
+    Todas las dependencias de la tarea, incluidas las que no existen en la tabla.
+    """
+    i = index.pos.get(task_id)
+    if i is None:
+        return []
+    return [index.ids[p] for p in index.preds[i]] + index.missing.get(task_id, [])
+
+
+def pending_dependencies(df: pd.DataFrame, task_id: str, index: TaskGraph | None = None) -> list[str]:
+    index = index or task_index(df)
+    return [d for d in dependency_ids(task_id, index) if get_status(df, d, index) != "Finalizado"]
+
+
+def _status_error(estados, i: int, new_status: str, index: TaskGraph) -> str:
+    """
+    Motivo por el que la fila i no puede pasar a new_status ("" = se puede).
+    `estados` es una secuencia indexable por posición (array de la columna Estado o lista):
+    solo se leen la fila, sus dependencias y sus hijas.
+    """
+    current = str(estados[i])
+
+    # No avanzar si alguna dependencia no está finalizada
+    if new_status in ["En proceso", "Finalizado", "Atrasado"]:
+        pending = [index.ids[p] for p in index.preds[i] if estados[p] != "Finalizado"]
+        pending += index.missing.get(index.ids[i], [])
+        if len(pending) == 1:
+            return f"No puedes marcar esta tarea como '{new_status}' porque depende de '{pending[0]}' y aún no está Finalizado."
+        if pending:
+            names = ", ".join(f"'{d}'" for d in pending)
+            return f"No puedes marcar esta tarea como '{new_status}' porque depende de {names} y aún no están Finalizadas."
+
+    # Si ya hay tareas hijas en proceso/finalizadas, no permitir que esta baje de Finalizado
+    if current == "Finalizado" and new_status != "Finalizado":
+        if any(estados[c] in ("En proceso", "Finalizado") for c in index.children[i]):
+            return "No puedes cambiar esta tarea desde 'Finalizado' porque hay tareas posteriores que ya están En proceso o Finalizado."
+
+    if new_status not in STATUS_OPTIONS:
+        return "Estado inválido."
+
+    return ""
+
+
+def can_set_status(
+    df: pd.DataFrame, task_id: str, new_status: str, index: TaskGraph | None = None
+) -> tuple[bool, str]:
+    index = index or task_index(df)
+    i = index.pos.get(task_id)
+    if i is None:
+        return False, "Tarea no encontrada."
+    # .array no copia ni convierte la columna: la regla queda en O(dependencias + hijas)
+    msg = _status_error(df["Estado"].array, i, new_status, index)
+    return not msg, msg
+
+
+def diff_rows(prev: pd.DataFrame, edited: pd.DataFrame) -> np.ndarray:
+    """
+    Posiciones de las filas que cambiaron entre prev y edited (comparación vectorizada por columna).
+    """
+    if prev.shape != edited.shape or list(prev.columns) != list(edited.columns):
+        return np.arange(len(edited))
+
+    changed = np.zeros(len(edited), dtype=bool)
+    for col in edited.columns:
+        a = prev[col].to_numpy()
+        b = edited[col].to_numpy()
+        changed |= (a != b) & ~(pd.isna(a) & pd.isna(b))
+    return np.flatnonzero(changed)
+
+
+def apply_status(
+    df: pd.DataFrame, task_id: str, new_status: str, index: TaskGraph | None = None
+) -> tuple[pd.DataFrame, bool, str]:
+    index = index or task_index(df)
+    ok, msg = can_set_status(df, task_id, new_status, index)
+    if not ok:
+        return df, False, msg
+
+    if task_id not in index.pos or task_id in index.duplicates:
+        return df, False, "No se pudo actualizar (ID duplicado o inexistente)."
+
+    i = index.pos[task_id]
+    df.iloc[i, df.columns.get_loc("Estado")] = new_status
+
+    # regla suave: si marcas "Atrasado" y la desviación es 0, setear a +1 por defecto
+    if new_status == "Atrasado":
+        dev_col = df.columns.get_loc("Desviación (días hábiles)")
+        try:
+            if int(df.iat[i, dev_col]) == 0:
+                df.iloc[i, dev_col] = 1
+        except Exception:
+            df.iloc[i, dev_col] = 1
+
+    return df, True, ""
+
+
+def revert_event(df: pd.DataFrame, event: dict, index: TaskGraph | None = None) -> tuple[pd.DataFrame, bool, str]:
+    """
+    Deshace un cambio de celda del historial (vuelve al valor anterior), si la celda no cambió después.
+    """
+    pos, field = event["pos"], event["field"]
+    if pos is None or pos >= len(df) or field not in df.columns:
+        return df, False, "La fila o el campo ya no existen."
+    col = df.columns.get_loc(field)
+    current = df.iat[pos, col]
+    if str(current) != str(event["new"]):
+        return df, False, f"{event['id']}: '{field}' cambió después (ahora {current}); no se deshace."
+
+    if field == "Estado":
+        ok, msg = can_set_status(df, str(df.iat[pos, df.columns.get_loc("ID")]).strip(), event["old"], index)
+        if not ok:
+            return df, False, msg
+
+    out = df.copy(deep=False)  # copy-on-write: solo se copia la columna que cambia
+    set_value(out, pos, field, event["old"])
+    return out, True, ""
+
+
+def batch_order(task_ids: list[str], new_status: str, index: TaskGraph) -> list[int]:
+    """
+    Posiciones de las tareas del lote en el orden en que se validan.
+    Hacia 'Finalizado' en orden topológico: cerrar una tarea habilita a sus hijas del mismo lote.
+    Hacia otros estados en orden inverso: primero las hijas, así una tarea puede dejar
+    'Finalizado' cuando el lote también baja a sus hijas.
+    Las tareas sin orden (ciclos, dependencias rotas) van al final.
+    """
+    rank = {i: r for r, i in enumerate(index.order)}
+    positions = list(dict.fromkeys(index.pos[t] for t in task_ids if t in index.pos))
+    ordered = sorted((i for i in positions if i in rank), key=rank.get, reverse=new_status != "Finalizado")
+    return ordered + [i for i in positions if i not in rank]
+
+
+def apply_status_batch(
+    df: pd.DataFrame, task_ids: list[str], new_status: str, index: TaskGraph | None = None
+) -> tuple[pd.DataFrame, list[str], list[str]]:
+    """
+    Aplica new_status a varias tareas en una pasada: valida cada una en orden de dependencias
+    contra el estado que va dejando el propio lote (ver batch_order) y escribe las columnas
+    una sola vez. Devuelve (tabla nueva, IDs actualizados, avisos de las rechazadas).
+    `df` no se modifica; si nada cambia se devuelve la misma tabla.
+    """
+    index = index or task_index(df)
+    warnings = [f"{t}: Tarea no encontrada." for t in dict.fromkeys(task_ids) if t not in index.pos]
+    warnings += [f"{t}: No se pudo actualizar (ID duplicado)." for t in dict.fromkeys(task_ids) if t in index.duplicates]
+    task_ids = [t for t in task_ids if t in index.pos and t not in index.duplicates]
+
+    estados = df["Estado"].astype(str).to_numpy(copy=True)
+    dev_col = df.columns.get_loc("Desviación (días hábiles)") if "Desviación (días hábiles)" in df.columns else None
+
+    applied, bumped = [], []
+    for i in batch_order(task_ids, new_status, index):
+        if estados[i] == new_status:
+            continue
+        msg = _status_error(estados, i, new_status, index)
+        if msg:
+            warnings.append(f"{index.ids[i]}: {msg}")
+            continue
+        estados[i] = new_status
+        applied.append(index.ids[i])
+
+        # misma regla suave que apply_status: "Atrasado" con desviación 0 pasa a +1
+        if new_status == "Atrasado" and dev_col is not None:
+            try:
+                if int(df.iat[i, dev_col]) == 0:
+                    bumped.append(i)
+            except Exception:
+                bumped.append(i)
+
+    if not applied:
+        return df, applied, warnings
+    out = df.copy(deep=False)
+    out["Estado"] = estados
+    if bumped:
+        out.iloc[bumped, dev_col] = 1
+    return out, applied, warnings
+
+
+def validate_status_edits(
+    prev_df: pd.DataFrame, validated: pd.DataFrame, changed: np.ndarray, index: TaskGraph | None = None
+) -> list[str]:
+    """
+    Revisa los cambios de Estado de las filas `changed` (edición de la tabla). Las transiciones
+    no permitidas vuelven al estado anterior en `validated` (se modifica); devuelve los avisos.
+    Las columnas se leen una vez: el costo es por fila cambiada, no por tamaño de la tabla.
+    """
+    index = index or task_index(validated)
+    old = prev_df["Estado"].astype(str).to_numpy()
+    estados = validated["Estado"].astype(str).to_numpy(copy=True)
+    warnings = []
+    for i in changed:
+        if estados[i] == old[i]:
+            continue
+        msg = _status_error(estados, i, estados[i], index)
+        if msg:
+            estados[i] = old[i]
+            warnings.append(f"{index.ids[i]}: {msg}")
+    if warnings:
+        validated["Estado"] = estados
+    return warnings
@@ -0,0 +1,201 @@
+import hashlib
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+
+STATUS_OPTIONS = ["Pendiente", "En proceso", "Finalizado", "Atrasado"]
+
+# columnas de texto (categóricas) y enteras (con su valor por defecto), en el orden de la tabla
+TEXT_COLUMNS = ("Fase", "ID", "Tarea", "Depende_de", "Estado", "Responsable")
+INT_COLUMNS = {"Duración (días hábiles)": 1, "Desviación (días hábiles)": 0, "Dedicación (%)": 100}
+COLUMN_ORDER = (
+    "Fase", "ID", "Tarea", "Depende_de", "Duración (días hábiles)", "Estado", "Desviación (días hábiles)",
+    "Responsable", "Dedicación (%)",
+)
+
+
+# =========================
+# TABLA COMPACTA DE TAREAS
+# =========================
+# Una tabla de 100k tareas como filas de tuplas Python pesa ~45 MB por sesión; así pesa unos
+# pocos MB: cada columna de texto es un Categorical (códigos enteros + categorías únicas en
+# un Index de pandas, que no se copia nunca) y las columnas enteras son int16 cuando caben.
+# La tabla es inmutable: los DataFrames que entrega copian solo los códigos (bytes por fila)
+# y comparten las categorías, y dos versiones de la tabla se comparan por códigos.
+def _to_int(value, default: int) -> int:
+    try:
+        return int(value)
+    except Exception:
+        return default
+
+
+def _text(value) -> str:
+    return "" if value is None or (isinstance(value, float) and value != value) else str(value)
+
+
+def _int_array(values) -> np.ndarray:
+    arr = np.asarray(values, dtype=np.int64)
+    # int16 salvo que algún valor no quepa (no se trunca nunca)
+    if not len(arr) or (arr.min() >= np.iinfo(np.int16).min and arr.max() <= np.iinfo(np.int16).max):
+        arr = arr.astype(np.int16)
+    arr.flags.writeable = False
+    return arr
+
+
+def _categorical(values, extra: list[str] | None = None) -> pd.Categorical:
+    cat = pd.Categorical(values)
+    missing = [v for v in (extra or []) if v not in cat.categories]
+    if missing:
+        cat = cat.add_categories(missing)
+    return cat
+
+
+def _text_column(series: pd.Series, extra: list[str] | None = None) -> pd.Categorical:
+    if isinstance(series.dtype, pd.CategoricalDtype) and not series.isna().any():
+        cats = series.cat.categories
+        if cats.dtype != object or all(isinstance(c, str) for c in cats):
+            # ya compacta (p. ej. la tabla que salió de to_frame): se reutilizan códigos y categorías
+            cat = series.array.copy()
+            missing = [v for v in (extra or []) if v not in cats]
+            return cat.add_categories(missing) if missing else cat
+    if pd.api.types.infer_dtype(series, skipna=True) == "string":
+        # texto (con o sin vacíos): se factoriza la columna tal cual, sin pasar por Python
+        return _categorical(series.fillna(""), extra)
+    return _categorical([_text(v) for v in series.tolist()], extra)
+
+
+def _int_column(series: pd.Series, default: int) -> np.ndarray:
+    if series.dtype.kind in "iu":
+        return _int_array(series.to_numpy())
+    return _int_array([_to_int(v, default) for v in series.tolist()])
+
+
+@dataclass(frozen=True, eq=False)
+class TaskTable:
+    """
+    Tabla de tareas en columnas compactas e inmutables. Se arma desde filas (SQLite) o desde
+    un DataFrame (edición en la app) y vuelve a DataFrame con to_frame().
+    """
+    text: dict[str, pd.Categorical]
+    ints: dict[str, np.ndarray]
+    _digest: list[str] = field(default_factory=list, repr=False)   # memo de fingerprint()
+
+    @classmethod
+    def from_rows(cls, rows: list[tuple]) -> "TaskTable":
+        """Filas ya normalizadas (tuplas en el orden de COLUMN_ORDER, como las de state_store)."""
+        cols = list(zip(*rows)) if rows else [()] * len(COLUMN_ORDER)
+        by_name = dict(zip(COLUMN_ORDER, cols))
+        return cls(
+            text={
+                c: _categorical(list(by_name[c]), STATUS_OPTIONS if c == "Estado" else None) for c in TEXT_COLUMNS
+            },
+            ints={c: _int_array(list(by_name[c])) for c in INT_COLUMNS},
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "TaskTable":
+        """
+        Misma normalización que las filas guardadas: texto None/NaN -> "", enteros inválidos ->
+        su valor por defecto; una columna que falta se llena con "" o con el valor por defecto.
+        """
+        n = len(df)
+        text = {}
+        for c in TEXT_COLUMNS:
+            extra = STATUS_OPTIONS if c == "Estado" else None
+            text[c] = _text_column(df[c], extra) if c in df.columns else _categorical([""] * n, extra)
+        ints = {}
+        for c, default in INT_COLUMNS.items():
+            ints[c] = _int_column(df[c], default) if c in df.columns else _int_array(np.full(n, default))
+        return cls(text=text, ints=ints)
+
+    def __len__(self) -> int:
+        return len(self.text["ID"])
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria de códigos + enteros (las categorías se comparten entre versiones)."""
+        return sum(c.codes.nbytes for c in self.text.values()) + sum(a.nbytes for a in self.ints.values())
+
+    def column(self, name: str, positions=None) -> list:
+        """Valores Python de una columna (todas las filas o solo `positions`)."""
+        if name in self.ints:
+            values = self.ints[name]
+            return (values if positions is None else values[positions]).tolist()
+        cat = self.text[name]
+        codes = cat.codes if positions is None else cat.codes[positions]
+        return cat.categories.take(codes).tolist()
+
+    def rows(self, positions=None) -> list[tuple]:
+        """Filas como tuplas (orden de COLUMN_ORDER); todas o solo `positions`."""
+        return list(zip(*(self.column(c, positions) for c in COLUMN_ORDER)))
+
+    def changed_positions(self, other: "TaskTable") -> np.ndarray:
+        """
+        Posiciones donde esta tabla difiere de `other` (más las filas que `other` no tiene).
+        Compara códigos: el texto se traduce una vez por categoría, no por fila.
+        """
+        n, m = len(self), min(len(self), len(other))
+        diff = np.zeros(m, dtype=bool)
+        for c in TEXT_COLUMNS:
+            mine, theirs = self.text[c], other.text[c]
+            if mine.categories is theirs.categories or mine.categories.equals(theirs.categories):
+                diff |= mine.codes[:m] != theirs.codes[:m]
+            else:
+                remap = theirs.categories.get_indexer(mine.categories)
+                diff |= remap[mine.codes[:m]] != theirs.codes[:m]
+        for c in INT_COLUMNS:
+            diff |= self.ints[c][:m] != other.ints[c][:m]
+        return np.concatenate([np.flatnonzero(diff), np.arange(m, n)])
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        DataFrame con las columnas de siempre: texto categórico, enteros int16 (o más anchos).
+        Copia solo los códigos: las categorías se comparten con la tabla.
+        """
+        data = {c: (self.ints[c].copy() if c in self.ints else self.text[c].copy()) for c in COLUMN_ORDER}
+        return pd.DataFrame(data)
+
+    def fingerprint(self) -> str:
+        if not self._digest:
+            h = hashlib.blake2b(digest_size=16)
+            for c in TEXT_COLUMNS:
+                cat = self.text[c]
+                h.update("\x1f".join(cat.categories.tolist()).encode("utf-8"))
+                h.update(cat.codes.tobytes())
+            for c in INT_COLUMNS:
+                h.update(self.ints[c].astype(np.int64).tobytes())
+            self._digest.append(h.hexdigest())
+        return self._digest[0]
+
+
+def editor_frame(df: pd.DataFrame, positions=None) -> pd.DataFrame:
+    """
+    Ventana de la tabla con los tipos que espera st.data_editor: texto como str y enteros
+    como int64 (las columnas categóricas restringirían los valores a las categorías existentes).
+    """
+    out = df if positions is None else df.iloc[positions]
+    plain = {}
+    for col in out.columns:
+        if isinstance(out[col].dtype, pd.CategoricalDtype):
+            plain[col] = out[col].astype(str)
+        elif col in INT_COLUMNS:
+            plain[col] = out[col].astype(np.int64)
+    return out.assign(**plain) if plain else out
+
+
+def set_value(df: pd.DataFrame, pos: int, col: str, value):
+    """
+    df.iat[pos, col] = value sin chocar con los tipos compactos: agrega la categoría si el
+    texto es nuevo y ensancha la columna entera si el valor no cabe en int16.
+    Modifica `df` (con copy-on-write, copiar con deep=False antes basta para no tocar el original).
+    """
+    series = df[col]
+    if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+        df[col] = series.cat.add_categories([value])
+    elif series.dtype.kind == "i" and isinstance(value, (int, np.integer)):
+        info = np.iinfo(series.dtype)
+        if not info.min <= value <= info.max:
+            df[col] = series.astype(np.int64)
+    df.iat[pos, df.columns.get_loc(col)] = value
@@ -0,0 +1,77 @@
+import math
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+
+PAGE_SIZES = (25, 50, 100, 250, 500)
+
+
+@dataclass(frozen=True)
+class TaskView:
+    """
+    Ventana visible de la tabla: filtros por Fase / Estado / rango de fechas + página.
+    Vacío = sin filtro. Es hashable: sirve como parte de la clave de caché del Gantt.
+    """
+    fases: tuple[str, ...] = ()
+    estados: tuple[str, ...] = ()
+    desde: date | None = None
+    hasta: date | None = None
+    page: int = 0
+    page_size: int = 50
+
+    @property
+    def filters_dates(self) -> bool:
+        return self.desde is not None or self.hasta is not None
+
+
+def filter_mask(schedule_df: pd.DataFrame, view: TaskView) -> np.ndarray:
+    """
+    Filas que pasan los filtros (vectorizado). El rango de fechas toma las tareas que se
+    traslapan con [desde, hasta]; las tareas sin fechas solo se muestran sin filtro de fechas.
+    """
+    mask = np.ones(len(schedule_df), dtype=bool)
+    if view.fases:
+        mask &= schedule_df["Fase"].astype(str).isin(view.fases).to_numpy()
+    if view.estados:
+        mask &= schedule_df["Estado"].astype(str).isin(view.estados).to_numpy()
+    if view.filters_dates:
+        inicio = schedule_df["Inicio"].to_numpy(dtype="datetime64[D]")
+        fin = schedule_df["Fin"].to_numpy(dtype="datetime64[D]")
+        mask &= ~(np.isnat(inicio) | np.isnat(fin))
+        if view.hasta is not None:
+            mask &= inicio <= np.datetime64(view.hasta, "D")
+        if view.desde is not None:
+            mask &= fin >= np.datetime64(view.desde, "D")
+    return mask
+
+
+def page_count(n_rows: int, page_size: int) -> int:
+    return max(1, math.ceil(n_rows / page_size))
+
+
+def visible_positions(schedule_df: pd.DataFrame, view: TaskView) -> tuple[np.ndarray, int]:
+    """
+    (posiciones de fila de la página visible, total de filas filtradas).
+    La página se acota al rango válido (p. ej. si un filtro dejó menos páginas).
+    """
+    matched = np.flatnonzero(filter_mask(schedule_df, view))
+    page = min(max(view.page, 0), page_count(len(matched), view.page_size) - 1)
+    lo = page * view.page_size
+    return matched[lo:lo + view.page_size], len(matched)
+
+
+def merge_slice(full_df: pd.DataFrame, edited_slice: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+    """
+    Devuelve la tabla completa con las filas `positions` reemplazadas por la ventana editada.
+    """
+    merged = full_df.copy(deep=False)  # las columnas se reemplazan enteras
+    for col in edited_slice.columns:
+        values = merged[col].to_numpy(copy=True)
+        if values.dtype != edited_slice[col].dtype:
+            values = values.astype(object)
+        values[positions] = edited_slice[col].to_numpy()
+        merged[col] = values
+    return merged
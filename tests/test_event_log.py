@@ -0,0 +1,68 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+
+from event_log import EventLog
+from plan_templates import default_df
+from state_store import SqliteStateStore
+from task_table import set_value
+
+KICKOFF = date(2026, 1, 5)
+DEV = "Desviación (días hábiles)"
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "plan.sqlite"
+    s = SqliteStateStore(path, event_log=EventLog.beside(path))
+    s.save(default_df(), KICKOFF, True, False)
+    return s
+
+
+def _edit(snap, pos, col, value):
+    df = snap.df.copy(deep=False)
+    set_value(df, pos, col, value)
+    return df
+
+
+def test_rolled_back_save_leaves_no_events(store, monkeypatch):
+    snap = store.load_snapshot()
+    log = store.event_log
+    before = log.events_path.read_bytes() if log.events_path.exists() else b""
+
+    connect = store._connect
+
+    @contextmanager
+    def failing(immediate=False):
+        # el COMMIT falla después de escribir todo: la transacción se deshace
+        with connect(immediate) as conn:
+            yield conn
+            raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(store, "_connect", failing)
+    with pytest.raises(sqlite3.OperationalError):
+        store.save(_edit(snap, 1, DEV, 4), KICKOFF, True, False, base=snap)
+    monkeypatch.undo()
+
+    assert store.version() == snap.version
+    assert (log.events_path.read_bytes() if log.events_path.exists() else b"") == before
+    rows, _ = log.state_at()
+    assert rows == snap.table.rows()
+
+
+def test_replay_applies_versions_in_order(store):
+    snap = store.load_snapshot()
+    first = store.save(_edit(snap, 1, DEV, 3), KICKOFF, True, False, base=snap).snapshot
+    store.save(_edit(first, 1, DEV, 5), KICKOFF, True, False, base=first)
+
+    # dos procesos guardaron casi a la vez: el bloque de la versión menor quedó al final
+    log = store.event_log
+    lines = log.events_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    last_two = sorted(lines[-2:], key=lambda line: -json.loads(line)["v"])
+    log.events_path.write_text("".join(lines[:-2] + last_two), encoding="utf-8")
+
+    rows, _ = log.state_at()
+    assert rows == store.load_snapshot().table.rows()
@@ -0,0 +1,31 @@
+from datetime import date
+
+from plan_templates import TEMPLATES
+from portfolio import Portfolio
+from task_table import set_value
+
+KICKOFF = date(2026, 1, 5)
+DEV = "Desviación (días hábiles)"
+
+
+def test_update_settings_keeps_rows_saved_by_another_session(tmp_path, monkeypatch):
+    portfolio = Portfolio(tmp_path)
+    slug = portfolio.create("Tienda", next(iter(TEMPLATES)), KICKOFF)
+    store = portfolio.store(slug)
+
+    # update_settings lee el plan y otra sesión guarda una fila antes de que escriba
+    stale = store.load_snapshot()
+    df = stale.df.copy(deep=False)
+    set_value(df, 1, DEV, 4)
+    store.save(df, KICKOFF, True, False, base=stale)
+    monkeypatch.setattr(store, "load_snapshot", lambda: stale)
+    monkeypatch.setattr(store, "load", lambda: stale.as_tuple())
+
+    result = portfolio.update_settings(slug, date(2026, 2, 2), True, True)
+    monkeypatch.undo()
+
+    assert result.conflicts == []
+    current = store.load_snapshot()
+    assert current.df[DEV].iat[1] == 4
+    assert current.start_date == date(2026, 2, 2)
+    assert current.excludes_holidays
@@ -0,0 +1,119 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from plan_templates import default_df
+from state_store import SqliteStateStore
+from task_table import set_value
+
+KICKOFF = date(2026, 1, 5)
+DEV = "Desviación (días hábiles)"
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = SqliteStateStore(tmp_path / "plan.sqlite")
+    s.save(default_df(), KICKOFF, True, False)
+    return s
+
+
+def _save(store, df, base):
+    return store.save(df, KICKOFF, True, False, base=base)
+
+
+def _edit(snap, pos, col, value) -> pd.DataFrame:
+    df = snap.df.copy(deep=False)
+    set_value(df, pos, col, value)
+    return df
+
+
+def _append(df, *ids) -> pd.DataFrame:
+    new = pd.DataFrame([{**df.iloc[-1].to_dict(), "ID": tid, "Tarea": f"Tarea {tid}", "Depende_de": ""} for tid in ids])
+    return pd.concat([df.astype(object), new], ignore_index=True)
+
+
+def _stored(store) -> pd.DataFrame:
+    return store.load_snapshot().df
+
+
+# =========================
+# DOS SESIONES SOBRE LA MISMA VERSIÓN
+# =========================
+def test_different_fields_of_one_row_are_merged(store):
+    a = b = store.load_snapshot()
+    _save(store, _edit(a, 1, "Tarea", "Renombrada"), a)
+    result = _save(store, _edit(b, 1, DEV, 3), b)
+
+    assert result.conflicts == []
+    assert result.remote_changes
+    row = _stored(store).iloc[1]
+    assert row["Tarea"] == "Renombrada"
+    assert row[DEV] == 3
+
+
+def test_same_field_keeps_the_stored_value_and_reports(store):
+    a = b = store.load_snapshot()
+    _save(store, _edit(a, 1, DEV, 3), a)
+    result = _save(store, _edit(b, 1, DEV, 5), b)
+
+    assert len(result.conflicts) == 1
+    assert str(a.df["ID"].iloc[1]) in result.conflicts[0]
+    assert _stored(store)[DEV].iloc[1] == 3
+
+
+def test_same_field_to_the_same_value_is_not_a_conflict(store):
+    a = b = store.load_snapshot()
+    _save(store, _edit(a, 1, DEV, 3), a)
+    result = _save(store, _edit(b, 1, DEV, 3), b)
+
+    assert result.conflicts == []
+    assert result.written == 0
+
+
+# =========================
+# ALTAS Y BAJAS CONCURRENTES
+# =========================
+def test_trim_is_refused_when_another_session_appended(store):
+    a = b = store.load_snapshot()
+    n = len(a.df)
+    _save(store, _append(a.df, "nueva"), a)
+    result = _save(store, b.df.iloc[:-1], b)
+
+    assert any("eliminar" in c for c in result.conflicts)
+    stored = _stored(store)
+    assert len(stored) == n + 1
+    assert stored["ID"].iloc[-1] == "nueva"
+
+
+def test_trim_without_concurrent_changes(store):
+    a = store.load_snapshot()
+    result = _save(store, a.df.iloc[:-1], a)
+
+    assert result.conflicts == []
+    assert len(_stored(store)) == len(a.df) - 1
+
+
+def test_appends_past_the_other_sessions_rows(store):
+    a = b = store.load_snapshot()
+    n = len(a.df)
+    _save(store, _append(a.df, "de_a"), a)
+    result = _save(store, _append(b.df, "de_b1", "de_b2"), b)
+
+    # misma posición nueva en ambas: gana la guardada; la fila siguiente se agrega al final
+    assert len(result.conflicts) == 1
+    stored = _stored(store)
+    assert stored["ID"].iloc[n:].tolist() == ["de_a", "de_b2"]
+
+
+# =========================
+# SIN CAMBIOS
+# =========================
+def test_noop_save_writes_nothing(store):
+    snap = store.load_snapshot()
+    result = _save(store, snap.df, snap)
+
+    assert result.written == 0
+    assert result.conflicts == []
+    assert not result.remote_changes
+    assert store.version() == snap.version